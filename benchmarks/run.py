@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import json
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from benchmarks.synthetic import SyntheticWorld, create_synthetic_world
+from food_manager.cache import RESOLUTION_CACHE
+from food_manager.editor import WeeklyMealPlanManager
+from food_manager.engine import NutrientEngine
+from food_manager.schema import (
+    Category,
+    Day,
+    MealSlot,
+    Product,
+    Ration,
+    Substance,
+    WeeklyMealPlan,
+    create_base_world,
+)
+from food_manager.utils import (
+    PriceCalculator,
+    get_category_grams,
+    get_leaf_weights,
+    get_nutrient_ratios,
+)
+from food_manager.world import load_world
+
+BASELINES_PATH = Path(__file__).parent / "baselines.json"
+
+GREEN = "\033[32m"
+RED = "\033[31m"
+
+RESET = "\033[0m"
+
+
+def measure(function: Callable[[], object], repeat: int) -> float:
+    """
+    Measure the best wall time of a function over a number of runs, in seconds.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def iterate_rations(synthetic_world: SyntheticWorld) -> list[Ration]:
+    return [
+        ration
+        for weekly_meal_plan in synthetic_world.weekly_meal_plans
+        for daily_meal_plan in weekly_meal_plan.dailies.values()
+        for meal in daily_meal_plan.meals.values()
+        for ration in meal.rations
+    ]
+
+
+def create_benchmarks(
+    synthetic_world: SyntheticWorld, world_path: Path, cache_path: Path
+) -> dict[str, Callable[[], object]]:
+    rations = iterate_rations(synthetic_world)
+    substances = [
+        *synthetic_world.simple_substances,
+        *synthetic_world.composite_substances,
+    ]
+
+    def compile_cold() -> None:
+        RESOLUTION_CACHE.invalidate()
+        for substance in substances:
+            get_leaf_weights(substance)
+
+    def nutrient_ratios_cold() -> None:
+        RESOLUTION_CACHE.invalidate()
+        for substance in substances:
+            get_nutrient_ratios(substance)
+
+    def category_grams_warm() -> None:
+        for ration in rations:
+            get_category_grams(ration)
+
+    def price_calculator_create() -> None:
+        PriceCalculator.create(synthetic_world.products)
+
+    def price_calculator_get_price() -> None:
+        price_calculator = PriceCalculator.create(synthetic_world.products)
+        for ration in rations:
+            price_calculator.get_price(ration)
+
+    def engine_evaluate() -> None:
+        engine = NutrientEngine()
+        for weekly_meal_plan in synthetic_world.weekly_meal_plans:
+            engine.evaluate(engine.vectorize(weekly_meal_plan))
+
+    def editor_single_edits() -> None:
+        for weekly_meal_plan in synthetic_world.weekly_meal_plans[:10]:
+            _edit_weekly_meal_plan(WeeklyMealPlanManager(weekly_meal_plan))
+
+    def editor_batched_edits() -> None:
+        for weekly_meal_plan in synthetic_world.weekly_meal_plans[:10]:
+            manager = WeeklyMealPlanManager(weekly_meal_plan)
+            with manager.batch():
+                _edit_weekly_meal_plan(manager)
+
+    def world_populate() -> None:
+        load_world(world_path, use_snapshot=False)
+
+    def world_populate_snapshot() -> None:
+        load_world(world_path, use_snapshot=True, cache_path=cache_path)
+
+    world = load_world(world_path, use_snapshot=False)
+    weekly_meal_plan_balloonist = world.get_balloonist(WeeklyMealPlan)
+    deflated_weekly_meal_plans = [
+        json.loads(json.dumps(weekly_meal_plan_balloonist.deflate(weekly_meal_plan)))
+        for weekly_meal_plan in synthetic_world.weekly_meal_plans
+    ]
+
+    def weekly_meal_plan_inflate() -> None:
+        for deflated_weekly_meal_plan in deflated_weekly_meal_plans:
+            weekly_meal_plan_balloonist.inflate(deflated_weekly_meal_plan)
+
+    return {
+        "compile_cold": compile_cold,
+        "get_nutrient_ratios_cold": nutrient_ratios_cold,
+        "get_category_grams_warm": category_grams_warm,
+        "price_calculator_create": price_calculator_create,
+        "price_calculator_get_price": price_calculator_get_price,
+        "nutrient_engine_evaluate": engine_evaluate,
+        "editor_single_edits": editor_single_edits,
+        "editor_batched_edits": editor_batched_edits,
+        "world_populate": world_populate,
+        "world_populate_snapshot": world_populate_snapshot,
+        "weekly_meal_plan_inflate": weekly_meal_plan_inflate,
+    }
+
+
+def write_world(synthetic_world: SyntheticWorld, world_path: Path) -> None:
+    """
+    Write the named balloons of a synthetic world to a world directory.
+    """
+    world = create_base_world().to_open(world_path)
+    for type_, balloons in (
+        (Category, synthetic_world.categories),
+        (Substance, synthetic_world.simple_substances),
+        (Substance, synthetic_world.composite_substances),
+        (Ration, synthetic_world.rations),
+        (Product, synthetic_world.products),
+        (MealSlot, synthetic_world.meal_slots),
+    ):
+        manager = world.get_manager(type_)
+        for balloon in balloons:
+            manager.track(balloon)
+
+
+def main(repeat: int, save: bool, tolerance: float) -> int:
+    synthetic_world = create_synthetic_world()
+
+    baselines: dict[str, float] = {}
+    if BASELINES_PATH.exists():
+        baselines = json.loads(BASELINES_PATH.read_text())
+
+    results: dict[str, float] = {}
+    regression_count = 0
+    with tempfile.TemporaryDirectory() as temporary_path:
+        world_path = Path(temporary_path) / "world"
+        cache_path = Path(temporary_path) / "cache"
+        write_world(synthetic_world, world_path)
+        benchmarks = create_benchmarks(synthetic_world, world_path, cache_path)
+        for name, benchmark in benchmarks.items():
+            seconds = measure(benchmark, repeat)
+            results[name] = seconds
+
+            print(f"{name:<32}{seconds * 1000:10.1f} ms", end="")
+            if (baseline := baselines.get(name)) is not None:
+                ratio = seconds / baseline
+                if ratio > 1 + tolerance:
+                    regression_count += 1
+                    print(f"  {RED}{ratio:5.2f}x baseline{RESET}")
+                else:
+                    print(f"  {GREEN}{ratio:5.2f}x baseline{RESET}")
+            else:
+                print()
+
+    if save:
+        BASELINES_PATH.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Saved baselines to {BASELINES_PATH}")
+
+    return 1 if regression_count > 0 and not save else 0
+
+
+# --------------------------------------------------------------------------------------
+
+
+def _edit_weekly_meal_plan(manager: WeeklyMealPlanManager) -> None:
+    for day in Day:
+        daily_meal_plan_manager = manager.get_daily_meal_plan_manager(day)
+        entity = daily_meal_plan_manager.get_entity()
+        for meal_slot in list(entity.meals):
+            meal_manager = daily_meal_plan_manager.get_meal_manager(meal_slot)
+            meal = meal_manager.get_entity()
+            for index, ration in reversed(list(enumerate(meal.rations))):
+                meal_manager.replace_ration(index, ration)
+            daily_meal_plan_manager.upsert_meal(meal_slot, meal_manager.get_entity())
+        manager.upsert_daily_meal_plan(day, daily_meal_plan_manager.get_entity())
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, required=False, default=3)
+    parser.add_argument(
+        "--save",
+        action="store_true",
+        help="Store the results as the new baselines.",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        required=False,
+        default=0.2,
+        help="The relative slowdown over a baseline reported as a regression.",
+    )
+    args = parser.parse_args()
+
+    sys.exit(main(args.repeat, args.save, args.tolerance))
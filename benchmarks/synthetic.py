@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+
+from food_manager.schema import (
+    Category,
+    CompositeSubstance,
+    DailyMealPlan,
+    Day,
+    DehydratedSubstance,
+    Meal,
+    MealSlot,
+    Money,
+    Nutrient,
+    Product,
+    Ration,
+    RationProduct,
+    SimpleSubstance,
+    Substance,
+    SubstanceProduct,
+    WeeklyMealPlan,
+)
+
+
+@dataclass(frozen=True)
+class SyntheticWorld:
+    """
+    A deterministic synthetic world for benchmarks.
+    """
+
+    categories: list[Category]
+    """
+    The named categories.
+    """
+
+    simple_substances: list[SimpleSubstance]
+    """
+    The named simple substances.
+    """
+
+    composite_substances: list[CompositeSubstance]
+    """
+    The named composite substances, each made of substances created before it.
+    """
+
+    rations: list[Ration]
+    """
+    The named rations.
+    """
+
+    products: list[Product]
+    """
+    The named products.
+    """
+
+    meal_slots: list[MealSlot]
+    """
+    The named meal slots.
+    """
+
+    weekly_meal_plans: list[WeeklyMealPlan]
+    """
+    The weekly meal plans, one per week.
+    """
+
+
+def create_synthetic_world(
+    seed: int = 0,
+    category_count: int = 1000,
+    simple_substance_count: int = 3000,
+    composite_substance_count: int = 2000,
+    max_component_count: int = 8,
+    dehydration_chain_length: int = 4,
+    ration_count: int = 500,
+    week_count: int = 104,
+) -> SyntheticWorld:
+    """
+    Create a synthetic world, identical for identical arguments.
+
+    Composite substances form a deep and wide DAG, as each of them picks its
+    components among all the substances created before it, and some components are
+    wrapped in chains of dehydrated substances.
+    """
+    rng = random.Random(seed)
+
+    categories = [Category(f"category-{i}") for i in range(category_count)]
+
+    simple_substances: list[SimpleSubstance] = []
+    for i in range(simple_substance_count):
+        carb, fat, protein = (rng.random() for _ in range(3))
+        total = (carb + fat + protein) / rng.uniform(0.1, 1.0)
+        nutrient_ratios = {
+            Nutrient.CARB: carb / total,
+            Nutrient.FAT: fat / total,
+            Nutrient.PROTEIN: protein / total,
+        }
+        if rng.random() < 0.05:
+            nutrient_ratios[Nutrient.ETHANOL] = rng.uniform(0.01, 0.4)
+        simple_substances.append(
+            SimpleSubstance(
+                category=rng.choice(categories), nutrient_ratios=nutrient_ratios
+            ).to_named(f"simple-substance-{i}")
+        )
+
+    substances: list[Substance] = list(simple_substances)
+    composite_substances: list[CompositeSubstance] = []
+    for i in range(composite_substance_count):
+        components: list[CompositeSubstance.Component] = []
+        for _ in range(rng.randint(2, max_component_count)):
+            # Favor recent substances, so that composites nest deeply
+            index = len(substances) - 1 - int(rng.expovariate(1 / 50)) % len(substances)
+            substance = substances[index]
+            if rng.random() < 0.1:
+                for _ in range(rng.randint(1, dehydration_chain_length)):
+                    substance = DehydratedSubstance(
+                        category=substance.category,
+                        original_substance=substance,
+                        dehydration_ratio=rng.uniform(0.2, 0.9),
+                    )
+            components.append(
+                CompositeSubstance.Component(
+                    substance=substance, proportion=rng.uniform(1.0, 500.0)
+                )
+            )
+        composite_substance = CompositeSubstance(
+            category=rng.choice(categories), components=tuple(components)
+        ).to_named(f"composite-substance-{i}")
+        composite_substances.append(composite_substance)
+        substances.append(composite_substance)
+
+    rations = [
+        Ration(
+            substance=rng.choice(substances), grams=rng.uniform(10.0, 400.0)
+        ).to_named(f"ration-{i}")
+        for i in range(ration_count)
+    ]
+
+    products: list[Product] = []
+    for i, simple_substance in enumerate(simple_substances):
+        if rng.random() < 0.9:
+            products.append(
+                SubstanceProduct(
+                    item=simple_substance, kg_price=_create_money(rng)
+                ).to_named(f"substance-product-{i}")
+            )
+    for i, ration in enumerate(rations):
+        if rng.random() < 0.2:
+            products.append(
+                RationProduct(item=ration, price=_create_money(rng)).to_named(
+                    f"ration-product-{i}"
+                )
+            )
+
+    meal_slots = [MealSlot(name) for name in ("breakfast", "lunch", "snack", "dinner")]
+
+    weekly_meal_plans: list[WeeklyMealPlan] = []
+    for _ in range(week_count):
+        dailies: dict[Day, DailyMealPlan] = {}
+        for day in Day:
+            meals: dict[MealSlot, Meal] = {}
+            for meal_slot in meal_slots:
+                meal_rations: list[Ration] = []
+                for _ in range(rng.randint(1, 4)):
+                    if rng.random() < 0.5:
+                        meal_rations.append(rng.choice(rations))
+                    else:
+                        meal_rations.append(_create_anonymous_ration(rng, substances))
+                meals[meal_slot] = Meal(slot=meal_slot, rations=tuple(meal_rations))
+            dailies[day] = DailyMealPlan(meals=meals)
+        weekly_meal_plans.append(WeeklyMealPlan(dailies=dailies))
+
+    return SyntheticWorld(
+        categories=categories,
+        simple_substances=simple_substances,
+        composite_substances=composite_substances,
+        rations=rations,
+        products=products,
+        meal_slots=meal_slots,
+        weekly_meal_plans=weekly_meal_plans,
+    )
+
+
+def _create_money(rng: random.Random) -> Money:
+    return Money(units=rng.randint(0, 40), cents=rng.randint(0, 99))
+
+
+def _create_anonymous_ration(rng: random.Random, substances: list[Substance]) -> Ration:
+    components = tuple(
+        CompositeSubstance.Component(
+            substance=rng.choice(substances), proportion=rng.uniform(5.0, 200.0)
+        )
+        for _ in range(rng.randint(1, 3))
+    )
+    return Ration(
+        substance=CompositeSubstance(
+            category=components[0].substance.category, components=components
+        ),
+        grams=sum(c.proportion for c in components),
+    )
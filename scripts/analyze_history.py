@@ -0,0 +1,38 @@
+from food_manager.history import analyze_history
+from food_manager.nutrients import MACRONUTRIENTS
+from food_manager.utils import from_cents
+
+
+def main(max_workers: int | None) -> None:
+    week_analyses = analyze_history(max_workers=max_workers)
+
+    print(
+        f"{'week':<16}{'kcal/day':>10}"
+        + "".join(
+            f"{nutrient.name.lower() + '/day':>14}" for nutrient in MACRONUTRIENTS
+        )
+        + f"{'EUR':>10}"
+    )
+    for week_analysis in week_analyses:
+        day_count = max(week_analysis.day_count, 1)
+        average_kcal = sum(week_analysis.day_kcal.values()) / day_count
+        week_price = from_cents(week_analysis.week_cents)
+        print(
+            f"{week_analysis.week:<16}{average_kcal:10.0f}"
+            + "".join(
+                f"{week_analysis.week_grams.get(nutrient, 0.0) / day_count:13.1f}g"
+                for nutrient in MACRONUTRIENTS
+            )
+            + f"{week_price.units:7}.{week_price.cents:0>2}"
+            + ("*" if week_analysis.unpriced_ration_count > 0 else "")
+        )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-workers", type=int, required=False, default=None)
+    args = parser.parse_args()
+
+    main(args.max_workers)
@@ -0,0 +1,27 @@
+from food_manager.history import archive_history, find_week_paths
+from food_manager.versions import WorldVersions
+
+
+def main(force: bool) -> None:
+    week_paths = find_week_paths()
+    archived_week_paths = archive_history(week_paths, force=force)
+    world_versions = WorldVersions()
+
+    print(f"{len(week_paths):6} weeks")
+    print(f"{len(archived_week_paths):6} weeks archived")
+    print(f"{world_versions.get_version_count():6} world versions")
+    print(f"{world_versions.get_content_store().get_size():6} stored balloons")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Archive weeks again against the current world, even if already archived.",
+    )
+    args = parser.parse_args()
+
+    main(args.force)
@@ -0,0 +1,16 @@
+from food_manager.path import CURRENT_WEEK_WORLD_PATH, WORLD_PATH
+from food_manager.store import NAMESPACE_TYPES
+from food_manager.world import load_deferred_world
+
+
+def main() -> None:
+    world = load_deferred_world(WORLD_PATH, CURRENT_WEEK_WORLD_PATH)
+    world_store = world.get_world_store()
+
+    for namespace_type in NAMESPACE_TYPES:
+        name_count = len(world_store.get_names(namespace_type))
+        print(f"{name_count:6} {namespace_type.__name__}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,19 @@
-from collections import defaultdict
 import json
+import sys
 
+import numpy as np
+import numpy.typing as npt
+
+from food_manager.engine import DAYS, NutrientEngine, PlanNutrients
+from food_manager.nutrients import NUTRIENTS
 from food_manager.path import (
-    WORLD_PATH,
-    CURRENT_WEEK_WORLD_PATH,
     CURRENT_WEEK_DATA_PATH,
+    CURRENT_WEEK_WORLD_PATH,
+    WORLD_PATH,
 )
-from food_manager.schema import Day, Nutrient, WeeklyMealPlan, create_base_world
-from food_manager.utils import get_kcal, get_nutrient_grams
-
-world = create_base_world().populate(WORLD_PATH).populate(CURRENT_WEEK_WORLD_PATH)
-weekly_meal_plan_balloonist = world.get_balloonist(WeeklyMealPlan)
-deflated_weekly_meal_plan = json.loads(
-    (CURRENT_WEEK_DATA_PATH / "meal-plan.json").read_text()
-)
-weekly_meal_plan = weekly_meal_plan_balloonist.inflate(deflated_weekly_meal_plan)
+from food_manager.profiling import PROFILER
+from food_manager.schema import Nutrient, WeeklyMealPlan
+from food_manager.world import load_deferred_world
 
 GREEN = "\033[32m"
 YELLOW = "\033[33m"
@@ -22,15 +21,49 @@ YELLOW = "\033[33m"
 RESET = "\033[0m"
 
 
-def main(nutrient_budgets: dict[Nutrient, float]) -> None:
-    nutrient_daily_total_grams: dict[Nutrient, dict[Day, float]] = defaultdict(
-        lambda: defaultdict(float)
+def main(nutrient_budgets: dict[Nutrient, float], profile: bool) -> None:
+    if profile:
+        PROFILER.enable()
+
+    world = load_deferred_world(WORLD_PATH, CURRENT_WEEK_WORLD_PATH)
+    deflated_weekly_meal_plan = json.loads(
+        (CURRENT_WEEK_DATA_PATH / "meal-plan.json").read_text()
     )
-    total_kcals: dict[Day, float] = defaultdict(float)
+    weekly_meal_plan = world.inflate_weekly_meal_plan(deflated_weekly_meal_plan)
+
+    with PROFILER.phase("evaluate"):
+        engine = NutrientEngine()
+        plan_vector = engine.vectorize(weekly_meal_plan)
+        plan_nutrients = engine.evaluate(plan_vector)
+        ration_present = engine.get_present(plan_vector)
+        day_present = plan_vector.day_matrix @ ration_present > 0
+
+    with PROFILER.phase("render"):
+        render(
+            weekly_meal_plan,
+            plan_nutrients,
+            ration_present,
+            day_present,
+            nutrient_budgets,
+        )
+
+    if profile:
+        print(json.dumps(PROFILER.get_summary(), indent=2), file=sys.stderr)
+
+
+def render(
+    weekly_meal_plan: WeeklyMealPlan,
+    plan_nutrients: PlanNutrients,
+    ration_present: npt.NDArray[np.bool_],
+    day_present: npt.NDArray[np.bool_],
+    nutrient_budgets: dict[Nutrient, float],
+) -> None:
+    ration_index = 0
     for day, daily_meal_plan in weekly_meal_plan.dailies.items():
         if len(daily_meal_plan.meals) == 0:
             continue
 
+        day_index = DAYS.index(day)
         print(YELLOW, end="")
         print(f"{'-' * len(day.name)}")
         print(f"{day.name.upper()}")
@@ -39,13 +72,16 @@ def main(nutrient_budgets: dict[Nutrient, float]) -> None:
         for meal_slot, meal in daily_meal_plan.meals.items():
             print(f"{YELLOW}{meal_slot.name.capitalize()}:{RESET}")
             for ration in meal.rations:
-                nutrient_grams = get_nutrient_grams(ration)
-                kcal = get_kcal(nutrient_grams)
-
-                print(f"  {GREEN}{ration.substance.category.name}{RESET}: {kcal:.0f} kcal")
-                for nutrient in Nutrient:
-                    if (grams := nutrient_grams.get(nutrient)) is None:
+                nutrient_grams = plan_nutrients.ration_grams[ration_index]
+                kcal = plan_nutrients.ration_kcal[ration_index]
+
+                print(
+                    f"  {GREEN}{ration.substance.category.name}{RESET}: {kcal:.0f} kcal"
+                )
+                for nutrient_index, nutrient in enumerate(NUTRIENTS):
+                    if not ration_present[ration_index, nutrient_index]:
                         continue
+                    grams = nutrient_grams[nutrient_index]
 
                     print(f"    {grams:6.1f}g {nutrient.name.lower()}", end="")
 
@@ -54,17 +90,14 @@ def main(nutrient_budgets: dict[Nutrient, float]) -> None:
                     else:
                         print()
 
-                for nutrient, grams in nutrient_grams.items():
-                    nutrient_daily_total_grams[nutrient][day] += grams
-                total_kcals[day] += kcal
+                ration_index += 1
 
         print()
-        print(f"Daily total: {total_kcals[day]:.0f} kcal")
-        for nutrient in Nutrient:
-            if (daily_total_grams := nutrient_daily_total_grams.get(nutrient)) is None:
-                continue
-            if (total_grams := daily_total_grams.get(day)) is None:
+        print(f"Daily total: {plan_nutrients.day_kcal[day_index]:.0f} kcal")
+        for nutrient_index, nutrient in enumerate(NUTRIENTS):
+            if not day_present[day_index, nutrient_index]:
                 continue
+            total_grams = plan_nutrients.day_grams[day_index, nutrient_index]
 
             print(f"  {total_grams:6.1f}g {nutrient.name.lower()}", end="")
 
@@ -80,15 +113,14 @@ def main(nutrient_budgets: dict[Nutrient, float]) -> None:
     print("WEEKLY AVERAGES")
     print("---------------")
     print(RESET, end="")
-    average_daily_total_kcals = sum(total_kcals.values()) / len(
-        weekly_meal_plan.dailies
-    )
+    day_count = len(weekly_meal_plan.dailies)
+    average_daily_total_kcals = plan_nutrients.week_kcal / day_count
     print(f"Daily total: {average_daily_total_kcals:.0f} kcal")
-    for nutrient in Nutrient:
-        if (daily_total_grams := nutrient_daily_total_grams.get(nutrient)) is None:
+    week_present = day_present.sum(axis=0) > 0
+    for nutrient_index, nutrient in enumerate(NUTRIENTS):
+        if not week_present[nutrient_index]:
             continue
-        weekly_total_grams = sum(daily_total_grams.values())
-        average_total_grams = weekly_total_grams / len(weekly_meal_plan.dailies)
+        average_total_grams = plan_nutrients.week_grams[nutrient_index] / day_count
         print(f"  {average_total_grams:6.1f}g {nutrient.name.lower()}", end="")
 
         if (nutrient_budget := nutrient_budgets.get(nutrient)) is not None:
@@ -110,6 +142,11 @@ if __name__ == "__main__":
         required=False,
         default={},
     )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print a profile of the run as JSON to stderr.",
+    )
     args = parser.parse_args()
 
-    main(args.nutrient_budgets)
+    main(args.nutrient_budgets, args.profile)
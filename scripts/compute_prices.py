@@ -1,53 +1,114 @@
 import json
+import sys
 
-from food_manager.path import WORLD_PATH, CURRENT_WEEK_WORLD_PATH, CURRENT_WEEK_DATA_PATH
-from food_manager.schema import Product, WeeklyMealPlan, create_base_world
-from food_manager.utils import Money, PriceCalculator, get_category_grams, sum_money
-
-world = create_base_world().populate(WORLD_PATH).populate(CURRENT_WEEK_WORLD_PATH)
-weekly_meal_plan_balloonist = world.get_balloonist(WeeklyMealPlan)
-deflated_weekly_meal_plan = json.loads((CURRENT_WEEK_DATA_PATH / "meal-plan.json").read_text())
-weekly_meal_plan = weekly_meal_plan_balloonist.inflate(deflated_weekly_meal_plan)
-
-product_provider = world.get_provider(Product)
-price_calculator = PriceCalculator.create(
-    products=[product_provider.get(n) for n in product_provider.get_names()]
+from food_manager.path import (
+    CURRENT_WEEK_DATA_PATH,
+    CURRENT_WEEK_WORLD_PATH,
+    WORLD_PATH,
 )
+from food_manager.profiling import PROFILER
+from food_manager.schema import Product, WeeklyMealPlan
+from food_manager.utils import Money, PriceCalculator, sum_money
+from food_manager.world import load_deferred_world
 
 GREEN = "\033[32m"
 YELLOW = "\033[33m"
 
 RESET = "\033[0m"
 
-week_price = Money(0, 0)
-for day, daily_meal_plan in weekly_meal_plan.dailies.items():
-    if len(daily_meal_plan.meals) == 0:
-        continue
-
-    day_price = Money(0, 0)
-    print(YELLOW, end="")
-    print(f"{'-' * len(day.name)}")
-    print(f"{day.name.upper()}")
-    print(f"{'-' * len(day.name)}")
-    print(RESET, end="")
-    for meal_slot, meal in daily_meal_plan.meals.items():
-        print(f"{YELLOW}{meal_slot.name.capitalize()}:{RESET}")
-        for ration in meal.rations:
-            if (price := price_calculator.get_price(ration)) is not None:
-                day_price = sum_money(day_price, price)
-                print(
-                    f"{price.units:3}.{price.cents:0>2} EUR  "
-                    f"{GREEN}{ration.substance.category.name}{RESET}"
-                )
-            else:
-                print(
-                    "  ?.?? EUR  "
-                    f"{GREEN}{ration.substance.category.name}{RESET}"
-                )
-    week_price = sum_money(week_price, day_price)
-    print()
-    print(f"Day total: {day_price.units}.{day_price.cents:0>2} EUR")
-    print()
-
-print("-" * 20)
-print(f"Week total: {week_price.units}.{week_price.cents:0>2} EUR")
+
+def main(category_fallback: bool, profile: bool) -> None:
+    if profile:
+        PROFILER.enable()
+
+    world = load_deferred_world(WORLD_PATH, CURRENT_WEEK_WORLD_PATH)
+    deflated_weekly_meal_plan = json.loads(
+        (CURRENT_WEEK_DATA_PATH / "meal-plan.json").read_text()
+    )
+    weekly_meal_plan = world.inflate_weekly_meal_plan(deflated_weekly_meal_plan)
+
+    with PROFILER.phase("evaluate"):
+        product_provider = world.get_provider(Product)
+        price_calculator = PriceCalculator.create(
+            products=[product_provider.get(n) for n in product_provider.get_names()],
+            world_index=world.get_index() if category_fallback else None,
+        )
+        rations = [
+            ration
+            for daily_meal_plan in weekly_meal_plan.dailies.values()
+            for meal in daily_meal_plan.meals.values()
+            for ration in meal.rations
+        ]
+        ration_prices = [price_calculator.get_price(ration) for ration in rations]
+        estimated_ration_indices = {
+            i
+            for i, ration in enumerate(rations)
+            if ration_prices[i] is not None and price_calculator.is_estimated(ration)
+        }
+
+    with PROFILER.phase("render"):
+        render(weekly_meal_plan, ration_prices, estimated_ration_indices)
+
+    if profile:
+        print(json.dumps(PROFILER.get_summary(), indent=2), file=sys.stderr)
+
+
+def render(
+    weekly_meal_plan: WeeklyMealPlan,
+    ration_prices: list[Money | None],
+    estimated_ration_indices: set[int],
+) -> None:
+    ration_index = 0
+    week_price = Money(0, 0)
+    for day, daily_meal_plan in weekly_meal_plan.dailies.items():
+        if len(daily_meal_plan.meals) == 0:
+            continue
+
+        day_price = Money(0, 0)
+        print(YELLOW, end="")
+        print(f"{'-' * len(day.name)}")
+        print(f"{day.name.upper()}")
+        print(f"{'-' * len(day.name)}")
+        print(RESET, end="")
+        for meal_slot, meal in daily_meal_plan.meals.items():
+            print(f"{YELLOW}{meal_slot.name.capitalize()}:{RESET}")
+            for ration in meal.rations:
+                if (price := ration_prices[ration_index]) is not None:
+                    day_price = sum_money(day_price, price)
+                    marker = "~" if ration_index in estimated_ration_indices else " "
+                    print(
+                        f"{price.units:3}.{price.cents:0>2} EUR{marker} "
+                        f"{GREEN}{ration.substance.category.name}{RESET}"
+                    )
+                else:
+                    print(f"  ?.?? EUR  {GREEN}{ration.substance.category.name}{RESET}")
+                ration_index += 1
+        week_price = sum_money(week_price, day_price)
+        print()
+        print(f"Day total: {day_price.units}.{day_price.cents:0>2} EUR")
+        print()
+
+    print("-" * 20)
+    print(f"Week total: {week_price.units}.{week_price.cents:0>2} EUR")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--category-fallback",
+        action="store_true",
+        help=(
+            "Estimate the price of substances without a product at the average price "
+            "of their category, marking estimated prices with '~'."
+        ),
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print a profile of the run as JSON to stderr.",
+    )
+    args = parser.parse_args()
+
+    main(args.category_fallback, args.profile)
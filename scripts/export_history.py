@@ -0,0 +1,44 @@
+import numpy as np
+
+from food_manager.history_store import HistoryStore, export_history
+from food_manager.nutrients import MACRONUTRIENTS, NUTRIENT_INDICES
+
+
+def main(export: bool) -> None:
+    history_store = export_history() if export else HistoryStore.open()
+
+    day_kcal = history_store.get_day_kcal()
+    day_nutrient_grams = history_store.get_day_nutrient_grams()
+    day_counts = np.maximum(np.count_nonzero(day_kcal, axis=1), 1)
+
+    print(
+        f"{'week':<16}{'kcal/day':>10}"
+        + "".join(
+            f"{nutrient.name.lower() + '/day':>14}" for nutrient in MACRONUTRIENTS
+        )
+    )
+    macronutrient_indices = [NUTRIENT_INDICES[n] for n in MACRONUTRIENTS]
+    for week_index, week in enumerate(history_store.weeks):
+        day_count = day_counts[week_index]
+        week_nutrient_grams = day_nutrient_grams[week_index].sum(axis=0)
+        print(
+            f"{week:<16}{day_kcal[week_index].sum() / day_count:10.0f}"
+            + "".join(
+                f"{grams / day_count:13.1f}g"
+                for grams in week_nutrient_grams[macronutrient_indices]
+            )
+        )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--no-export",
+        action="store_true",
+        help="Read the previously exported history store instead of exporting it.",
+    )
+    args = parser.parse_args()
+
+    main(not args.no_export)
@@ -1,24 +1,68 @@
 import json
+import sys
 
-from food_manager.path import WORLD_PATH, CURRENT_WEEK_WORLD_PATH, CURRENT_WEEK_DATA_PATH
-from food_manager.schema import WeeklyMealPlan, create_base_world
+from balloons import NamedBalloon
+
+from food_manager.path import (
+    CURRENT_WEEK_DATA_PATH,
+    CURRENT_WEEK_WORLD_PATH,
+    WORLD_PATH,
+)
+from food_manager.profiling import PROFILER
+from food_manager.schema import Category
 from food_manager.utils import get_category_grams
+from food_manager.world import load_deferred_world
+
+
+def main(profile: bool) -> None:
+    if profile:
+        PROFILER.enable()
+
+    world = load_deferred_world(WORLD_PATH, CURRENT_WEEK_WORLD_PATH)
+    deflated_weekly_meal_plan = json.loads(
+        (CURRENT_WEEK_DATA_PATH / "meal-plan.json").read_text()
+    )
+    weekly_meal_plan = world.inflate_weekly_meal_plan(deflated_weekly_meal_plan)
+
+    with PROFILER.phase("evaluate"):
+        category_grams: dict[Category, float] = {}
+        for daily_meal_plan in weekly_meal_plan.dailies.values():
+            for meal in daily_meal_plan.meals.values():
+                for food in meal.rations:
+                    for category, grams in get_category_grams(food).items():
+                        category_grams[category] = (
+                            category_grams.get(category, 0.0) + grams
+                        )
+        world_index = world.get_index()
+
+    with PROFILER.phase("render"):
+        print("Grocery list:")
+        for category, grams in sorted(
+            category_grams.items(), key=lambda item: item[0].name
+        ):
+            product_names = [
+                product.name
+                for product in world_index.get_category_products(category)
+                if isinstance(product, NamedBalloon)
+            ]
+            if product_names:
+                print(f"{grams:6.0f}g {category.name}  ({', '.join(product_names)})")
+            else:
+                print(f"{grams:6.0f}g {category.name}")
+
+    if profile:
+        print(json.dumps(PROFILER.get_summary(), indent=2), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print a profile of the run as JSON to stderr.",
+    )
+    args = parser.parse_args()
 
-world = create_base_world().populate(WORLD_PATH).populate(CURRENT_WEEK_WORLD_PATH)
-weekly_meal_plan_balloonist = world.get_balloonist(WeeklyMealPlan)
-deflated_weekly_meal_plan = json.loads((CURRENT_WEEK_DATA_PATH / "meal-plan.json").read_text())
-weekly_meal_plan = weekly_meal_plan_balloonist.inflate(deflated_weekly_meal_plan)
-
-category_grams: dict[str, float] = {}
-for daily_meal_plan in weekly_meal_plan.dailies.values():
-    for meal in daily_meal_plan.meals.values():
-        for food in meal.rations:
-            for category, grams in get_category_grams(food).items():
-                category_name = category.name
-                category_grams[category_name] = (
-                    category_grams.get(category_name, 0.0) + grams
-                )
-
-print("Grocery list:")
-for category_name, grams in sorted(category_grams.items(), key=lambda item: item[0]):
-    print(f"{grams:6.0f}g {category_name}")
+    main(args.profile)
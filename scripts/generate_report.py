@@ -0,0 +1,115 @@
+import json
+import sys
+
+from food_manager.analysis import (
+    GroceryReporter,
+    NutrientReport,
+    NutrientReporter,
+    PriceReport,
+    PriceReporter,
+    analyze_weekly_meal_plan,
+)
+from food_manager.path import (
+    CURRENT_WEEK_DATA_PATH,
+    CURRENT_WEEK_WORLD_PATH,
+    WORLD_PATH,
+)
+from food_manager.profiling import PROFILER
+from food_manager.schema import Category, Nutrient, Product, WeeklyMealPlan
+from food_manager.utils import PriceCalculator, from_cents
+from food_manager.world import load_deferred_world
+
+GREEN = "\033[32m"
+YELLOW = "\033[33m"
+
+RESET = "\033[0m"
+
+
+def main(profile: bool) -> None:
+    if profile:
+        PROFILER.enable()
+
+    world = load_deferred_world(WORLD_PATH, CURRENT_WEEK_WORLD_PATH)
+    deflated_weekly_meal_plan = json.loads(
+        (CURRENT_WEEK_DATA_PATH / "meal-plan.json").read_text()
+    )
+    weekly_meal_plan = world.inflate_weekly_meal_plan(deflated_weekly_meal_plan)
+
+    with PROFILER.phase("evaluate"):
+        product_provider = world.get_provider(Product)
+        price_calculator = PriceCalculator.create(
+            products=[product_provider.get(n) for n in product_provider.get_names()]
+        )
+        results = analyze_weekly_meal_plan(
+            weekly_meal_plan,
+            reporters={
+                "nutrients": NutrientReporter(),
+                "prices": PriceReporter(price_calculator),
+                "groceries": GroceryReporter(),
+            },
+        )
+
+    with PROFILER.phase("render"):
+        render(
+            weekly_meal_plan,
+            results["nutrients"],
+            results["prices"],
+            results["groceries"],
+        )
+
+    if profile:
+        print(json.dumps(PROFILER.get_summary(), indent=2), file=sys.stderr)
+
+
+def render(
+    weekly_meal_plan: WeeklyMealPlan,
+    nutrient_report: NutrientReport,
+    price_report: PriceReport,
+    category_grams: dict[Category, float],
+) -> None:
+    for day, daily_meal_plan in weekly_meal_plan.dailies.items():
+        if len(daily_meal_plan.meals) == 0:
+            continue
+
+        day_price = from_cents(price_report.day_cents.get(day, 0.0))
+        print(
+            f"{YELLOW}{day.name.capitalize():<10}{RESET}"
+            f"{nutrient_report.day_kcal.get(day, 0.0):6.0f} kcal  "
+            f"{day_price.units:3}.{day_price.cents:0>2} EUR"
+        )
+
+    print()
+    print(f"{YELLOW}Week total:{RESET}")
+    print(f"  {nutrient_report.week_kcal:.0f} kcal")
+    for nutrient in Nutrient:
+        if (grams := nutrient_report.week_grams.get(nutrient)) is None:
+            continue
+        print(f"  {grams:6.1f}g {nutrient.name.lower()}")
+    week_price = from_cents(price_report.week_cents)
+    print(f"  {week_price.units}.{week_price.cents:0>2} EUR")
+    for day, meal_slot, ration in price_report.unpriced_rations:
+        print(
+            f"  ?.?? EUR  {GREEN}{ration.substance.category.name}{RESET} "
+            f"({day.name.capitalize()} {meal_slot.name})"
+        )
+
+    print()
+    print("Grocery list:")
+    for category, grams in sorted(
+        category_grams.items(), key=lambda item: item[0].name
+    ):
+        print(f"{grams:6.0f}g {category.name}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print a profile of the run as JSON to stderr.",
+    )
+    args = parser.parse_args()
+
+    main(args.profile)
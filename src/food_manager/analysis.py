@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from typing import Any, Generic, TypeVar
+
+import numpy as np
+
+from food_manager.nutrients import ZERO_NUTRIENT_PROFILE, NutrientProfile
+from food_manager.schema import (
+    Category,
+    DailyMealPlan,
+    Day,
+    MealSlot,
+    Nutrient,
+    Ration,
+    WeeklyMealPlan,
+)
+from food_manager.utils import (
+    PriceCalculator,
+    get_category_grams,
+    get_nutrient_profile,
+)
+
+T = TypeVar("T")
+
+
+class Reporter(ABC, Generic[T]):
+    """
+    A reporter fed with every ration of a weekly meal plan analysis.
+    """
+
+    @abstractmethod
+    def report_ration(self, day: Day, meal_slot: MealSlot, ration: Ration) -> None:
+        pass
+
+    @abstractmethod
+    def get_result(self) -> T:
+        pass
+
+
+def analyze_weekly_meal_plan(
+    weekly_meal_plan: WeeklyMealPlan, reporters: Mapping[str, Reporter[Any]]
+) -> dict[str, Any]:
+    """
+    Analyze a weekly meal plan in a single pass, feeding every ration to the given
+    reporters, and return their results by the same keys.
+    """
+    return analyze_daily_meal_plans(weekly_meal_plan.dailies.items(), reporters)
+
+
+def analyze_daily_meal_plans(
+    daily_meal_plans: Iterable[tuple[Day, DailyMealPlan]],
+    reporters: Mapping[str, Reporter[Any]],
+) -> dict[str, Any]:
+    """
+    Analyze daily meal plans in a single pass as they are iterated, feeding every
+    ration to the given reporters, and return their results by the same keys.
+    """
+    for day, daily_meal_plan in daily_meal_plans:
+        for meal_slot, meal in daily_meal_plan.meals.items():
+            for ration in meal.rations:
+                for reporter in reporters.values():
+                    reporter.report_ration(day, meal_slot, ration)
+    return {key: reporter.get_result() for key, reporter in reporters.items()}
+
+
+# --------------------------------------------------------------------------------------
+@dataclass(frozen=True)
+class NutrientReport:
+    """
+    The nutrients of a weekly meal plan.
+    """
+
+    day_grams: dict[Day, dict[Nutrient, float]]
+    """
+    The grams of each nutrient per day.
+    """
+
+    day_kcal: dict[Day, float]
+    """
+    The kilocalories per day.
+    """
+
+    week_grams: dict[Nutrient, float]
+    """
+    The grams of each nutrient in the whole week.
+    """
+
+    week_kcal: float
+    """
+    The kilocalories of the whole week.
+    """
+
+
+class NutrientReporter(Reporter[NutrientReport]):
+    """
+    A reporter of the nutrients of a weekly meal plan.
+    """
+
+    def __init__(self) -> None:
+        self._days: list[Day] = []
+        self._grams: list[float] = []
+        self._nutrient_ratios: list[NutrientProfile] = []
+
+    def report_ration(self, day: Day, meal_slot: MealSlot, ration: Ration) -> None:
+        self._days.append(day)
+        self._grams.append(ration.grams)
+        self._nutrient_ratios.append(get_nutrient_profile(ration.substance))
+
+    def get_result(self) -> NutrientReport:
+        # The rations are summed per day at once, as products of the days × rations
+        # matrix with the rations × nutrients matrices.
+        if len(self._days) == 0:
+            return NutrientReport(
+                day_grams={}, day_kcal={}, week_grams={}, week_kcal=0.0
+            )
+
+        days = list(dict.fromkeys(self._days))
+        day_matrix = np.zeros((len(days), len(self._days)))
+        day_matrix[[days.index(d) for d in self._days], np.arange(len(self._days))] = 1
+        values = np.stack([p.values for p in self._nutrient_ratios])
+        defined = np.stack([p.defined for p in self._nutrient_ratios])
+        day_values = day_matrix @ (np.asarray(self._grams)[:, np.newaxis] * values)
+        day_defined = day_matrix @ defined > 0
+        day_grams = [
+            NutrientProfile(values=day_values[i], defined=day_defined[i])
+            for i in range(len(days))
+        ]
+        day_kcal = {
+            day: grams.get_kcal() for day, grams in zip(days, day_grams, strict=True)
+        }
+        week_grams = sum(day_grams, ZERO_NUTRIENT_PROFILE)
+        return NutrientReport(
+            day_grams={
+                day: grams.to_dict() for day, grams in zip(days, day_grams, strict=True)
+            },
+            day_kcal=day_kcal,
+            week_grams=week_grams.to_dict(),
+            week_kcal=sum(day_kcal.values()),
+        )
+
+
+# --------------------------------------------------------------------------------------
+@dataclass(frozen=True)
+class PriceReport:
+    """
+    The prices of a weekly meal plan.
+    """
+
+    day_cents: dict[Day, float]
+    """
+    The unrounded cents of the priced rations per day.
+    """
+
+    week_cents: float
+    """
+    The unrounded cents of the priced rations in the whole week.
+    """
+
+    unpriced_rations: tuple[tuple[Day, MealSlot, Ration], ...]
+    """
+    The rations that could not be priced.
+    """
+
+
+class PriceReporter(Reporter[PriceReport]):
+    """
+    A reporter of the prices of a weekly meal plan.
+    """
+
+    def __init__(self, price_calculator: PriceCalculator) -> None:
+        self._price_calculator = price_calculator
+        self._day_cents: dict[Day, float] = defaultdict(float)
+        self._unpriced_rations: list[tuple[Day, MealSlot, Ration]] = []
+
+    def report_ration(self, day: Day, meal_slot: MealSlot, ration: Ration) -> None:
+        if (cents := self._price_calculator.get_cents(ration)) is not None:
+            self._day_cents[day] += cents
+        else:
+            self._unpriced_rations.append((day, meal_slot, ration))
+
+    def get_result(self) -> PriceReport:
+        return PriceReport(
+            day_cents=dict(self._day_cents),
+            week_cents=sum(self._day_cents.values()),
+            unpriced_rations=tuple(self._unpriced_rations),
+        )
+
+
+# --------------------------------------------------------------------------------------
+class GroceryReporter(Reporter[dict[Category, float]]):
+    """
+    A reporter of the grams of each category to buy for a weekly meal plan.
+    """
+
+    def __init__(self) -> None:
+        self._category_grams: dict[Category, float] = defaultdict(float)
+
+    def report_ration(self, day: Day, meal_slot: MealSlot, ration: Ration) -> None:
+        for category, grams in get_category_grams(ration).items():
+            self._category_grams[category] += grams
+
+    def get_result(self) -> dict[Category, float]:
+        return dict(self._category_grams)
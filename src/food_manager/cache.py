@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+B = TypeVar("B")
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class ResolutionCacheStats:
+    """
+    Statistics of a resolution cache.
+    """
+
+    hits: int
+    """
+    The number of lookups served from the cache.
+    """
+
+    misses: int
+    """
+    The number of lookups that had to be resolved.
+    """
+
+    evictions: int
+    """
+    The number of entries evicted to respect the maximum size.
+    """
+
+    size: int
+    """
+    The current number of entries in the cache.
+    """
+
+
+class ResolutionCache:
+    """
+    A bounded cache of values resolved from balloons, keyed by balloon identity.
+
+    Entries keep a reference to their balloon, so that its identity cannot be reused by
+    another object while the entry is alive. Least recently used entries are evicted
+    first.
+
+    The maximum size can be grown for sweeps that resolve more values than fit, such
+    as compiling a large world, which would otherwise evict their own entries.
+    """
+
+    def __init__(self, max_size: int = 65536) -> None:
+        if max_size <= 0:
+            raise ValueError(f"Maximum size must be positive, got {max_size}.")
+
+        self._initial_max_size = max_size
+        self._max_size = max_size
+        self._entries: OrderedDict[tuple[Callable[..., Any], int], tuple[Any, Any]] = (
+            OrderedDict()
+        )
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def resolve(self, resolver: Callable[[B], T], balloon: B) -> T:
+        key = (resolver, id(balloon))
+        if (entry := self._entries.get(key)) is not None:
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[1]
+
+        self._misses += 1
+        value = resolver(balloon)
+        self.store(resolver, balloon, value)
+        return value
+
+    def contains(self, resolver: Callable[[B], T], balloon: B) -> bool:
+        """
+        Check whether a value resolved from a balloon is cached, without counting a
+        lookup.
+        """
+        return (resolver, id(balloon)) in self._entries
+
+    def store(self, resolver: Callable[[B], T], balloon: B, value: T) -> None:
+        """
+        Store a value known to be resolved from a balloon.
+        """
+        key = (resolver, id(balloon))
+        self._entries[key] = (balloon, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def reserve(self, entry_count: int) -> None:
+        """
+        Grow the maximum size so that a number of entries fit on top of the initial
+        maximum size. The maximum size never shrinks.
+        """
+        self._max_size = max(self._max_size, self._initial_max_size + entry_count)
+
+    def get_max_size(self) -> int:
+        return self._max_size
+
+    def invalidate(self) -> None:
+        self._entries.clear()
+
+    def get_stats(self) -> ResolutionCacheStats:
+        return ResolutionCacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+            size=len(self._entries),
+        )
+
+    def reset_stats(self) -> None:
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+
+RESOLUTION_CACHE = ResolutionCache()
+"""
+The resolution cache shared by the substance resolvers.
+"""
@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import pickle
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Generic, TypeVar
+
+from balloons import NamedBalloon
+
+from food_manager.hashing import DIGEST_SIZE, ContentHash, get_content_hash
+from food_manager.path import CONTENT_STORE_PATH
+from food_manager.schema import Ration, Substance
+from food_manager.store import get_namespace
+
+T = TypeVar("T")
+
+CONTENT_STORE_VERSION = 2
+"""
+The version of the content store format, to be bumped whenever the layout changes.
+"""
+
+Reference = tuple[str, ...]
+"""
+A reference from a stored balloon to another, either `("content", hash)` for anonymous
+substances and rations or `("name", namespace, name)` for named balloons.
+"""
+
+
+class ContentStore:
+    """
+    A store of balloons on disk under content hashes, so that a balloon used by many
+    weeks is written once.
+
+    Anonymous substances and rations are stored under their content hash, and named
+    balloons under a digest of their stored body. Stored balloons refer to the
+    anonymous substances and rations they contain by content hash, and to named
+    balloons by namespace and name, which are resolved by a `ContentWorld`. A named
+    balloon is then stored again only when its own fields change, not when a balloon
+    it refers to does.
+    """
+
+    def __init__(self, path: Path = CONTENT_STORE_PATH) -> None:
+        self._path = path / f"v{CONTENT_STORE_VERSION}"
+
+    def contains(self, content_hash: ContentHash) -> bool:
+        return self._get_blob_path(content_hash).is_file()
+
+    def put(self, balloon: Any) -> ContentHash:
+        """
+        Store a balloon and the anonymous substances and rations it contains, directly
+        or transitively, skipping those already stored, and get its hash.
+        """
+        root_hash, pending = self._put_node(balloon)
+        while pending:
+            pending.extend(self._put_node(pending.pop())[1])
+        return root_hash
+
+    def read(self, content_hash: ContentHash) -> tuple[list[Reference], bytes]:
+        """
+        Read the references and the pickled body of a stored balloon.
+        """
+        try:
+            with self._get_blob_path(content_hash).open("rb") as blob_file:
+                references = pickle.load(blob_file)
+                return references, blob_file.read()
+        except FileNotFoundError:
+            raise ValueError(
+                f"No balloon with hash {content_hash.hex()} in content store."
+            ) from None
+
+    def get_size(self) -> int:
+        """
+        Get the number of stored balloons.
+        """
+        if not self._path.is_dir():
+            return 0
+        return sum(1 for p in self._path.glob("*/*") if p.suffix != ".tmp")
+
+    def _put_node(self, balloon: Any) -> tuple[ContentHash, list[Any]]:
+        """
+        Store a balloon unless already stored, and get its hash and the anonymous
+        substances and rations it refers to that may still need to be stored.
+        """
+        if not isinstance(balloon, NamedBalloon):
+            content_hash = get_content_hash(balloon)
+            if self.contains(content_hash):
+                return content_hash, []
+
+        pickler = _ContentPickler(balloon)
+        blob = pickler.dump_blob()
+        if isinstance(balloon, NamedBalloon):
+            content_hash = hashlib.blake2b(blob, digest_size=DIGEST_SIZE).digest()
+        self._write(content_hash, blob)
+        return content_hash, pickler.children
+
+    def _get_blob_path(self, content_hash: ContentHash) -> Path:
+        hex_hash = content_hash.hex()
+        return self._path / hex_hash[:2] / hex_hash[2:]
+
+    def _write(self, content_hash: ContentHash, blob: bytes) -> None:
+        blob_path = self._get_blob_path(content_hash)
+        if blob_path.exists():
+            return
+
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = blob_path.with_suffix(".tmp")
+        temporary_path.write_bytes(blob)
+        temporary_path.replace(blob_path)
+
+
+class NameTable(ABC):
+    """
+    A table of the hashes of the named balloons of a world in a content store.
+    """
+
+    @abstractmethod
+    def get_hash(self, namespace: str, name: str) -> ContentHash | None:
+        pass
+
+    @abstractmethod
+    def get_names(self, namespace: str) -> list[str]:
+        """
+        Get the sorted names of the balloons of a namespace.
+        """
+
+
+class ContentWorld:
+    """
+    A world of the balloons of a content store listed by a name table, in place of a
+    loaded world.
+
+    Balloons are only loaded from the store when first accessed, and are kept by hash,
+    so that references to the same balloon are resolved to the same object.
+    """
+
+    def __init__(self, content_store: ContentStore, name_table: NameTable) -> None:
+        self._content_store = content_store
+        self._name_table = name_table
+        self._balloons: dict[ContentHash, Any] = {}
+
+    def get(self, type_: type[T], name: str) -> T:
+        return self.load(self._get_name_hash(get_namespace(type_), name))
+
+    def get_names(self, type_: type[Any]) -> list[str]:
+        """
+        Get the names of the balloons of a namespace type, or only of a given type
+        within it.
+        """
+        namespace = get_namespace(type_)
+        names = self._name_table.get_names(namespace)
+        if type_.__name__ == namespace:
+            return names
+        return [name for name in names if isinstance(self.get(type_, name), type_)]
+
+    def get_provider(self, type_: type[T]) -> ContentWorldProvider[T]:
+        return ContentWorldProvider(self, type_)
+
+    def load(self, content_hash: ContentHash) -> Any:
+        """
+        Load a balloon by hash, loading the balloons it refers to first.
+        """
+        references: dict[ContentHash, list[ContentHash]] = {}
+        bodies: dict[ContentHash, bytes] = {}
+        pending = [content_hash]
+        while pending:
+            pending_hash = pending[-1]
+            if pending_hash in self._balloons:
+                pending.pop()
+                continue
+
+            if pending_hash not in references:
+                pending_references, bodies[pending_hash] = self._content_store.read(
+                    pending_hash
+                )
+                references[pending_hash] = [
+                    self._get_reference_hash(r) for r in pending_references
+                ]
+                pending.extend(
+                    h for h in references[pending_hash] if h not in self._balloons
+                )
+                continue
+
+            if any(h not in self._balloons for h in references[pending_hash]):
+                raise ValueError(
+                    f"Balloon with hash {pending_hash.hex()} refers to itself."
+                )
+            self._balloons[pending_hash] = _ContentUnpickler(
+                io.BytesIO(bodies.pop(pending_hash)), self
+            ).load()
+            pending.pop()
+        return self._balloons[content_hash]
+
+    def load_reference(self, reference: Reference) -> Any:
+        return self.load(self._get_reference_hash(reference))
+
+    def _get_reference_hash(self, reference: Reference) -> ContentHash:
+        if reference[0] == "content":
+            return bytes.fromhex(reference[1])
+        _, namespace, name = reference
+        return self._get_name_hash(namespace, name)
+
+    def _get_name_hash(self, namespace: str, name: str) -> ContentHash:
+        if (content_hash := self._name_table.get_hash(namespace, name)) is None:
+            raise ValueError(f"No {namespace} named {name!r} in content world.")
+        return content_hash
+
+
+class ContentWorldProvider(Generic[T]):
+    """
+    A provider of the balloons of a type in a content world, in place of the provider
+    of a loaded world.
+    """
+
+    def __init__(self, content_world: ContentWorld, type_: type[T]) -> None:
+        self._content_world = content_world
+        self._type = type_
+
+    def get_names(self) -> list[str]:
+        return self._content_world.get_names(self._type)
+
+    def get(self, name: str) -> T:
+        return self._content_world.get(self._type, name)
+
+
+# --------------------------------------------------------------------------------------
+
+
+class _ContentPickler(pickle.Pickler):
+    """
+    A pickler of a single balloon, with the balloons it refers to pickled as
+    references.
+    """
+
+    def __init__(self, root: Any) -> None:
+        self._file = io.BytesIO()
+        super().__init__(self._file, pickle.HIGHEST_PROTOCOL)
+        self._root = root
+        self.references: list[Reference] = []
+        self.children: list[Any] = []
+
+    def dump_blob(self) -> bytes:
+        """
+        Pickle the balloon, prefixed with the references it contains.
+        """
+        self.dump(self._root)
+        return pickle.dumps(self.references, pickle.HIGHEST_PROTOCOL) + (
+            self._file.getvalue()
+        )
+
+    def persistent_id(self, obj: Any) -> Reference | None:
+        if obj is self._root:
+            return None
+        if isinstance(obj, NamedBalloon):
+            reference: Reference = ("name", get_namespace(type(obj)), obj.name)
+        elif isinstance(obj, (Substance, Ration)):
+            reference = ("content", get_content_hash(obj).hex())
+            self.children.append(obj)
+        else:
+            return None
+        self.references.append(reference)
+        return reference
+
+
+class _ContentUnpickler(pickle.Unpickler):
+    def __init__(self, file: io.BytesIO, content_world: ContentWorld) -> None:
+        super().__init__(file)
+        self._content_world = content_world
+
+    def persistent_load(self, pid: Any) -> Any:
+        return self._content_world.load_reference(pid)
@@ -1,91 +1,473 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
 from dataclasses import replace
-from food_manager.schema import WeeklyMealPlan, Day, DailyMealPlan, MealSlot, Meal, Category, Ration, Substance
+from typing import Any, Generic, TypeVar
+
+from food_manager.index import DependencyIndex
+from food_manager.schema import (
+    Category,
+    DailyMealPlan,
+    Day,
+    Meal,
+    MealSlot,
+    Ration,
+    WeeklyMealPlan,
+)
+from food_manager.totals import Totals, TotalsAccumulator, TotalsCalculator
+
+E = TypeVar("E")
+
+
+class _Manager(Generic[E]):
+    """
+    A manager of an immutable entity, supporting batched edits and undo/redo.
+
+    Edits are staged as pending changes over the current entity, which is only rebuilt
+    once they are flushed, at the end of an edit or of the outermost batch. Entities
+    are plain balloons, so each rebuild still copies the mapping or tuple it changes:
+    batching only groups edits into a single rebuild and undo step. Undo and redo
+    states are the entity and its running totals before and after each edit or batch.
+
+    Running totals are recomputed when the prices of the totals calculator were
+    updated since they were kept. If given a dependency index, the manager keeps the
+    meals of its entity indexed as it is edited, undone and redone. The managers it
+    creates for parts of its entity are not given the index, as their edits are
+    indexed once upserted into it.
+    """
+
+    def __init__(
+        self,
+        entity: E,
+        totals_calculator: TotalsCalculator | None,
+        dependency_index: DependencyIndex | None,
+    ) -> None:
+        self._entity = entity
+        self._dependency_index = dependency_index
+        if dependency_index is not None:
+            for meal in self._get_meals(entity):
+                dependency_index.add(meal)
+        self._totals_calculator = (
+            totals_calculator if totals_calculator is not None else TotalsCalculator()
+        )
+        self._totals = TotalsAccumulator()
+        self._totals_version = self._totals_calculator.get_version()
+        self._batch_depth = 0
+        self._undo_states: list[Any] = []
+        self._redo_states: list[Any] = []
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        Apply the edits made within the context with a single entity rebuild. The
+        edits are undone and redone as a whole, and rolled back if an error is raised.
+        """
+        self._check_totals()
+        if self._batch_depth == 0:
+            self._flush()
+            self._undo_states.append(self._get_state())
+            self._redo_states.clear()
+        self._batch_depth += 1
+        try:
+            yield
+        except BaseException:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._discard()
+                self._set_state(self._undo_states.pop())
+            raise
+        self._batch_depth -= 1
+        if self._batch_depth == 0:
+            self._flush()
+
+    def undo(self) -> None:
+        if self._batch_depth > 0:
+            raise ValueError("Cannot undo within a batch.")
+        if len(self._undo_states) == 0:
+            raise ValueError("Nothing to undo.")
+
+        self._redo_states.append(self._get_state())
+        self._set_state(self._undo_states.pop())
+
+    def redo(self) -> None:
+        if self._batch_depth > 0:
+            raise ValueError("Cannot redo within a batch.")
+        if len(self._redo_states) == 0:
+            raise ValueError("Nothing to redo.")
 
+        self._undo_states.append(self._get_state())
+        self._set_state(self._redo_states.pop())
 
-class WeeklyMealPlanManager:
+    def get_totals(self) -> Totals:
+        self._check_totals()
+        return self._totals.get_totals()
 
-    def __init__(self, entity: WeeklyMealPlan) -> None:
+    def _check_totals(self) -> None:
+        if (version := self._totals_calculator.get_version()) != self._totals_version:
+            self._refresh_totals()
+            self._totals_version = version
+
+    def _get_state(self) -> Any:
+        return (self._entity, self._totals.get_totals(), self._totals_version)
+
+    def _set_state(self, state: Any) -> None:
+        entity, totals, self._totals_version = state
+        self._totals = TotalsAccumulator(totals)
+        self._set_entity(entity)
+
+    def _set_entity(self, entity: E) -> None:
+        """
+        Replace the entity, reindexing the meals that were added or removed.
+        """
+        if self._dependency_index is not None and entity is not self._entity:
+            old_meals = {id(m): m for m in self._get_meals(self._entity)}
+            new_meals = {id(m): m for m in self._get_meals(entity)}
+            for meal_id, meal in old_meals.items():
+                if meal_id not in new_meals:
+                    self._dependency_index.remove(meal)
+            for meal_id, meal in new_meals.items():
+                if meal_id not in old_meals:
+                    self._dependency_index.add(meal)
         self._entity = entity
 
+    def _get_meals(self, entity: E) -> Iterable[Meal]:
+        """
+        Get the meals of an entity.
+        """
+        raise NotImplementedError()
+
+    def _flush(self) -> None:
+        """
+        Rebuild the entity from the pending changes.
+        """
+
+    def _discard(self) -> None:
+        """
+        Discard the pending changes.
+        """
+
+    def _refresh_totals(self) -> None:
+        """
+        Recompute the running totals of the entity with its pending changes.
+        """
+
+
+class WeeklyMealPlanManager(_Manager[WeeklyMealPlan]):
+    def __init__(
+        self,
+        entity: WeeklyMealPlan,
+        totals_calculator: TotalsCalculator | None = None,
+        dependency_index: DependencyIndex | None = None,
+    ) -> None:
+        super().__init__(entity, totals_calculator, dependency_index)
+        self._daily_totals = {
+            day: self._totals_calculator.get_daily_meal_plan_totals(daily_meal_plan)
+            for day, daily_meal_plan in entity.dailies.items()
+        }
+        self._totals = TotalsAccumulator(
+            self._totals_calculator.get_weekly_meal_plan_totals(entity)
+        )
+        self._pending_dailies: dict[Day, DailyMealPlan | None] = {}
+
     def get_daily_meal_plan_manager(self, day: Day) -> DailyMealPlanManager:
-        if (daily_meal_plan := self._entity.dailies.get(day)) is not None:
-            return DailyMealPlanManager(daily_meal_plan)
+        if (daily_meal_plan := self._get_daily_meal_plan(day)) is not None:
+            return DailyMealPlanManager(daily_meal_plan, self._totals_calculator)
         else:
-            return DailyMealPlanManager(DailyMealPlan(meals={}))
+            return DailyMealPlanManager(
+                DailyMealPlan(meals={}), self._totals_calculator
+            )
 
     def upsert_daily_meal_plan(self, day: Day, daily_meal_plan: DailyMealPlan):
-        self._entity = replace(
-            self._entity,
-            dailies=self._entity.dailies | {day: daily_meal_plan}
-        )
+        with self.batch():
+            daily_totals = self._totals_calculator.get_daily_meal_plan_totals(
+                daily_meal_plan
+            )
+            if (old_daily_totals := self._daily_totals.get(day)) is not None:
+                self._totals.subtract(old_daily_totals)
+            self._totals.add(daily_totals)
+            self._daily_totals[day] = daily_totals
+            self._pending_dailies[day] = daily_meal_plan
 
     def delete_daily_meal_plan(self, day: Day) -> None:
-        if day not in self._entity.dailies:
+        if self._get_daily_meal_plan(day) is None:
             raise ValueError(f"Daily meal plan for {day.name} does not exist.")
-        
-        self._entity = replace(
-            self._entity,
-            dailies={k: v for k, v in self._entity.dailies.items() if k != day}
-        )
+
+        with self.batch():
+            self._totals.subtract(self._daily_totals.pop(day))
+            self._pending_dailies[day] = None
 
     def get_entity(self) -> WeeklyMealPlan:
+        self._flush()
+        self._check_totals()
+        self._totals_calculator.store_weekly_meal_plan_totals(
+            self._entity, self._totals.get_totals()
+        )
         return self._entity
 
+    def _get_daily_meal_plan(self, day: Day) -> DailyMealPlan | None:
+        if day in self._pending_dailies:
+            return self._pending_dailies[day]
+        return self._entity.dailies.get(day)
 
+    def _get_state(self) -> Any:
+        return (*super()._get_state(), dict(self._daily_totals))
 
-class DailyMealPlanManager:
+    def _set_state(self, state: Any) -> None:
+        *base_state, self._daily_totals = state
+        super()._set_state(base_state)
 
-    def __init__(self, entity: DailyMealPlan) -> None:
-        self._entity = entity
+    def _flush(self) -> None:
+        if len(self._pending_dailies) == 0:
+            return
+        self._set_entity(
+            replace(
+                self._entity,
+                dailies=_apply_pending(self._entity.dailies, self._pending_dailies),
+            )
+        )
+        self._pending_dailies = {}
+
+    def _discard(self) -> None:
+        self._pending_dailies = {}
+
+    def _get_meals(self, entity: WeeklyMealPlan) -> Iterable[Meal]:
+        for daily_meal_plan in entity.dailies.values():
+            yield from daily_meal_plan.meals.values()
+
+    def _refresh_totals(self) -> None:
+        dailies = _apply_pending(self._entity.dailies, self._pending_dailies)
+        self._daily_totals = {
+            day: self._totals_calculator.get_daily_meal_plan_totals(daily_meal_plan)
+            for day, daily_meal_plan in dailies.items()
+        }
+        self._totals = TotalsAccumulator()
+        for daily_totals in self._daily_totals.values():
+            self._totals.add(daily_totals)
+
+
+class DailyMealPlanManager(_Manager[DailyMealPlan]):
+    def __init__(
+        self,
+        entity: DailyMealPlan,
+        totals_calculator: TotalsCalculator | None = None,
+        dependency_index: DependencyIndex | None = None,
+    ) -> None:
+        super().__init__(entity, totals_calculator, dependency_index)
+        self._meal_totals = {
+            meal_slot: self._totals_calculator.get_meal_totals(meal)
+            for meal_slot, meal in entity.meals.items()
+        }
+        self._totals = TotalsAccumulator(
+            self._totals_calculator.get_daily_meal_plan_totals(entity)
+        )
+        self._pending_meals: dict[MealSlot, Meal | None] = {}
 
     def get_meal_manager(self, meal_slot: MealSlot) -> MealManager:
-        if (meal := self._entity.meals.get(meal_slot)) is not None:
-            return MealManager(meal)
+        if (meal := self._get_meal(meal_slot)) is not None:
+            return MealManager(meal, self._totals_calculator)
         else:
-            return MealManager(Meal(slot=meal_slot, rations={}))
+            return MealManager(
+                Meal(slot=meal_slot, rations=()), self._totals_calculator
+            )
 
     def upsert_meal(self, meal_slot: MealSlot, meal: Meal) -> None:
-        self._entity = replace(
-            self._entity,
-            meals=self._entity.meals | {meal_slot: meal}
-        )
+        with self.batch():
+            meal_totals = self._totals_calculator.get_meal_totals(meal)
+            if (old_meal_totals := self._meal_totals.get(meal_slot)) is not None:
+                self._totals.subtract(old_meal_totals)
+            self._totals.add(meal_totals)
+            self._meal_totals[meal_slot] = meal_totals
+            self._pending_meals[meal_slot] = meal
 
     def delete_meal(self, meal_slot: MealSlot) -> None:
-        if meal_slot not in self._entity.meals:
+        if self._get_meal(meal_slot) is None:
             raise ValueError(f"Meal for {meal_slot.name} does not exist.")
-        
-        self._entity = replace(
-            self._entity,
-            meals={k: v for k, v in self._entity.meals.items() if k != meal_slot}
-        )
+
+        with self.batch():
+            self._totals.subtract(self._meal_totals.pop(meal_slot))
+            self._pending_meals[meal_slot] = None
 
     def get_entity(self) -> DailyMealPlan:
+        self._flush()
+        self._check_totals()
+        self._totals_calculator.store_daily_meal_plan_totals(
+            self._entity, self._totals.get_totals()
+        )
         return self._entity
 
+    def _get_meal(self, meal_slot: MealSlot) -> Meal | None:
+        if meal_slot in self._pending_meals:
+            return self._pending_meals[meal_slot]
+        return self._entity.meals.get(meal_slot)
 
+    def _get_state(self) -> Any:
+        return (*super()._get_state(), dict(self._meal_totals))
 
-class MealManager:
+    def _set_state(self, state: Any) -> None:
+        *base_state, self._meal_totals = state
+        super()._set_state(base_state)
 
-    def __init__(self, entity: Meal) -> None:
-        self._entity = entity
+    def _flush(self) -> None:
+        if len(self._pending_meals) == 0:
+            return
+        self._set_entity(
+            replace(
+                self._entity,
+                meals=_apply_pending(self._entity.meals, self._pending_meals),
+            )
+        )
+        self._pending_meals = {}
 
-    def upsert_ration(self, category: Category, ration: Ration) -> None:
-        self._entity = replace(
-            self._entity,
-            rations=self._entity.rations | {category: ration}
+    def _discard(self) -> None:
+        self._pending_meals = {}
+
+    def _get_meals(self, entity: DailyMealPlan) -> Iterable[Meal]:
+        return entity.meals.values()
+
+    def _refresh_totals(self) -> None:
+        meals = _apply_pending(self._entity.meals, self._pending_meals)
+        self._meal_totals = {
+            meal_slot: self._totals_calculator.get_meal_totals(meal)
+            for meal_slot, meal in meals.items()
+        }
+        self._totals = TotalsAccumulator()
+        for meal_totals in self._meal_totals.values():
+            self._totals.add(meal_totals)
+
+
+class MealManager(_Manager[Meal]):
+    """
+    A manager of a meal.
+
+    Rations are upserted and deleted by category, as a meal has at most one ration per
+    category of its substance: upserting a ration replaces every ration of its
+    category, in place of the first one. Rations can also be replaced by position,
+    which keeps meals with several rations of a category as they are.
+    """
+
+    def __init__(
+        self,
+        entity: Meal,
+        totals_calculator: TotalsCalculator | None = None,
+        dependency_index: DependencyIndex | None = None,
+    ) -> None:
+        super().__init__(entity, totals_calculator, dependency_index)
+        self._totals = TotalsAccumulator(
+            self._totals_calculator.get_meal_totals(entity)
         )
+        self._pending_rations: list[Ration] | None = None
+
+    def upsert_ration(self, category: Category, ration: Ration) -> None:
+        if ration.substance.category != category:
+            raise ValueError(
+                f"Ration for {ration.substance.category.name} cannot be upserted "
+                f"for {category.name}."
+            )
+
+        with self.batch():
+            rations = self._get_pending_rations()
+            indices = _find_rations(rations, category)
+            if len(indices) > 0:
+                rations[indices[0]] = self._replace_totals(rations[indices[0]], ration)
+                self._pop_rations(rations, indices[1:])
+            else:
+                rations.append(ration)
+                self._totals.add(self._totals_calculator.get_ration_totals(ration))
+
+    def replace_ration(self, index: int, ration: Ration) -> None:
+        """
+        Replace the ration at a position of the meal.
+        """
+        if not 0 <= index < len(self._get_rations()):
+            raise ValueError(f"Ration at {index} does not exist.")
+
+        with self.batch():
+            rations = self._get_pending_rations()
+            rations[index] = self._replace_totals(rations[index], ration)
 
     def delete_ration(self, category: Category) -> None:
-        if category not in self._entity.rations:
+        if len(indices := _find_rations(self._get_rations(), category)) == 0:
             raise ValueError(f"Ration for {category.name} does not exist.")
-        
-        self._entity = replace(
-            self._entity,
-            rations={k: v for k, v in self._entity.rations.items() if k != category}
-        )
+
+        with self.batch():
+            self._pop_rations(self._get_pending_rations(), indices)
 
     def get_entity(self) -> Meal:
+        self._flush()
+        self._check_totals()
+        self._totals_calculator.store_meal_totals(
+            self._entity, self._totals.get_totals()
+        )
         return self._entity
 
+    def _get_rations(self) -> tuple[Ration, ...] | list[Ration]:
+        if self._pending_rations is not None:
+            return self._pending_rations
+        return self._entity.rations
+
+    def _replace_totals(self, old_ration: Ration, ration: Ration) -> Ration:
+        self._totals.subtract(self._totals_calculator.get_ration_totals(old_ration))
+        self._totals.add(self._totals_calculator.get_ration_totals(ration))
+        return ration
+
+    def _pop_rations(self, rations: list[Ration], indices: list[int]) -> None:
+        for index in reversed(indices):
+            old_ration = rations.pop(index)
+            self._totals.subtract(self._totals_calculator.get_ration_totals(old_ration))
+
+    def _get_pending_rations(self) -> list[Ration]:
+        if self._pending_rations is None:
+            self._pending_rations = list(self._entity.rations)
+        return self._pending_rations
+
+    def _flush(self) -> None:
+        if self._pending_rations is None:
+            return
+        self._set_entity(replace(self._entity, rations=tuple(self._pending_rations)))
+        self._pending_rations = None
+
+    def _discard(self) -> None:
+        self._pending_rations = None
+
+    def _get_meals(self, entity: Meal) -> Iterable[Meal]:
+        return (entity,)
+
+    def _refresh_totals(self) -> None:
+        self._totals = TotalsAccumulator()
+        for ration in self._get_rations():
+            self._totals.add(self._totals_calculator.get_ration_totals(ration))
+
+
+# --------------------------------------------------------------------------------------
+
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+def _apply_pending(entries: dict[K, V], pending: dict[K, V | None]) -> dict[K, V]:
+    """
+    Apply pending changes to entries, where None marks a deleted entry. Updated entries
+    keep their position, and inserted entries are appended.
+    """
+    applied: dict[K, V] = {}
+    for k, v in entries.items():
+        if k not in pending:
+            applied[k] = v
+        elif (pending_v := pending[k]) is not None:
+            applied[k] = pending_v
+    for k, pending_v in pending.items():
+        if pending_v is not None and k not in entries:
+            applied[k] = pending_v
+    return applied
+
 
-# TODO: Build a ration
+def _find_rations(
+    rations: tuple[Ration, ...] | list[Ration], category: Category
+) -> list[int]:
+    return [
+        index
+        for index, ration in enumerate(rations)
+        if ration.substance.category == category
+    ]
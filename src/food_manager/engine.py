@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import numpy.typing as npt
+
+from food_manager.nutrients import KCAL_PER_GRAM_VECTOR, NUTRIENTS
+from food_manager.schema import (
+    Day,
+    MealSlot,
+    Ration,
+    Substance,
+    WeeklyMealPlan,
+)
+from food_manager.utils import get_nutrient_profile
+
+DAYS: tuple[Day, ...] = tuple(Day)
+"""
+The days in the order of the day axis of the engine arrays.
+"""
+
+
+@dataclass(frozen=True)
+class PlanVector:
+    """
+    A weekly meal plan flattened into a sparse vector of ration grams.
+    """
+
+    rations: tuple[Ration, ...]
+    """
+    The rations of the plan, in the order of the ration axis.
+    """
+
+    meals: tuple[tuple[Day, MealSlot], ...]
+    """
+    The meals of the plan, in the order of the meal axis.
+    """
+
+    grams: npt.NDArray[np.float64]
+    """
+    The grams of each ration.
+    """
+
+    substance_indices: npt.NDArray[np.intp]
+    """
+    The engine substance index of each ration.
+    """
+
+    meal_matrix: npt.NDArray[np.float64]
+    """
+    The meals × rations matrix assigning each ration to its meal.
+    """
+
+    day_matrix: npt.NDArray[np.float64]
+    """
+    The days × rations matrix assigning each ration to its day.
+    """
+
+
+@dataclass(frozen=True)
+class PlanNutrients:
+    """
+    The nutrients of a weekly meal plan, with nutrients along the last axis.
+    """
+
+    ration_grams: npt.NDArray[np.float64]
+    """
+    The rations × nutrients grams.
+    """
+
+    meal_grams: npt.NDArray[np.float64]
+    """
+    The meals × nutrients grams.
+    """
+
+    day_grams: npt.NDArray[np.float64]
+    """
+    The days × nutrients grams.
+    """
+
+    week_grams: npt.NDArray[np.float64]
+    """
+    The nutrients grams of the whole week.
+    """
+
+    ration_kcal: npt.NDArray[np.float64]
+    """
+    The kilocalories of each ration.
+    """
+
+    meal_kcal: npt.NDArray[np.float64]
+    """
+    The kilocalories of each meal.
+    """
+
+    day_kcal: npt.NDArray[np.float64]
+    """
+    The kilocalories of each day.
+    """
+
+    week_kcal: float
+    """
+    The kilocalories of the whole week.
+    """
+
+
+class NutrientEngine:
+    """
+    An engine evaluating meal plans through a dense substances × nutrients matrix.
+    """
+
+    def __init__(self) -> None:
+        self._substances: list[Substance] = []
+        self._substance_indices: dict[int, int] = {}
+        self._rows: list[npt.NDArray[np.float64]] = []
+        self._present_rows: list[npt.NDArray[np.bool_]] = []
+        self._matrix = np.zeros((0, len(NUTRIENTS)))
+        self._present = np.zeros((0, len(NUTRIENTS)), dtype=np.bool_)
+        self._kcal_per_gram = KCAL_PER_GRAM_VECTOR
+
+    def get_substance_index(self, substance: Substance) -> int:
+        if (index := self._substance_indices.get(id(substance))) is not None:
+            return index
+
+        nutrient_profile = get_nutrient_profile(substance)
+        index = len(self._substances)
+        self._substances.append(substance)
+        self._substance_indices[id(substance)] = index
+        self._rows.append(nutrient_profile.values)
+        self._present_rows.append(nutrient_profile.defined)
+        return index
+
+    def get_matrix(self) -> npt.NDArray[np.float64]:
+        """
+        Get the substances × nutrients matrix of nutrient ratios.
+        """
+        self._sync()
+        return self._matrix
+
+    def get_present(self, plan_vector: PlanVector) -> npt.NDArray[np.bool_]:
+        """
+        Get the rations × nutrients mask of the nutrients defined for each ration.
+        """
+        self._sync()
+        return self._present[plan_vector.substance_indices]
+
+    def vectorize(self, weekly_meal_plan: WeeklyMealPlan) -> PlanVector:
+        rations: list[Ration] = []
+        meals: list[tuple[Day, MealSlot]] = []
+        ration_meal_indices: list[int] = []
+        ration_day_indices: list[int] = []
+        for day, daily_meal_plan in weekly_meal_plan.dailies.items():
+            for meal_slot, meal in daily_meal_plan.meals.items():
+                meal_index = len(meals)
+                meals.append((day, meal_slot))
+                for ration in meal.rations:
+                    rations.append(ration)
+                    ration_meal_indices.append(meal_index)
+                    ration_day_indices.append(DAYS.index(day))
+
+        ration_count = len(rations)
+        meal_matrix = np.zeros((len(meals), ration_count))
+        meal_matrix[ration_meal_indices, np.arange(ration_count)] = 1.0
+        day_matrix = np.zeros((len(DAYS), ration_count))
+        day_matrix[ration_day_indices, np.arange(ration_count)] = 1.0
+
+        return PlanVector(
+            rations=tuple(rations),
+            meals=tuple(meals),
+            grams=np.array([r.grams for r in rations], dtype=np.float64),
+            substance_indices=np.array(
+                [self.get_substance_index(r.substance) for r in rations],
+                dtype=np.intp,
+            ),
+            meal_matrix=meal_matrix,
+            day_matrix=day_matrix,
+        )
+
+    def evaluate(
+        self,
+        plan_vector: PlanVector,
+        grams: npt.NDArray[np.float64] | None = None,
+    ) -> PlanNutrients:
+        """
+        Evaluate the nutrients of a plan, optionally overriding the grams of its
+        rations.
+        """
+        if grams is None:
+            grams = plan_vector.grams
+
+        ration_grams = (
+            grams[:, np.newaxis] * self.get_matrix()[plan_vector.substance_indices]
+        )
+        meal_grams = plan_vector.meal_matrix @ ration_grams
+        day_grams = plan_vector.day_matrix @ ration_grams
+        week_grams = ration_grams.sum(axis=0)
+
+        return PlanNutrients(
+            ration_grams=ration_grams,
+            meal_grams=meal_grams,
+            day_grams=day_grams,
+            week_grams=week_grams,
+            ration_kcal=ration_grams @ self._kcal_per_gram,
+            meal_kcal=meal_grams @ self._kcal_per_gram,
+            day_kcal=day_grams @ self._kcal_per_gram,
+            week_kcal=float(week_grams @ self._kcal_per_gram),
+        )
+
+    def evaluate_variants(
+        self, plan_vector: PlanVector, grams: npt.NDArray[np.float64]
+    ) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+        """
+        Evaluate many variants of a plan at once, given as a variants × rations matrix
+        of grams, into the variants × days × nutrients grams and the variants × days
+        kilocalories.
+        """
+        ration_ratios = self.get_matrix()[plan_vector.substance_indices]
+        day_grams = np.einsum(
+            "dr,vr,rn->vdn", plan_vector.day_matrix, grams, ration_ratios, optimize=True
+        )
+        return day_grams, day_grams @ self._kcal_per_gram
+
+    def _sync(self) -> None:
+        if len(self._matrix) == len(self._rows):
+            return
+        synced_count = len(self._matrix)
+        self._matrix = np.vstack([self._matrix, *self._rows[synced_count:]])
+        self._present = np.vstack([self._present, *self._present_rows[synced_count:]])
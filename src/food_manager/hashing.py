@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import hashlib
+import struct
+from collections.abc import Callable
+from dataclasses import replace
+from typing import Any, TypeVar
+
+from balloons import NamedBalloon
+
+from food_manager.cache import RESOLUTION_CACHE
+from food_manager.schema import (
+    CompositeSubstance,
+    DailyMealPlan,
+    DehydratedSubstance,
+    Meal,
+    Money,
+    Ration,
+    RationProduct,
+    SimpleSubstance,
+    SubstanceProduct,
+    WeeklyMealPlan,
+)
+
+T = TypeVar("T")
+
+ContentHash = bytes
+"""
+A digest of the content of a balloon, equal for balloons that are equal.
+"""
+
+DIGEST_SIZE = 16
+"""
+The size of content hashes in bytes.
+"""
+
+
+def get_content_hash(balloon: Any) -> ContentHash:
+    """
+    Get the content hash of a balloon, built from the content hashes of the balloons it
+    is made of.
+
+    Named balloons are equal by name, so they are hashed by their type and name alone.
+    Hashes of anonymous balloons are resolved once per balloon.
+    """
+    if isinstance(balloon, NamedBalloon):
+        return _hash_name(balloon)
+    return RESOLUTION_CACHE.resolve(_resolve_content_hash, balloon)
+
+
+def have_same_content(balloon: Any, other_balloon: Any) -> bool:
+    return get_content_hash(balloon) == get_content_hash(other_balloon)
+
+
+class Interner:
+    """
+    A canonicalizer of anonymous balloons, mapping balloons with the same content to a
+    single shared instance.
+
+    Named balloons are kept as they are, so an interner must only be used with balloons
+    of a single world, in which names refer to the same balloons.
+    """
+
+    def __init__(self) -> None:
+        self._instances: dict[ContentHash, Any] = {}
+
+    def intern(self, balloon: T) -> T:
+        """
+        Get the canonical instance of a balloon, rebuilding it from the canonical
+        instances of the balloons it is made of.
+        """
+        canonical: dict[int, Any] = {}
+        path = [(balloon, iter(_get_children(balloon)))]
+        while path:
+            node, children = path[-1]
+            for child in children:
+                if id(child) not in canonical and not isinstance(child, NamedBalloon):
+                    path.append((child, iter(_get_children(child))))
+                    break
+            else:
+                path.pop()
+                if id(node) not in canonical:
+                    canonical[id(node)] = self._intern_node(node, canonical)
+        return canonical[id(balloon)]
+
+    def get_size(self) -> int:
+        return len(self._instances)
+
+    def _intern_node(self, balloon: Any, canonical: dict[int, Any]) -> Any:
+        if isinstance(balloon, NamedBalloon):
+            return balloon
+
+        rebuilt = _rebuild(balloon, lambda child: canonical.get(id(child), child))
+        return self._instances.setdefault(get_content_hash(rebuilt), rebuilt)
+
+
+# --------------------------------------------------------------------------------------
+
+
+def _resolve_content_hash(balloon: Any) -> ContentHash:
+    # Children are hashed first with an explicit stack, so that deep substances do not
+    # recurse.
+    path_ids = {id(balloon)}
+    path = [(balloon, iter(_get_children(balloon)))]
+    while path:
+        node, children = path[-1]
+        for child in children:
+            if _is_hashed(child):
+                continue
+            if id(child) in path_ids:
+                raise ValueError(f"Balloon contains itself: {type(child).__name__}")
+            path_ids.add(id(child))
+            path.append((child, iter(_get_children(child))))
+            break
+        else:
+            path.pop()
+            path_ids.remove(id(node))
+            if node is not balloon:
+                RESOLUTION_CACHE.store(_resolve_content_hash, node, _hash_node(node))
+    return _hash_node(balloon)
+
+
+def _is_hashed(balloon: Any) -> bool:
+    return isinstance(balloon, NamedBalloon) or RESOLUTION_CACHE.contains(
+        _resolve_content_hash, balloon
+    )
+
+
+def _get_children(balloon: Any) -> tuple[Any, ...]:
+    """
+    Get the balloons a balloon is made of, which are hashed before it.
+    """
+    if isinstance(balloon, NamedBalloon):
+        return ()
+    if isinstance(balloon, CompositeSubstance):
+        return tuple(c.substance for c in balloon.components)
+    if isinstance(balloon, DehydratedSubstance):
+        return (balloon.original_substance,)
+    if isinstance(balloon, Ration):
+        return (balloon.substance,)
+    if isinstance(balloon, Meal):
+        return balloon.rations
+    if isinstance(balloon, DailyMealPlan):
+        return tuple(balloon.meals.values())
+    if isinstance(balloon, WeeklyMealPlan):
+        return tuple(balloon.dailies.values())
+    if isinstance(balloon, RationProduct):
+        return (balloon.item,)
+    if isinstance(balloon, SubstanceProduct):
+        return (balloon.item,)
+    return ()
+
+
+def _rebuild(balloon: Any, get_canonical: Callable[[Any], Any]) -> Any:
+    """
+    Rebuild a balloon from the canonical instances of its children, or return it as is
+    if they are already canonical.
+    """
+    if isinstance(balloon, CompositeSubstance):
+        components = tuple(
+            c
+            if (substance := get_canonical(c.substance)) is c.substance
+            else replace(c, substance=substance)
+            for c in balloon.components
+        )
+        if any(a is not b for a, b in zip(components, balloon.components, strict=True)):
+            return replace(balloon, components=components)
+    elif isinstance(balloon, DehydratedSubstance):
+        original_substance = get_canonical(balloon.original_substance)
+        if original_substance is not balloon.original_substance:
+            return replace(balloon, original_substance=original_substance)
+    elif isinstance(balloon, Ration):
+        substance = get_canonical(balloon.substance)
+        if substance is not balloon.substance:
+            return replace(balloon, substance=substance)
+    elif isinstance(balloon, Meal):
+        rations = tuple(get_canonical(r) for r in balloon.rations)
+        if any(a is not b for a, b in zip(rations, balloon.rations, strict=True)):
+            return replace(balloon, rations=rations)
+    elif isinstance(balloon, DailyMealPlan):
+        meals = {k: get_canonical(v) for k, v in balloon.meals.items()}
+        if any(meals[k] is not v for k, v in balloon.meals.items()):
+            return replace(balloon, meals=meals)
+    elif isinstance(balloon, WeeklyMealPlan):
+        dailies = {k: get_canonical(v) for k, v in balloon.dailies.items()}
+        if any(dailies[k] is not v for k, v in balloon.dailies.items()):
+            return replace(balloon, dailies=dailies)
+    elif isinstance(balloon, (RationProduct, SubstanceProduct)):
+        item = get_canonical(balloon.item)
+        if item is not balloon.item:
+            return replace(balloon, item=item)
+    return balloon
+
+
+def _hash_node(balloon: Any) -> ContentHash:
+    """
+    Hash a balloon whose children are already hashed.
+    """
+    digest = hashlib.blake2b(
+        _encode_name(type(balloon).__name__), digest_size=DIGEST_SIZE
+    )
+    if isinstance(balloon, SimpleSubstance):
+        digest.update(get_content_hash(balloon.category))
+        for nutrient, ratio in sorted(
+            balloon.nutrient_ratios.items(), key=lambda item: item[0].name
+        ):
+            digest.update(_encode_name(nutrient.name) + _encode_float(ratio))
+    elif isinstance(balloon, CompositeSubstance):
+        digest.update(get_content_hash(balloon.category))
+        for component in balloon.components:
+            digest.update(get_content_hash(component.substance))
+            digest.update(_encode_float(component.proportion))
+    elif isinstance(balloon, DehydratedSubstance):
+        digest.update(get_content_hash(balloon.category))
+        digest.update(get_content_hash(balloon.original_substance))
+        digest.update(_encode_float(balloon.dehydration_ratio))
+    elif isinstance(balloon, Ration):
+        digest.update(get_content_hash(balloon.substance))
+        digest.update(_encode_float(balloon.grams))
+    elif isinstance(balloon, Meal):
+        digest.update(get_content_hash(balloon.slot))
+        for ration in balloon.rations:
+            digest.update(get_content_hash(ration))
+    elif isinstance(balloon, DailyMealPlan):
+        # Dictionaries are equal regardless of their order.
+        for key_hash, meal_hash in sorted(
+            (get_content_hash(slot), get_content_hash(meal))
+            for slot, meal in balloon.meals.items()
+        ):
+            digest.update(key_hash + meal_hash)
+    elif isinstance(balloon, WeeklyMealPlan):
+        for day, daily_meal_plan in sorted(
+            balloon.dailies.items(), key=lambda item: item[0].value
+        ):
+            digest.update(_encode_name(day.name))
+            digest.update(get_content_hash(daily_meal_plan))
+    elif isinstance(balloon, Money):
+        digest.update(struct.pack("<qq", balloon.units, balloon.cents))
+    elif isinstance(balloon, RationProduct):
+        digest.update(get_content_hash(balloon.item))
+        digest.update(get_content_hash(balloon.price))
+    elif isinstance(balloon, SubstanceProduct):
+        digest.update(get_content_hash(balloon.item))
+        digest.update(get_content_hash(balloon.kg_price))
+    else:
+        raise ValueError(f"Unknown balloon type: {balloon}")
+    return digest.digest()
+
+
+def _hash_name(balloon: NamedBalloon) -> ContentHash:
+    digest = hashlib.blake2b(b"NamedBalloon", digest_size=DIGEST_SIZE)
+    digest.update(_encode_name(type(balloon).__name__))
+    digest.update(_encode_name(balloon.name))
+    return digest.digest()
+
+
+def _encode_name(name: str) -> bytes:
+    encoded = name.encode()
+    return struct.pack("<I", len(encoded)) + encoded
+
+
+def _encode_float(value: float) -> bytes:
+    return struct.pack("<d", value)
@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import pickle
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from balloons import ClosedBalloonWorld
+
+from food_manager.analysis import (
+    GroceryReporter,
+    NutrientReport,
+    NutrientReporter,
+    PriceReporter,
+    analyze_daily_meal_plans,
+)
+from food_manager.cache import RESOLUTION_CACHE
+from food_manager.hashing import Interner
+from food_manager.path import CONTENT_STORE_PATH, WEEKLY_DATA_PATH, WORLD_PATH
+from food_manager.schema import DailyMealPlan, Day, Nutrient, Product, WeeklyMealPlan
+from food_manager.utils import PriceCalculator
+from food_manager.versions import (
+    WorldVersions,
+    archive_weekly_meal_plan,
+    is_valid_manifest,
+    load_archived_weekly_meal_plan,
+)
+from food_manager.world import (
+    compile_weekly_meal_plan,
+    inflate_daily_meal_plans,
+    load_deferred_world,
+)
+
+MEAL_PLAN_FILE_NAME = "meal-plan.json"
+WEEK_WORLD_DIRECTORY_NAME = "world"
+MANIFEST_FILE_NAME = "content.json"
+
+
+@dataclass(frozen=True)
+class WeekAnalysis:
+    """
+    The analysis of the meal plan of a week.
+    """
+
+    week: str
+    """
+    The name of the week directory.
+    """
+
+    day_count: int
+    """
+    The number of days in the meal plan.
+    """
+
+    day_kcal: dict[Day, float]
+    """
+    The kilocalories per day.
+    """
+
+    week_grams: dict[Nutrient, float]
+    """
+    The grams of each nutrient in the whole week.
+    """
+
+    week_cents: float
+    """
+    The unrounded cents of the priced rations in the whole week.
+    """
+
+    unpriced_ration_count: int
+    """
+    The number of rations that could not be priced.
+    """
+
+    category_grams: dict[str, float]
+    """
+    The grams to buy per category name.
+    """
+
+
+def find_week_paths(weekly_data_path: Path = WEEKLY_DATA_PATH) -> list[Path]:
+    """
+    Find the directories of every week with a meal plan, sorted by name.
+    """
+    return sorted(
+        path
+        for path in weekly_data_path.iterdir()
+        if (path / MEAL_PLAN_FILE_NAME).is_file()
+    )
+
+
+def get_week_fingerprint(week_path: Path) -> str:
+    """
+    Get a fingerprint of the contents of the meal plan and the world of a week, which
+    changes whenever either is edited.
+    """
+    digest = hashlib.sha256((week_path / MEAL_PLAN_FILE_NAME).read_bytes())
+    week_world_path = week_path / WEEK_WORLD_DIRECTORY_NAME
+    if week_world_path.is_dir():
+        for file_path in sorted(p for p in week_world_path.rglob("*") if p.is_file()):
+            digest.update(f"\0{file_path.relative_to(week_world_path)}\0".encode())
+            digest.update(file_path.read_bytes())
+    return digest.hexdigest()
+
+
+def analyze_history(
+    week_paths: list[Path] | None = None,
+    world_path: Path = WORLD_PATH,
+    content_store_path: Path = CONTENT_STORE_PATH,
+    max_workers: int | None = None,
+) -> list[WeekAnalysis]:
+    """
+    Analyze the meal plans of many weeks in a process pool, returning the analyses in
+    the order of the week paths.
+
+    The global world is loaded once and shared with the workers, each of which
+    populates the world of a week on top of a copy of it. Archived weeks are loaded
+    from the content store instead, against the world as it was when archived, unless
+    their meal plan or world was edited since.
+    """
+    if week_paths is None:
+        week_paths = find_week_paths()
+
+    world_snapshot = pickle.dumps(
+        load_deferred_world(world_path).get_world(), pickle.HIGHEST_PROTOCOL
+    )
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_initialize_worker,
+        initargs=(world_snapshot, content_store_path),
+    ) as executor:
+        return list(executor.map(_analyze_week, week_paths))
+
+
+def archive_history(
+    week_paths: list[Path] | None = None,
+    world_path: Path = WORLD_PATH,
+    content_store_path: Path = CONTENT_STORE_PATH,
+    force: bool = False,
+) -> list[Path]:
+    """
+    Archive the worlds and meal plans of many weeks into a content store, writing a
+    manifest into each week directory that pins the week to its version of the world,
+    and get the paths of the weeks archived.
+
+    Substances and rations shared by many weeks are stored once, and the archived
+    weeks are then analyzed against the world as it was, without populating their
+    worlds or parsing their meal plans. Weeks already archived keep the version they
+    are pinned to, unless their meal plan or world was edited since, or they are
+    forced to be archived again against the current world.
+    """
+    if week_paths is None:
+        week_paths = find_week_paths()
+
+    world_versions = WorldVersions(content_store_path)
+    week_fingerprints = {p: get_week_fingerprint(p) for p in week_paths}
+    if not force:
+        week_paths = [
+            week_path
+            for week_path in week_paths
+            if not is_valid_manifest(
+                week_path / MANIFEST_FILE_NAME,
+                world_versions,
+                week_fingerprints[week_path],
+            )
+        ]
+    if len(week_paths) == 0:
+        return week_paths
+
+    world = load_deferred_world(world_path).get_world()
+    world_snapshot: bytes | None = None
+    interner = Interner()
+    for week_path in week_paths:
+        week_world, week_interner = world, interner
+        if (week_world_path := week_path / WEEK_WORLD_DIRECTORY_NAME).is_dir():
+            # Populating a world extends it, so weeks with a world of their own are
+            # populated on top of a copy of the global world.
+            if world_snapshot is None:
+                world_snapshot = pickle.dumps(world, pickle.HIGHEST_PROTOCOL)
+            week_world = pickle.loads(world_snapshot).populate(week_world_path)
+            week_interner = Interner()
+
+        deflated_weekly_meal_plan = json.loads(
+            (week_path / MEAL_PLAN_FILE_NAME).read_text()
+        )
+        weekly_meal_plan = week_interner.intern(
+            week_world.get_balloonist(WeeklyMealPlan).inflate(deflated_weekly_meal_plan)
+        )
+        archive_weekly_meal_plan(
+            week_world,
+            weekly_meal_plan,
+            week_path / MANIFEST_FILE_NAME,
+            world_versions,
+            week_fingerprints[week_path],
+        )
+    return week_paths
+
+
+# --------------------------------------------------------------------------------------
+_world: ClosedBalloonWorld | None = None
+_world_snapshot: bytes | None = None
+_world_versions: WorldVersions | None = None
+
+
+def _initialize_worker(world_snapshot: bytes, content_store_path: Path) -> None:
+    global _world, _world_snapshot, _world_versions
+    _world = pickle.loads(world_snapshot)
+    _world_snapshot = world_snapshot
+    _world_versions = WorldVersions(content_store_path)
+
+
+def _analyze_week(week_path: Path) -> WeekAnalysis:
+    if _world is None or _world_snapshot is None or _world_versions is None:
+        raise ValueError("Worker was not initialized with a world snapshot.")
+
+    manifest_path = week_path / MANIFEST_FILE_NAME
+    if manifest_path.is_file() and is_valid_manifest(
+        manifest_path, _world_versions, get_week_fingerprint(week_path)
+    ):
+        RESOLUTION_CACHE.invalidate()
+        content_world, weekly_meal_plan = load_archived_weekly_meal_plan(
+            manifest_path, _world_versions
+        )
+        compile_weekly_meal_plan(weekly_meal_plan)
+        product_provider = content_world.get_provider(Product)
+        daily_meal_plans: Iterable[tuple[Day, DailyMealPlan]] = (
+            weekly_meal_plan.dailies.items()
+        )
+    else:
+        # The global world is shared by the weeks of the worker, so that substances
+        # compiled for a week stay compiled for the next, and only weeks with a world
+        # of their own populate a copy of it.
+        world = _world
+        if (week_world_path := week_path / WEEK_WORLD_DIRECTORY_NAME).is_dir():
+            world = pickle.loads(_world_snapshot).populate(week_world_path)
+            RESOLUTION_CACHE.invalidate()
+        product_provider = world.get_provider(Product)
+        daily_meal_plans = inflate_daily_meal_plans(
+            world, week_path / MEAL_PLAN_FILE_NAME
+        )
+
+    price_calculator = PriceCalculator.create(
+        products=[product_provider.get(n) for n in product_provider.get_names()]
+    )
+    days: list[Day] = []
+    results = analyze_daily_meal_plans(
+        _record_days(daily_meal_plans, days),
+        reporters={
+            "nutrients": NutrientReporter(),
+            "prices": PriceReporter(price_calculator),
+            "groceries": GroceryReporter(),
+        },
+    )
+    nutrient_report: NutrientReport = results["nutrients"]
+
+    return WeekAnalysis(
+        week=week_path.name,
+        day_count=len(days),
+        day_kcal=nutrient_report.day_kcal,
+        week_grams=nutrient_report.week_grams,
+        week_cents=results["prices"].week_cents,
+        unpriced_ration_count=len(results["prices"].unpriced_rations),
+        category_grams={
+            category.name: grams for category, grams in results["groceries"].items()
+        },
+    )
+
+
+def _record_days(
+    daily_meal_plans: Iterable[tuple[Day, DailyMealPlan]], days: list[Day]
+) -> Iterator[tuple[Day, DailyMealPlan]]:
+    for day, daily_meal_plan in daily_meal_plans:
+        days.append(day)
+        yield day, daily_meal_plan
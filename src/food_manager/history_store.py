@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import json
+import pickle
+import shutil
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+from balloons import ClosedBalloonWorld, NamedBalloon
+
+from food_manager.engine import DAYS
+from food_manager.hashing import Interner
+from food_manager.history import (
+    MEAL_PLAN_FILE_NAME,
+    WEEK_WORLD_DIRECTORY_NAME,
+    find_week_paths,
+)
+from food_manager.nutrients import NUTRIENTS, get_kcal_vector
+from food_manager.path import HISTORY_STORE_PATH, WORLD_PATH
+from food_manager.schema import Substance
+from food_manager.utils import get_nutrient_profile
+from food_manager.world import inflate_daily_meal_plans, load_deferred_world
+
+HISTORY_STORE_VERSION = 2
+"""
+The version of the history store format, to be bumped whenever the layout changes.
+"""
+
+META_FILE_NAME = "meta.json"
+
+_COLUMN_TYPES: dict[str, str] = {
+    "week": "i",
+    "day": "b",
+    "meal_slot": "i",
+    "ration": "i",
+    "substance": "i",
+    "grams": "d",
+}
+
+
+@dataclass(frozen=True)
+class HistoryStore:
+    """
+    The rations of many weekly meal plans flattened into a columnar table of
+    memory-mapped arrays, with one row per ration.
+
+    Weeks, meal slots, rations and substances are stored as indices into the name
+    tuples of the store. Days are indices into `DAYS`.
+    """
+
+    weeks: tuple[str, ...]
+    """
+    The names of the week directories, in the order of the week indices.
+    """
+
+    meal_slots: tuple[str, ...]
+    """
+    The names of the meal slots, in the order of the meal slot indices.
+    """
+
+    rations: tuple[str, ...]
+    """
+    The names of the named rations, in the order of the ration indices. Anonymous
+    rations have index -1.
+    """
+
+    substances: tuple[str, ...]
+    """
+    The names of the substances, in the order of the substance indices. Anonymous
+    substances have an empty name.
+    """
+
+    week: npt.NDArray[np.int32]
+    """
+    The week index of each row.
+    """
+
+    day: npt.NDArray[np.int8]
+    """
+    The day index of each row.
+    """
+
+    meal_slot: npt.NDArray[np.int32]
+    """
+    The meal slot index of each row.
+    """
+
+    ration: npt.NDArray[np.int32]
+    """
+    The ration index of each row.
+    """
+
+    substance: npt.NDArray[np.int32]
+    """
+    The substance index of each row.
+    """
+
+    grams: npt.NDArray[np.float64]
+    """
+    The grams of each row.
+    """
+
+    substance_nutrients: npt.NDArray[np.float32]
+    """
+    The substances × nutrients matrix of nutrient ratios, along `NUTRIENTS`, stored in
+    single precision to keep it compact as the nutrient set grows.
+    """
+
+    def get_nutrient_grams(self) -> npt.NDArray[np.float64]:
+        """
+        Get the rows × nutrients grams.
+        """
+        return self.grams[:, np.newaxis] * self.substance_nutrients[self.substance]
+
+    def get_kcal(self) -> npt.NDArray[np.float64]:
+        """
+        Get the kilocalories of each row.
+        """
+        return self.grams * get_kcal_vector(self.substance_nutrients)[self.substance]
+
+    def get_day_kcal(self) -> npt.NDArray[np.float64]:
+        """
+        Get the weeks × days kilocalories.
+        """
+        return self._sum_by_day(self.get_kcal())
+
+    def get_day_nutrient_grams(self) -> npt.NDArray[np.float64]:
+        """
+        Get the weeks × days × nutrients grams.
+        """
+        nutrient_grams = self.get_nutrient_grams()
+        return np.stack(
+            [self._sum_by_day(nutrient_grams[:, i]) for i in range(len(NUTRIENTS))],
+            axis=-1,
+        )
+
+    def _sum_by_day(self, values: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+        cells = self.week.astype(np.intp) * len(DAYS) + self.day
+        sums = np.bincount(cells, weights=values, minlength=len(self.weeks) * len(DAYS))
+        return np.asarray(sums, dtype=np.float64).reshape(len(self.weeks), len(DAYS))
+
+    @staticmethod
+    def open(store_path: Path = HISTORY_STORE_PATH) -> HistoryStore:
+        """
+        Open a history store, memory-mapping its columns.
+        """
+        meta = json.loads((store_path / META_FILE_NAME).read_text())
+        if meta["version"] != HISTORY_STORE_VERSION:
+            raise ValueError(
+                f"History store has version {meta['version']}, "
+                f"expected {HISTORY_STORE_VERSION}; export it again."
+            )
+        if meta["nutrients"] != [n.name for n in NUTRIENTS]:
+            raise ValueError("History store has other nutrients; export it again.")
+
+        def load(name: str) -> Any:
+            return np.load(store_path / f"{name}.npy", mmap_mode="r")
+
+        return HistoryStore(
+            weeks=tuple(meta["weeks"]),
+            meal_slots=tuple(meta["meal_slots"]),
+            rations=tuple(meta["rations"]),
+            substances=tuple(meta["substances"]),
+            week=load("week"),
+            day=load("day"),
+            meal_slot=load("meal_slot"),
+            ration=load("ration"),
+            substance=load("substance"),
+            grams=load("grams"),
+            substance_nutrients=load("substance_nutrients"),
+        )
+
+
+def export_history(
+    week_paths: list[Path] | None = None,
+    world_path: Path = WORLD_PATH,
+    store_path: Path = HISTORY_STORE_PATH,
+) -> HistoryStore:
+    """
+    Flatten the meal plans of many weeks into a history store, replacing any previous
+    store at the path, and open it.
+
+    As in the history analysis, each week is inflated against the global world with
+    the world of the week populated on top of it.
+    """
+    if week_paths is None:
+        week_paths = find_week_paths()
+
+    exporter = _HistoryExporter()
+    world = load_deferred_world(world_path).get_world()
+    world_snapshot = pickle.dumps(world, pickle.HIGHEST_PROTOCOL)
+    interner = Interner()
+    for week_index, week_path in enumerate(week_paths):
+        week_world, week_interner = world, interner
+        if (week_world_path := week_path / WEEK_WORLD_DIRECTORY_NAME).is_dir():
+            week_world = pickle.loads(world_snapshot).populate(week_world_path)
+            week_interner = Interner()
+        exporter.add_week(
+            week_index, week_world, week_path / MEAL_PLAN_FILE_NAME, week_interner
+        )
+
+    temporary_path = store_path.with_name(f"{store_path.name}.tmp")
+    shutil.rmtree(temporary_path, ignore_errors=True)
+    temporary_path.mkdir(parents=True)
+    exporter.write(temporary_path, weeks=[p.name for p in week_paths])
+    shutil.rmtree(store_path, ignore_errors=True)
+    temporary_path.replace(store_path)
+
+    return HistoryStore.open(store_path)
+
+
+# --------------------------------------------------------------------------------------
+
+
+class _HistoryExporter:
+    def __init__(self) -> None:
+        self._columns: dict[str, array[Any]] = {
+            name: array(type_) for name, type_ in _COLUMN_TYPES.items()
+        }
+        self._meal_slot_indices: dict[str, int] = {}
+        self._ration_indices: dict[str, int] = {}
+        self._substance_indices: dict[tuple[str, bytes], int] = {}
+        self._substance_nutrients: list[npt.NDArray[np.float64]] = []
+
+    def add_week(
+        self,
+        week_index: int,
+        world: ClosedBalloonWorld,
+        meal_plan_path: Path,
+        interner: Interner,
+    ) -> None:
+        day_indices = {day: i for i, day in enumerate(DAYS)}
+        for day, daily_meal_plan in inflate_daily_meal_plans(
+            world, meal_plan_path, interner
+        ):
+            for meal_slot, meal in daily_meal_plan.meals.items():
+                meal_slot_index = self._meal_slot_indices.setdefault(
+                    meal_slot.name, len(self._meal_slot_indices)
+                )
+                for ration in meal.rations:
+                    ration_index = -1
+                    if isinstance(ration, NamedBalloon):
+                        ration_index = self._ration_indices.setdefault(
+                            ration.name, len(self._ration_indices)
+                        )
+                    self._columns["week"].append(week_index)
+                    self._columns["day"].append(day_indices[day])
+                    self._columns["meal_slot"].append(meal_slot_index)
+                    self._columns["ration"].append(ration_index)
+                    self._columns["substance"].append(
+                        self._get_substance_index(ration.substance)
+                    )
+                    self._columns["grams"].append(ration.grams)
+
+    def write(self, store_path: Path, weeks: list[str]) -> None:
+        for name, column in self._columns.items():
+            np.save(
+                store_path / f"{name}.npy", np.frombuffer(column, dtype=column.typecode)
+            )
+        np.save(
+            store_path / "substance_nutrients.npy",
+            np.array(self._substance_nutrients, dtype=np.float32).reshape(
+                len(self._substance_nutrients), len(NUTRIENTS)
+            ),
+        )
+        meta = {
+            "version": HISTORY_STORE_VERSION,
+            "nutrients": [n.name for n in NUTRIENTS],
+            "weeks": weeks,
+            "meal_slots": list(self._meal_slot_indices),
+            "rations": list(self._ration_indices),
+            "substances": [name for name, _ in self._substance_indices],
+        }
+        (store_path / META_FILE_NAME).write_text(json.dumps(meta, indent=2) + "\n")
+
+    def _get_substance_index(self, substance: Substance) -> int:
+        """
+        Get the index of a substance, telling substances apart by name and encoded
+        nutrients, since the same name may stand for other substances in other weeks.
+        """
+        nutrient_profile = get_nutrient_profile(substance)
+        name = substance.name if isinstance(substance, NamedBalloon) else ""
+        key = (name, nutrient_profile.encode())
+        if (index := self._substance_indices.get(key)) is None:
+            index = len(self._substance_indices)
+            self._substance_indices[key] = index
+            self._substance_nutrients.append(nutrient_profile.values)
+        return index
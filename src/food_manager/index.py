@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+from balloons import ClosedBalloonWorld, NamedBalloon
+
+from food_manager.schema import (
+    Category,
+    CompositeSubstance,
+    DehydratedSubstance,
+    Meal,
+    Product,
+    Ration,
+    RationProduct,
+    Substance,
+    SubstanceProduct,
+    WeeklyMealPlan,
+)
+from food_manager.store import WorldStore
+
+T = TypeVar("T")
+
+
+class WorldIndex(ABC):
+    """
+    Indexes of the substances and products of a world by category and by substance.
+    """
+
+    @abstractmethod
+    def get_category_substances(self, category: Category) -> tuple[Substance, ...]:
+        """
+        Get the named substances of a category.
+        """
+
+    @abstractmethod
+    def get_category_products(self, category: Category) -> tuple[Product, ...]:
+        """
+        Get the products of a category, by the category of the substance they sell.
+        """
+
+    @abstractmethod
+    def get_substance_products(self, substance: Substance) -> tuple[Product, ...]:
+        """
+        Get the products of a named substance.
+        """
+
+
+@dataclass(frozen=True)
+class LoadedWorldIndex(WorldIndex):
+    """
+    Indexes of the substances and products of a loaded world, built upfront.
+    """
+
+    category_substances: dict[Category, tuple[Substance, ...]]
+    """
+    The named substances of each category.
+    """
+
+    category_products: dict[Category, tuple[Product, ...]]
+    """
+    The products of each category, by the category of the substance they sell.
+    """
+
+    substance_products: dict[NamedBalloon, tuple[Product, ...]]
+    """
+    The products of each named substance.
+    """
+
+    def get_category_substances(self, category: Category) -> tuple[Substance, ...]:
+        return self.category_substances.get(category, ())
+
+    def get_category_products(self, category: Category) -> tuple[Product, ...]:
+        return self.category_products.get(category, ())
+
+    def get_substance_products(self, substance: Substance) -> tuple[Product, ...]:
+        if not isinstance(substance, NamedBalloon):
+            return ()
+        return self.substance_products.get(substance, ())
+
+    @staticmethod
+    def create(
+        substances: Iterable[Substance], products: Iterable[Product]
+    ) -> LoadedWorldIndex:
+        category_substances: dict[Category, list[Substance]] = defaultdict(list)
+        category_products: dict[Category, list[Product]] = defaultdict(list)
+        substance_products: dict[NamedBalloon, list[Product]] = defaultdict(list)
+
+        for substance in substances:
+            category_substances[substance.category].append(substance)
+
+        for product in products:
+            substance = get_product_substance(product)
+            category_products[substance.category].append(product)
+            if isinstance(substance, NamedBalloon):
+                substance_products[substance].append(product)
+
+        return LoadedWorldIndex(
+            category_substances={k: tuple(v) for k, v in category_substances.items()},
+            category_products={k: tuple(v) for k, v in category_products.items()},
+            substance_products={k: tuple(v) for k, v in substance_products.items()},
+        )
+
+
+class WorldStoreIndex(WorldIndex):
+    """
+    Indexes of the substances and products of a world store, answered by the indexed
+    queries of the store.
+
+    Only the balloons of the categories looked up are fetched from the store, and the
+    answers are kept by category.
+    """
+
+    def __init__(self, world_store: WorldStore) -> None:
+        self._world_store = world_store
+        self._category_substances: dict[Category, tuple[Substance, ...]] = {}
+        self._category_products: dict[Category, tuple[Product, ...]] = {}
+
+    def get_category_substances(self, category: Category) -> tuple[Substance, ...]:
+        if (substances := self._category_substances.get(category)) is None:
+            substances = self._fetch(Substance, category)
+            self._category_substances[category] = substances
+        return substances
+
+    def get_category_products(self, category: Category) -> tuple[Product, ...]:
+        if (products := self._category_products.get(category)) is None:
+            products = self._fetch(Product, category)
+            self._category_products[category] = products
+        return products
+
+    def get_substance_products(self, substance: Substance) -> tuple[Product, ...]:
+        if not isinstance(substance, NamedBalloon):
+            return ()
+        # The products of a substance are among those of its category.
+        return tuple(
+            p
+            for p in self.get_category_products(substance.category)
+            if get_product_substance(p) == substance
+        )
+
+    def _fetch(self, type_: type[T], category: Category) -> tuple[T, ...]:
+        return tuple(
+            self._world_store.get(type_, name)
+            for name in self._world_store.get_names_by_category(type_, category)
+        )
+
+
+def get_product_substance(product: Product) -> Substance:
+    """
+    Get the substance sold by a product.
+    """
+    if isinstance(product, RationProduct):
+        return product.item.substance
+    if isinstance(product, SubstanceProduct):
+        return product.item
+    raise ValueError(f"Unknown product type: {product}")
+
+
+def create_world_index(world: ClosedBalloonWorld | WorldStore) -> WorldIndex:
+    """
+    Index the named substances and products of a world, or of a world store, in which
+    case only the categories looked up are fetched.
+    """
+    if isinstance(world, WorldStore):
+        return WorldStoreIndex(world)
+
+    substance_provider = world.get_provider(Substance)
+    product_provider = world.get_provider(Product)
+    return LoadedWorldIndex.create(
+        substances=(substance_provider.get(n) for n in substance_provider.get_names()),
+        products=(product_provider.get(n) for n in product_provider.get_names()),
+    )
+
+
+# --------------------------------------------------------------------------------------
+
+
+class DependencyIndex:
+    """
+    A reverse-dependency index of substances, rations, products and meals, answering
+    which balloons use a balloon directly or transitively.
+
+    Balloons are indexed by identity, since anonymous balloons are unhashable, and the
+    index keeps a reference to every indexed balloon. Adding a balloon also adds the
+    balloons it depends on, so that the index stays complete as balloons are added.
+    """
+
+    def __init__(self) -> None:
+        self._balloons: dict[int, Any] = {}
+        self._dependencies: dict[int, tuple[Any, ...]] = {}
+        self._dependents: dict[int, dict[int, Any]] = defaultdict(dict)
+
+    def add(self, balloon: Any) -> None:
+        """
+        Index a balloon and the balloons it depends on, directly or transitively.
+        """
+        pending = [balloon]
+        while pending:
+            dependent = pending.pop()
+            if id(dependent) in self._dependencies:
+                continue
+
+            dependencies = get_dependencies(dependent)
+            self._balloons[id(dependent)] = dependent
+            self._dependencies[id(dependent)] = dependencies
+            for dependency in dependencies:
+                self._dependents[id(dependency)][id(dependent)] = dependent
+                pending.append(dependency)
+
+    def remove(self, balloon: Any) -> None:
+        """
+        Stop indexing the dependencies of a balloon, as when it is replaced by an edit.
+
+        Balloons that still use the balloon keep it as a dependency. Anonymous
+        dependencies left unused are removed as well, since they only exist within the
+        balloons using them.
+        """
+        pending = [balloon]
+        while pending:
+            dependent = pending.pop()
+            if (dependencies := self._dependencies.pop(id(dependent), None)) is None:
+                continue
+
+            for dependency in dependencies:
+                dependents = self._dependents[id(dependency)]
+                dependents.pop(id(dependent), None)
+                if not dependents:
+                    del self._dependents[id(dependency)]
+                    if not isinstance(dependency, NamedBalloon):
+                        pending.append(dependency)
+            if id(dependent) not in self._dependents:
+                del self._balloons[id(dependent)]
+
+    def replace(self, old_balloon: Any, new_balloon: Any) -> None:
+        self.remove(old_balloon)
+        self.add(new_balloon)
+
+    def add_world(self, world: ClosedBalloonWorld) -> None:
+        """
+        Index every substance, ration and product of a world.
+        """
+        for type_ in (Substance, Ration, Product):
+            provider = world.get_provider(type_)
+            for name in provider.get_names():
+                self.add(provider.get(name))
+
+    def add_weekly_meal_plan(self, weekly_meal_plan: WeeklyMealPlan) -> None:
+        """
+        Index every meal of a weekly meal plan.
+        """
+        for daily_meal_plan in weekly_meal_plan.dailies.values():
+            for meal in daily_meal_plan.meals.values():
+                self.add(meal)
+
+    def get_dependents(self, balloon: Any) -> list[Any]:
+        """
+        Get the indexed balloons that directly use a balloon.
+        """
+        return list(self._dependents.get(id(balloon), {}).values())
+
+    def get_where_used(self, balloon: Any) -> list[Any]:
+        """
+        Get the indexed balloons that use a balloon directly or transitively, closest
+        first, in time proportional to their number and their links.
+        """
+        where_used: list[Any] = []
+        visited_ids = {id(balloon)}
+        pending = [balloon]
+        index = 0
+        while index < len(pending):
+            dependents = self._dependents.get(id(pending[index]), {})
+            for dependent_id, dependent in dependents.items():
+                if dependent_id not in visited_ids:
+                    visited_ids.add(dependent_id)
+                    where_used.append(dependent)
+                    pending.append(dependent)
+            index += 1
+        return where_used
+
+
+def get_dependencies(balloon: Any) -> tuple[Any, ...]:
+    """
+    Get the substances, rations and meals a balloon directly depends on.
+    """
+    if isinstance(balloon, CompositeSubstance):
+        return tuple(c.substance for c in balloon.components)
+    if isinstance(balloon, DehydratedSubstance):
+        return (balloon.original_substance,)
+    if isinstance(balloon, Ration):
+        return (balloon.substance,)
+    if isinstance(balloon, (RationProduct, SubstanceProduct)):
+        return (balloon.item,)
+    if isinstance(balloon, Meal):
+        return balloon.rations
+    return ()
+
+
+def create_dependency_index(world: ClosedBalloonWorld) -> DependencyIndex:
+    """
+    Index the reverse dependencies of the substances, rations and products of a world.
+    """
+    dependency_index = DependencyIndex()
+    dependency_index.add_world(world)
+    return dependency_index
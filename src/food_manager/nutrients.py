@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import struct
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+from food_manager.schema import Nutrient
+
+NUTRIENTS: tuple[Nutrient, ...] = tuple(Nutrient)
+"""
+The nutrients in the order of the axis of nutrient vectors, which is the order of
+their ordinals.
+"""
+
+NUTRIENT_INDICES: dict[Nutrient, int] = {n: i for i, n in enumerate(NUTRIENTS)}
+"""
+The index of each nutrient along the axis of nutrient vectors.
+"""
+
+MACRONUTRIENTS: tuple[Nutrient, ...] = (
+    Nutrient.CARB,
+    Nutrient.FAT,
+    Nutrient.PROTEIN,
+    Nutrient.ETHANOL,
+)
+"""
+The main energy-yielding nutrients, shown by summaries too narrow for every nutrient.
+"""
+
+KCAL_PER_GRAM: dict[Nutrient, float] = {
+    Nutrient.CARB: 4.0,
+    Nutrient.FAT: 9.0,
+    Nutrient.PROTEIN: 4.0,
+    Nutrient.ETHANOL: 7.0,
+}
+"""
+The kilocalories per gram of each energy-yielding nutrient.
+
+Nutrients that are part of another, such as sugars of carbohydrates or saturated fat
+of fat, yield no energy of their own.
+"""
+
+KCAL_PER_GRAM_VECTOR: npt.NDArray[np.float64] = np.array(
+    [KCAL_PER_GRAM.get(n, 0.0) for n in NUTRIENTS]
+)
+"""
+The kilocalories per gram of each nutrient, along `NUTRIENTS`.
+"""
+
+
+@dataclass(frozen=True)
+class NutrientProfile:
+    """
+    Amounts of every nutrient as dense vectors along `NUTRIENTS`, such as the nutrient
+    ratios of a substance or the nutrient grams of rations.
+    """
+
+    values: npt.NDArray[np.float64]
+    """
+    The amount of each nutrient, zero if undefined.
+    """
+
+    defined: npt.NDArray[np.bool_]
+    """
+    Whether each nutrient is defined, as opposed to unknown.
+    """
+
+    def __add__(self, other: NutrientProfile) -> NutrientProfile:
+        return NutrientProfile(
+            values=self.values + other.values, defined=self.defined | other.defined
+        )
+
+    def scale(self, factor: float) -> NutrientProfile:
+        return NutrientProfile(values=self.values * factor, defined=self.defined)
+
+    def get_kcal(self) -> float:
+        return float(self.values @ KCAL_PER_GRAM_VECTOR)
+
+    def to_dict(self) -> dict[Nutrient, float]:
+        """
+        Get the amounts of the defined nutrients.
+        """
+        return {
+            NUTRIENTS[i]: float(self.values[i]) for i in np.flatnonzero(self.defined)
+        }
+
+    def encode(self) -> bytes:
+        """
+        Encode the profile compactly, as the number of nutrients, a bit mask of the
+        defined nutrients and their amounts as 32-bit floats.
+
+        Nutrients are only ever appended to `Nutrient`, so encodings stay valid as the
+        nutrient set grows.
+        """
+        return (
+            struct.pack("<H", len(NUTRIENTS))
+            + np.packbits(self.defined, bitorder="little").tobytes()
+            + self.values[self.defined].astype("<f4").tobytes()
+        )
+
+    @staticmethod
+    def create(nutrient_amounts: Mapping[Nutrient, float]) -> NutrientProfile:
+        values = np.zeros(len(NUTRIENTS))
+        defined = np.zeros(len(NUTRIENTS), dtype=np.bool_)
+        for nutrient, amount in nutrient_amounts.items():
+            index = NUTRIENT_INDICES[nutrient]
+            values[index] = amount
+            defined[index] = True
+        return NutrientProfile(values=values, defined=defined)
+
+    @staticmethod
+    def combine(
+        profiles: Sequence[NutrientProfile], weights: Sequence[float]
+    ) -> NutrientProfile:
+        """
+        Sum the given profiles scaled by their weights in a single product.
+        """
+        if len(profiles) == 0:
+            return ZERO_NUTRIENT_PROFILE
+        return NutrientProfile(
+            values=np.asarray(weights) @ np.stack([p.values for p in profiles]),
+            defined=np.logical_or.reduce([p.defined for p in profiles]),
+        )
+
+    @staticmethod
+    def decode(data: bytes) -> NutrientProfile:
+        (nutrient_count,) = struct.unpack_from("<H", data)
+        if nutrient_count > len(NUTRIENTS):
+            raise ValueError(
+                f"Nutrient profile has {nutrient_count} nutrients, "
+                f"expected at most {len(NUTRIENTS)}."
+            )
+
+        mask_size = (nutrient_count + 7) // 8
+        defined = np.zeros(len(NUTRIENTS), dtype=np.bool_)
+        defined[:nutrient_count] = np.unpackbits(
+            np.frombuffer(data, dtype=np.uint8, count=mask_size, offset=2),
+            count=nutrient_count,
+            bitorder="little",
+        ).astype(np.bool_)
+        values = np.zeros(len(NUTRIENTS))
+        values[defined] = np.frombuffer(
+            data, dtype="<f4", count=int(defined.sum()), offset=2 + mask_size
+        )
+        return NutrientProfile(values=values, defined=defined)
+
+
+ZERO_NUTRIENT_PROFILE = NutrientProfile(
+    values=np.zeros(len(NUTRIENTS)), defined=np.zeros(len(NUTRIENTS), dtype=np.bool_)
+)
+"""
+The profile with no defined nutrients.
+"""
+
+
+def get_kcal_vector(values: npt.NDArray[np.floating[Any]]) -> npt.NDArray[np.float64]:
+    """
+    Get the kilocalories of many nutrient vectors at once, along their last axis.
+    """
+    return np.asarray(values @ KCAL_PER_GRAM_VECTOR, dtype=np.float64)
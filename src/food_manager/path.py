@@ -7,3 +7,7 @@ WORLD_PATH = DATA_PATH / "world"
 WEEKLY_DATA_PATH = DATA_PATH / "weekly"
 CURRENT_WEEK_DATA_PATH = WEEKLY_DATA_PATH / "current"
 CURRENT_WEEK_WORLD_PATH = CURRENT_WEEK_DATA_PATH / "world"
+
+CACHE_PATH = DATA_PATH / "cache"
+HISTORY_STORE_PATH = DATA_PATH / "history"
+CONTENT_STORE_PATH = DATA_PATH / "content"
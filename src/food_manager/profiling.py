@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import time
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict
+from typing import Any
+
+from food_manager.cache import RESOLUTION_CACHE
+
+
+class Profiler:
+    """
+    An opt-in recorder of phase timings and call counts.
+
+    Instrumented code checks `enabled` before recording anything, so that a disabled
+    profiler costs a single attribute lookup on hot paths.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self._phase_seconds: dict[str, float] = defaultdict(float)
+        self._counts: dict[str, int] = defaultdict(int)
+
+    def enable(self) -> None:
+        self.reset()
+        RESOLUTION_CACHE.reset_stats()
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        self._phase_seconds.clear()
+        self._counts.clear()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Record the wall time spent within the context under a phase name.
+        """
+        if not self.enabled:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._phase_seconds[name] += time.perf_counter() - start
+
+    def count(self, name: str, count: int = 1) -> None:
+        self._counts[name] += count
+
+    def get_summary(self) -> dict[str, Any]:
+        return {
+            "phase_seconds": dict(self._phase_seconds),
+            "counts": dict(self._counts),
+            "resolution_cache": asdict(RESOLUTION_CACHE.get_stats()),
+        }
+
+
+PROFILER = Profiler()
+"""
+The profiler shared by the instrumented code.
+"""
@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 from enum import Enum, auto
-from pathlib import Path
 
 from balloons import Balloon, ClosedBalloonWorld, NamedBalloon, balloon
 
@@ -17,7 +16,10 @@ class Category(NamedBalloon):
 # --------------------------------------------------------------------------------------
 class Nutrient(Enum):
     """
-    A nutrient.
+    A nutrient, measured in grams.
+
+    New nutrients are only ever appended, since nutrient vectors are indexed by their
+    ordinal.
     """
 
     CARB = auto()
@@ -25,6 +27,46 @@ class Nutrient(Enum):
     PROTEIN = auto()
     ETHANOL = auto()
 
+    SATURATED_FAT = auto()
+    MONOUNSATURATED_FAT = auto()
+    POLYUNSATURATED_FAT = auto()
+    TRANS_FAT = auto()
+    CHOLESTEROL = auto()
+
+    SUGARS = auto()
+    ADDED_SUGARS = auto()
+    STARCH = auto()
+    FIBER = auto()
+
+    WATER = auto()
+    CAFFEINE = auto()
+
+    SODIUM = auto()
+    POTASSIUM = auto()
+    CALCIUM = auto()
+    PHOSPHORUS = auto()
+    MAGNESIUM = auto()
+    IRON = auto()
+    ZINC = auto()
+    COPPER = auto()
+    MANGANESE = auto()
+    SELENIUM = auto()
+    IODINE = auto()
+
+    VITAMIN_A = auto()
+    VITAMIN_B1 = auto()
+    VITAMIN_B2 = auto()
+    VITAMIN_B3 = auto()
+    VITAMIN_B5 = auto()
+    VITAMIN_B6 = auto()
+    VITAMIN_B7 = auto()
+    VITAMIN_B9 = auto()
+    VITAMIN_B12 = auto()
+    VITAMIN_C = auto()
+    VITAMIN_D = auto()
+    VITAMIN_E = auto()
+    VITAMIN_K = auto()
+
 
 # --------------------------------------------------------------------------------------
 @balloon
@@ -47,7 +89,7 @@ class SimpleSubstance(Substance):
 
     nutrient_ratios: dict[Nutrient, float]
     """
-    The macronutrient ratios of the substance.
+    The grams of each nutrient per gram of the substance, for the nutrients known.
     """
 
 
@@ -174,8 +216,6 @@ class WeeklyMealPlan(Balloon):
     """
 
 
-
-
 # --------------------------------------------------------------------------------------
 @balloon
 class Money(Balloon):
@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import io
+import pickle
+import sqlite3
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any, Generic, TypeVar
+
+from balloons import ClosedBalloonWorld, NamedBalloon
+
+from food_manager.schema import (
+    Category,
+    MealSlot,
+    Product,
+    Ration,
+    RationProduct,
+    Substance,
+    SubstanceProduct,
+)
+
+T = TypeVar("T")
+
+NAMESPACE_TYPES: tuple[type, ...] = (Category, Substance, Ration, Product, MealSlot)
+"""
+The types of the namespaces of named balloons kept in a world store.
+"""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS balloons (
+    namespace TEXT NOT NULL,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    category TEXT,
+    data BLOB NOT NULL,
+    PRIMARY KEY (namespace, name)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS balloons_type ON balloons (namespace, type);
+CREATE INDEX IF NOT EXISTS balloons_category ON balloons (namespace, category);
+CREATE TABLE IF NOT EXISTS metadata (
+    key TEXT NOT NULL PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+class WorldStore:
+    """
+    A store of the named balloons of a world in an SQLite database, indexed by
+    namespace, name, type and category.
+
+    Each balloon is pickled on its own, with the named balloons it refers to pickled as
+    references, so that fetching a balloon only loads the balloons it depends on.
+    Fetched balloons are kept by namespace and name, so that references to the same
+    balloon are resolved to the same object.
+
+    A store built from a world records the fingerprint of its files, so that it can be
+    rebuilt once they change.
+    """
+
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(path)
+        self._connection.executescript(_SCHEMA)
+        self._balloons: dict[tuple[str, str], Any] = {}
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self) -> WorldStore:
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def add(self, balloons: Iterable[NamedBalloon]) -> None:
+        """
+        Add or replace named balloons in a single transaction.
+        """
+        with self._connection:
+            self._insert(balloons)
+        self._balloons.clear()
+
+    def add_world(self, world: ClosedBalloonWorld) -> None:
+        """
+        Add every named balloon of a world.
+        """
+        self.add(_iter_world_balloons(world))
+
+    def replace_world(self, world: ClosedBalloonWorld, fingerprint: str) -> None:
+        """
+        Replace the balloons of the store with those of a world in a single
+        transaction, recording the fingerprint of the files it was populated from.
+        """
+        with self._connection:
+            self._connection.execute("DELETE FROM balloons")
+            self._insert(_iter_world_balloons(world))
+            self._connection.execute(
+                "INSERT OR REPLACE INTO metadata VALUES ('fingerprint', ?)",
+                (fingerprint,),
+            )
+        self._balloons.clear()
+
+    def get_fingerprint(self) -> str | None:
+        """
+        Get the fingerprint of the files of the world the store was built from, if
+        any.
+        """
+        row = self._connection.execute(
+            "SELECT value FROM metadata WHERE key = 'fingerprint'"
+        ).fetchone()
+        return row[0] if row is not None else None
+
+    def get(self, type_: type[T], name: str) -> T:
+        namespace = get_namespace(type_)
+        if (balloon := self._balloons.get((namespace, name))) is not None:
+            return balloon
+
+        row = self._connection.execute(
+            "SELECT data FROM balloons WHERE namespace = ? AND name = ?",
+            (namespace, name),
+        ).fetchone()
+        if row is None:
+            raise ValueError(f"No {namespace} named {name!r} in world store.")
+        balloon = _BalloonUnpickler(io.BytesIO(row[0]), self).load()
+        self._balloons[(namespace, name)] = balloon
+        return balloon
+
+    def get_names(self, type_: type[Any]) -> list[str]:
+        """
+        Get the names of the balloons of a namespace type, or only of a given type
+        within it.
+        """
+        namespace = get_namespace(type_)
+        if type_.__name__ == namespace:
+            query = "SELECT name FROM balloons WHERE namespace = ? ORDER BY name"
+            return [name for (name,) in self._connection.execute(query, (namespace,))]
+
+        type_names = _get_type_names(type_)
+        query = (
+            "SELECT name FROM balloons WHERE namespace = ? AND type IN "
+            f"({', '.join('?' * len(type_names))}) ORDER BY name"
+        )
+        parameters = (namespace, *type_names)
+        return [name for (name,) in self._connection.execute(query, parameters)]
+
+    def get_names_by_category(self, type_: type[Any], category: Category) -> list[str]:
+        """
+        Get the names of the balloons of a namespace type that belong to a category.
+        """
+        query = (
+            "SELECT name FROM balloons WHERE namespace = ? AND category = ? "
+            "ORDER BY name"
+        )
+        parameters = (get_namespace(type_), category.name)
+        return [name for (name,) in self._connection.execute(query, parameters)]
+
+    def get_provider(self, type_: type[T]) -> WorldStoreProvider[T]:
+        return WorldStoreProvider(self, type_)
+
+    def _insert(self, balloons: Iterable[NamedBalloon]) -> None:
+        rows = (
+            (
+                get_namespace(type(balloon)),
+                balloon.name,
+                type(balloon).__name__,
+                _get_category_name(balloon),
+                _dump_balloon(balloon),
+            )
+            for balloon in balloons
+        )
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO balloons VALUES (?, ?, ?, ?, ?)", rows
+        )
+
+
+class WorldStoreProvider(Generic[T]):
+    """
+    A provider of the balloons of a type in a world store, in place of the provider of a
+    loaded world.
+    """
+
+    def __init__(self, world_store: WorldStore, type_: type[T]) -> None:
+        self._world_store = world_store
+        self._type = type_
+
+    def get_names(self) -> list[str]:
+        return self._world_store.get_names(self._type)
+
+    def get(self, name: str) -> T:
+        return self._world_store.get(self._type, name)
+
+
+_world_stores: dict[Path, WorldStore] = {}
+
+
+def open_world_store(path: Path) -> WorldStore:
+    """
+    Open the world store at a path, reusing its connection if already open.
+    """
+    path = path.resolve()
+    if (world_store := _world_stores.get(path)) is None:
+        world_store = WorldStore(path)
+        _world_stores[path] = world_store
+    return world_store
+
+
+def get_namespace(type_: type[Any]) -> str:
+    """
+    Get the name of the namespace type of a type of named balloons.
+    """
+    for namespace_type in NAMESPACE_TYPES:
+        if issubclass(type_, namespace_type):
+            return namespace_type.__name__
+    raise ValueError(f"Type {type_.__name__} has no namespace in world stores.")
+
+
+# --------------------------------------------------------------------------------------
+
+
+def _iter_world_balloons(world: ClosedBalloonWorld) -> Iterator[NamedBalloon]:
+    for namespace_type in NAMESPACE_TYPES:
+        provider = world.get_provider(namespace_type)
+        for name in provider.get_names():
+            yield provider.get(name)
+
+
+def _get_type_names(type_: type[Any]) -> list[str]:
+    """
+    Get the names of a type and its subclasses, as stored in the type column.
+    """
+    type_names = []
+    pending = [type_]
+    while pending:
+        subtype = pending.pop()
+        type_names.append(subtype.__name__)
+        pending.extend(subtype.__subclasses__())
+    return type_names
+
+
+def _get_category_name(balloon: Any) -> str | None:
+    if isinstance(balloon, Substance):
+        return balloon.category.name
+    if isinstance(balloon, Ration):
+        return balloon.substance.category.name
+    if isinstance(balloon, RationProduct):
+        return balloon.item.substance.category.name
+    if isinstance(balloon, SubstanceProduct):
+        return balloon.item.category.name
+    return None
+
+
+def _dump_balloon(balloon: NamedBalloon) -> bytes:
+    file = io.BytesIO()
+    _BalloonPickler(file, balloon).dump(balloon)
+    return file.getvalue()
+
+
+class _BalloonPickler(pickle.Pickler):
+    def __init__(self, file: io.BytesIO, root: NamedBalloon) -> None:
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self._root = root
+
+    def persistent_id(self, obj: Any) -> tuple[str, str] | None:
+        if obj is self._root or not isinstance(obj, NamedBalloon):
+            return None
+        return (get_namespace(type(obj)), obj.name)
+
+
+class _BalloonUnpickler(pickle.Unpickler):
+    def __init__(self, file: io.BytesIO, world_store: WorldStore) -> None:
+        super().__init__(file)
+        self._world_store = world_store
+
+    def persistent_load(self, pid: Any) -> Any:
+        namespace, name = pid
+        namespace_type = next(t for t in NAMESPACE_TYPES if t.__name__ == namespace)
+        return self._world_store.get(namespace_type, name)
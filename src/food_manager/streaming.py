@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import json
+import re
+from collections.abc import Iterator
+from typing import IO, Any
+
+CHUNK_SIZE = 1 << 16
+"""
+The number of characters read from a JSON document at a time.
+"""
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+_SCALAR_END = re.compile(r"[,\]}\s]")
+_STRING_SPECIALS = re.compile(r'["\\]')
+_CONTAINER_SPECIALS = re.compile(r'["\[\]{}]')
+
+
+def iter_object_members(
+    file: IO[str], keys: tuple[str, ...] = (), chunk_size: int = CHUNK_SIZE
+) -> Iterator[tuple[str, Any]]:
+    """
+    Iterate over the members of the JSON object under the given keys of a JSON
+    document, decoding one member at a time.
+
+    Only the member being decoded and a chunk of the document are held in memory, apart
+    from values skipped on the way to the object. Raises a `ValueError` if the document
+    is not valid JSON or has no object under the keys.
+    """
+    reader = _Reader(file, chunk_size)
+    for key in keys:
+        for member_key in reader.iter_object_keys():
+            if member_key == key:
+                break
+            reader.decode_value()
+        else:
+            raise ValueError(f"JSON document has no member {key!r}.")
+
+    for member_key in reader.iter_object_keys():
+        yield member_key, reader.decode_value()
+
+
+# --------------------------------------------------------------------------------------
+
+
+class _Reader:
+    def __init__(self, file: IO[str], chunk_size: int) -> None:
+        if chunk_size <= 0:
+            raise ValueError(f"Chunk size must be positive, got {chunk_size}.")
+
+        self._file = file
+        self._chunk_size = chunk_size
+        self._buffer = ""
+        self._position = 0
+        self._at_end = False
+
+    def iter_object_keys(self) -> Iterator[str]:
+        """
+        Iterate over the keys of the object at the current position, leaving the reader
+        at the value of each key as it is yielded.
+        """
+        self._expect("{")
+        if self._peek() == "}":
+            self._position += 1
+            return
+
+        while True:
+            key = self.decode_value()
+            if not isinstance(key, str):
+                raise ValueError(f"Expected a key in JSON document, got {key!r}.")
+            self._expect(":")
+            yield key
+
+            if self._peek() == ",":
+                self._position += 1
+                continue
+            self._expect("}")
+            return
+
+    def decode_value(self) -> Any:
+        """
+        Decode the value at the current position, once it is complete in the buffer.
+        """
+        self._scan_value()
+        value, self._position = _DECODER.raw_decode(self._buffer, self._position)
+        return value
+
+    def _scan_value(self) -> None:
+        """
+        Read chunks until the value at the current position is complete in the buffer.
+
+        Each chunk is scanned once, resuming where the previous one stopped, and the
+        chunks are only joined to the buffer once the value is complete.
+        """
+        first_character = self._peek()
+        if not first_character:
+            return
+
+        scanner = _ValueScanner(first_character)
+        if scanner.scan(self._buffer, self._position + 1):
+            return
+
+        chunks = [self._buffer[self._position :]]
+        while chunk := self._file.read(self._chunk_size):
+            chunks.append(chunk)
+            if scanner.scan(chunk, 0):
+                break
+        else:
+            self._at_end = True
+        self._buffer = "".join(chunks)
+        self._position = 0
+
+    def _peek(self) -> str:
+        """
+        Skip whitespace and return the next character, or an empty string at the end of
+        the document.
+        """
+        while True:
+            while (
+                self._position < len(self._buffer)
+                and self._buffer[self._position] in _WHITESPACE
+            ):
+                self._position += 1
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if not self._fill():
+                return ""
+
+    def _expect(self, character: str) -> None:
+        if (next_character := self._peek()) != character:
+            found = repr(next_character) if next_character else "the end"
+            raise ValueError(f"Expected {character!r} in JSON document, got {found}.")
+        self._position += 1
+
+    def _fill(self) -> bool:
+        """
+        Read the next chunk of the document, dropping the consumed part of the buffer,
+        and return whether anything was read.
+        """
+        if self._at_end:
+            return False
+
+        chunk = self._file.read(self._chunk_size)
+        self._buffer = self._buffer[self._position :] + chunk
+        self._position = 0
+        if not chunk:
+            self._at_end = True
+        return bool(chunk)
+
+
+class _ValueScanner:
+    """
+    A scanner for the end of a JSON value, fed the text of the value a chunk at a time.
+    """
+
+    def __init__(self, first_character: str) -> None:
+        self._in_string = first_character == '"'
+        self._depth = 1 if first_character in "[{" else 0
+        self._is_escaped = False
+
+    def scan(self, text: str, position: int) -> bool:
+        """
+        Scan text from a position, and return whether the value ends in it.
+        """
+        if not self._in_string and self._depth == 0:
+            # A bare number or literal may continue in the next chunk, so it is only
+            # complete once followed by a delimiter.
+            return _SCALAR_END.search(text, position) is not None
+
+        if self._is_escaped:
+            position += 1
+            self._is_escaped = False
+        while True:
+            if self._in_string:
+                match = _STRING_SPECIALS.search(text, position)
+                if match is None:
+                    return False
+                if match.group() == "\\":
+                    if match.end() == len(text):
+                        # The escaped character is in the next chunk.
+                        self._is_escaped = True
+                        return False
+                    position = match.end() + 1
+                    continue
+                self._in_string = False
+                if self._depth == 0:
+                    return True
+            else:
+                match = _CONTAINER_SPECIALS.search(text, position)
+                if match is None:
+                    return False
+                if match.group() == '"':
+                    self._in_string = True
+                elif match.group() in "[{":
+                    self._depth += 1
+                else:
+                    self._depth -= 1
+                    if self._depth == 0:
+                        return True
+            position = match.end()
@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TypeVar
+
+from food_manager.cache import ResolutionCache
+from food_manager.schema import (
+    Category,
+    DailyMealPlan,
+    Meal,
+    Nutrient,
+    Ration,
+    WeeklyMealPlan,
+)
+from food_manager.utils import (
+    PriceCalculator,
+    get_category_grams,
+    get_kcal,
+    get_nutrient_grams,
+)
+
+K = TypeVar("K")
+
+EPSILON = 1e-9
+"""
+The magnitude below which a running total is considered to have dropped to zero.
+"""
+
+
+@dataclass(frozen=True)
+class Totals:
+    """
+    Totals of a collection of rations.
+    """
+
+    nutrient_grams: dict[Nutrient, float]
+    """
+    The grams of each nutrient.
+    """
+
+    kcal: float
+    """
+    The kilocalories.
+    """
+
+    cents: float
+    """
+    The unrounded cents of the priced rations.
+    """
+
+    unpriced_ration_count: int
+    """
+    The number of rations that could not be priced.
+    """
+
+    category_grams: dict[Category, float]
+    """
+    The grams of each category.
+    """
+
+    def __add__(self, other: Totals) -> Totals:
+        return Totals(
+            nutrient_grams=_add_grams(self.nutrient_grams, other.nutrient_grams, 1),
+            kcal=self.kcal + other.kcal,
+            cents=self.cents + other.cents,
+            unpriced_ration_count=(
+                self.unpriced_ration_count + other.unpriced_ration_count
+            ),
+            category_grams=_add_grams(self.category_grams, other.category_grams, 1),
+        )
+
+    def __sub__(self, other: Totals) -> Totals:
+        return Totals(
+            nutrient_grams=_add_grams(self.nutrient_grams, other.nutrient_grams, -1),
+            kcal=self.kcal - other.kcal,
+            cents=self.cents - other.cents,
+            unpriced_ration_count=(
+                self.unpriced_ration_count - other.unpriced_ration_count
+            ),
+            category_grams=_add_grams(self.category_grams, other.category_grams, -1),
+        )
+
+
+ZERO_TOTALS = Totals(
+    nutrient_grams={}, kcal=0.0, cents=0.0, unpriced_ration_count=0, category_grams={}
+)
+"""
+The totals of no rations.
+"""
+
+
+class TotalsAccumulator:
+    """
+    A running sum of totals.
+
+    Totals are added and subtracted in place, only updating the nutrients and
+    categories they have, and frozen into immutable totals when read, which are kept
+    until the next update.
+    """
+
+    def __init__(self, totals: Totals = ZERO_TOTALS) -> None:
+        self._nutrient_grams = dict(totals.nutrient_grams)
+        self._kcal = totals.kcal
+        self._cents = totals.cents
+        self._unpriced_ration_count = totals.unpriced_ration_count
+        self._category_grams = dict(totals.category_grams)
+        self._totals: Totals | None = totals
+
+    def add(self, totals: Totals) -> None:
+        self._update(totals, 1)
+
+    def subtract(self, totals: Totals) -> None:
+        self._update(totals, -1)
+
+    def get_totals(self) -> Totals:
+        if self._totals is None:
+            self._totals = Totals(
+                nutrient_grams=dict(self._nutrient_grams),
+                kcal=self._kcal,
+                cents=self._cents,
+                unpriced_ration_count=self._unpriced_ration_count,
+                category_grams=dict(self._category_grams),
+            )
+        return self._totals
+
+    def _update(self, totals: Totals, sign: int) -> None:
+        _update_grams(self._nutrient_grams, totals.nutrient_grams, sign)
+        self._kcal += sign * totals.kcal
+        self._cents += sign * totals.cents
+        self._unpriced_ration_count += sign * totals.unpriced_ration_count
+        _update_grams(self._category_grams, totals.category_grams, sign)
+        self._totals = None
+
+
+class TotalsCalculator:
+    """
+    A calculator of the totals of meal plan entities.
+
+    Totals of meals, daily and weekly meal plans are cached by entity identity, so
+    that the totals of entities built by editor managers can be stored once and looked
+    up in constant time afterwards. The cache is invalidated whenever the prices of
+    the price calculator are updated.
+    """
+
+    def __init__(
+        self,
+        price_calculator: PriceCalculator | None = None,
+        cache: ResolutionCache | None = None,
+    ) -> None:
+        self._price_calculator = price_calculator
+        self._cache = cache if cache is not None else ResolutionCache(max_size=4096)
+        self._price_version = self.get_version()
+
+    def get_version(self) -> int:
+        """
+        Get the version of the prices totals are computed with, so that totals kept
+        elsewhere can tell they are stale.
+        """
+        if self._price_calculator is None:
+            return 0
+        return self._price_calculator.get_version()
+
+    def get_ration_totals(self, ration: Ration) -> Totals:
+        nutrient_grams = get_nutrient_grams(ration)
+        if self._price_calculator is not None:
+            cents = self._price_calculator.get_cents(ration)
+        else:
+            cents = None
+        return Totals(
+            nutrient_grams=nutrient_grams,
+            kcal=get_kcal(nutrient_grams),
+            cents=cents if cents is not None else 0.0,
+            unpriced_ration_count=1 if cents is None else 0,
+            category_grams=get_category_grams(ration),
+        )
+
+    def get_meal_totals(self, meal: Meal) -> Totals:
+        self._check_prices()
+        return self._cache.resolve(self._compute_meal_totals, meal)
+
+    def get_daily_meal_plan_totals(self, daily_meal_plan: DailyMealPlan) -> Totals:
+        self._check_prices()
+        return self._cache.resolve(
+            self._compute_daily_meal_plan_totals, daily_meal_plan
+        )
+
+    def get_weekly_meal_plan_totals(self, weekly_meal_plan: WeeklyMealPlan) -> Totals:
+        self._check_prices()
+        return self._cache.resolve(
+            self._compute_weekly_meal_plan_totals, weekly_meal_plan
+        )
+
+    def store_meal_totals(self, meal: Meal, totals: Totals) -> None:
+        self._check_prices()
+        self._cache.store(self._compute_meal_totals, meal, totals)
+
+    def store_daily_meal_plan_totals(
+        self, daily_meal_plan: DailyMealPlan, totals: Totals
+    ) -> None:
+        self._check_prices()
+        self._cache.store(self._compute_daily_meal_plan_totals, daily_meal_plan, totals)
+
+    def store_weekly_meal_plan_totals(
+        self, weekly_meal_plan: WeeklyMealPlan, totals: Totals
+    ) -> None:
+        self._check_prices()
+        self._cache.store(
+            self._compute_weekly_meal_plan_totals, weekly_meal_plan, totals
+        )
+
+    def _check_prices(self) -> None:
+        """
+        Invalidate the cached totals if prices were updated since they were computed.
+        """
+        if (price_version := self.get_version()) != self._price_version:
+            self._cache.invalidate()
+            self._price_version = price_version
+
+    def _compute_meal_totals(self, meal: Meal) -> Totals:
+        totals = TotalsAccumulator()
+        for ration in meal.rations:
+            totals.add(self.get_ration_totals(ration))
+        return totals.get_totals()
+
+    def _compute_daily_meal_plan_totals(self, daily_meal_plan: DailyMealPlan) -> Totals:
+        totals = TotalsAccumulator()
+        for meal in daily_meal_plan.meals.values():
+            totals.add(self.get_meal_totals(meal))
+        return totals.get_totals()
+
+    def _compute_weekly_meal_plan_totals(
+        self, weekly_meal_plan: WeeklyMealPlan
+    ) -> Totals:
+        totals = TotalsAccumulator()
+        for daily_meal_plan in weekly_meal_plan.dailies.values():
+            totals.add(self.get_daily_meal_plan_totals(daily_meal_plan))
+        return totals.get_totals()
+
+
+# --------------------------------------------------------------------------------------
+
+
+def _add_grams(
+    grams: dict[K, float], other_grams: dict[K, float], sign: int
+) -> dict[K, float]:
+    result = dict(grams)
+    _update_grams(result, other_grams, sign)
+    return result
+
+
+def _update_grams(
+    grams: dict[K, float], other_grams: dict[K, float], sign: int
+) -> None:
+    for key, other in other_grams.items():
+        total = grams.get(key, 0.0) + sign * other
+        if abs(total) < EPSILON:
+            grams.pop(key, None)
+        else:
+            grams[key] = total
@@ -1,23 +1,37 @@
 from __future__ import annotations
 
 from collections import defaultdict
+from collections.abc import Callable, Iterable, Iterator
 from dataclasses import dataclass
+from typing import Any, cast
 
 from balloons import NamedBalloon
+
+from food_manager.cache import RESOLUTION_CACHE
+from food_manager.hashing import get_content_hash
+from food_manager.index import DependencyIndex, WorldIndex
+from food_manager.nutrients import KCAL_PER_GRAM, NutrientProfile
+from food_manager.profiling import PROFILER
 from food_manager.schema import (
-    DehydratedSubstance,
+    Category,
     CompositeSubstance,
-    Ration,
+    DehydratedSubstance,
     Money,
     Nutrient,
     Product,
+    Ration,
     RationProduct,
-    SubstanceProduct,
-    Substance,
-    Category,
     SimpleSubstance,
+    Substance,
+    SubstanceProduct,
 )
 
+RESOLVED_VALUES_PER_SUBSTANCE = 4
+"""
+The number of values cached per substance by its resolvers: leaf weights, nutrient
+profile, nutrient ratios and category proportions.
+"""
+
 
 @dataclass(frozen=True)
 class MacroGrams:
@@ -41,70 +55,238 @@ class MacroGrams:
     """
 
 
-def get_nutrient_ratios(substance: Substance) -> dict[Nutrient, float]:
-    if isinstance(substance, SimpleSubstance):
-        return substance.nutrient_ratios
+LeafWeights = tuple[tuple[Substance, float], ...]
+"""
+A sparse mapping from leaf substances to their weight per gram of a substance.
+"""
+
+
+def get_children(substance: Substance) -> tuple[Substance, ...]:
+    """
+    Get the substances a substance is directly made of.
+    """
+    if isinstance(substance, CompositeSubstance):
+        return tuple(c.substance for c in substance.components)
+    if isinstance(substance, DehydratedSubstance):
+        return (substance.original_substance,)
+    return ()
+
+
+def sort_substances(
+    substances: Iterable[Substance],
+    get_children: Callable[[Substance], tuple[Substance, ...]] = get_children,
+    is_resolved: Callable[[Substance], bool] = lambda _: False,
+) -> list[Substance]:
+    """
+    Sort the substances reachable from the given ones so that every substance comes
+    after the substances it is made of.
+
+    Resolved substances are left out, along with the substances only reachable through
+    them. Raises a `ValueError` naming the substances of a cycle, if any.
+    """
+    order: list[Substance] = []
+    sorted_ids: set[int] = set()
+    path: list[tuple[Substance, Iterator[Substance]]] = []
+    path_indices: dict[int, int] = {}
+
+    for root in substances:
+        if id(root) in sorted_ids or is_resolved(root):
+            continue
+
+        path_indices[id(root)] = 0
+        path.append((root, iter(get_children(root))))
+        while path:
+            substance, children = path[-1]
+            for child in children:
+                if (path_index := path_indices.get(id(child))) is not None:
+                    cycle = [s for s, _ in path[path_index:]] + [child]
+                    raise ValueError(
+                        "Substances form a cycle: "
+                        + " -> ".join(_describe_substance(s) for s in cycle)
+                    )
+                if id(child) not in sorted_ids and not is_resolved(child):
+                    path_indices[id(child)] = len(path)
+                    path.append((child, iter(get_children(child))))
+                    break
+            else:
+                path.pop()
+                del path_indices[id(substance)]
+                sorted_ids.add(id(substance))
+                order.append(substance)
+
+    return order
+
+
+def compile_substance(
+    substance: Substance, compile_child: Callable[[Substance], LeafWeights]
+) -> LeafWeights:
+    """
+    Compile a non-leaf substance into the leaf weights of its children, as compiled by
+    the given function.
+    """
     if isinstance(substance, CompositeSubstance):
-        nutrient_ratios: dict[Nutrient, float] = defaultdict(float)
-        total_proportion = 0.0
+        total_proportion = sum(c.proportion for c in substance.components)
+        weights: dict[int, tuple[Substance, float]] = {}
         for component in substance.components:
-            component_nutrient_ratios = get_nutrient_ratios(component.substance)
-            for nutrient, ratio in component_nutrient_ratios.items():
-                nutrient_ratios[nutrient] += ratio * component.proportion
-            total_proportion += component.proportion
-        nutrient_ratios = {n: r / total_proportion for n, r in nutrient_ratios.items()}
-        return nutrient_ratios
+            factor = component.proportion / total_proportion
+            for leaf, weight in compile_child(component.substance):
+                if (entry := weights.get(id(leaf))) is not None:
+                    weights[id(leaf)] = (leaf, entry[1] + weight * factor)
+                else:
+                    weights[id(leaf)] = (leaf, weight * factor)
+        return tuple(weights.values())
     if isinstance(substance, DehydratedSubstance):
-        original_nutrient_ratios = get_nutrient_ratios(substance.original_substance)
-        return {
-            nutrient: original_ratio / substance.dehydration_ratio
-            for nutrient, original_ratio in original_nutrient_ratios.items()
-        }
+        factor = 1 / substance.dehydration_ratio
+        return tuple(
+            (leaf, weight * factor)
+            for leaf, weight in compile_child(substance.original_substance)
+        )
     raise ValueError(f"Unknown substance type: {substance}")
 
 
-def get_nutrient_grams(ration: Ration) -> dict[Nutrient, float]:
-    nutrient_ratios = get_nutrient_ratios(ration.substance)
-    return {nutrient: ration.grams * ratio for nutrient, ratio in nutrient_ratios.items()}
+def compile_substances(substances: Iterable[Substance]) -> None:
+    """
+    Compile substances and the substances they are made of in a single bottom-up
+    sweep, resolving their leaf weights, nutrient profiles and category proportions.
 
+    The resolution cache is grown to hold the values of every compiled substance, so
+    that compiling a whole world does not evict the values it compiled first.
+    """
+    order = _sort_uncompiled_substances(substances)
+    RESOLUTION_CACHE.reserve(len(order) * RESOLVED_VALUES_PER_SUBSTANCE)
+    for substance in order:
+        RESOLUTION_CACHE.store(
+            _resolve_leaf_weights, substance, _compile_leaf_weights(substance)
+        )
+        get_nutrient_profile(substance)
+        get_category_proportions(substance)
 
-def get_kcal(nutrient_grams: dict[Nutrient, float]) -> float:
-    return (
-        4 * nutrient_grams.get(Nutrient.CARB, 0.0)
-        + 9 * nutrient_grams.get(Nutrient.FAT, 0.0)
-        + 4 * nutrient_grams.get(Nutrient.PROTEIN, 0.0)
-        + 7 * nutrient_grams.get(Nutrient.ETHANOL, 0.0)
+
+def get_leaf_weights(
+    substance: Substance,
+) -> tuple[tuple[SimpleSubstance, float], ...]:
+    return RESOLUTION_CACHE.resolve(_resolve_leaf_weights, substance)
+
+
+def _resolve_leaf_weights(
+    substance: Substance,
+) -> tuple[tuple[SimpleSubstance, float], ...]:
+    *dependencies, _ = _sort_uncompiled_substances((substance,))
+    for dependency in dependencies:
+        RESOLUTION_CACHE.store(
+            _resolve_leaf_weights, dependency, _compile_leaf_weights(dependency)
+        )
+    return _compile_leaf_weights(substance)
+
+
+def _compile_leaf_weights(
+    substance: Substance,
+) -> tuple[tuple[SimpleSubstance, float], ...]:
+    if isinstance(substance, SimpleSubstance):
+        return ((substance, 1.0),)
+    return cast(
+        tuple[tuple[SimpleSubstance, float], ...],
+        compile_substance(substance, get_leaf_weights),
+    )
+
+
+def _sort_uncompiled_substances(substances: Iterable[Substance]) -> list[Substance]:
+    order = sort_substances(
+        substances,
+        is_resolved=lambda s: RESOLUTION_CACHE.contains(_resolve_leaf_weights, s),
     )
+    if PROFILER.enabled:
+        PROFILER.count("substance.compile.visits", len(order))
+    return order
+
+
+def _describe_substance(substance: Substance) -> str:
+    if isinstance(substance, NamedBalloon):
+        return substance.name
+    return type(substance).__name__
 
 
 # --------------------------------------------------------------------------------------
 
 
-def get_category_proportions(substance: Substance) -> dict[Category, float]:
+def get_nutrient_profile(substance: Substance) -> NutrientProfile:
+    return RESOLUTION_CACHE.resolve(_resolve_nutrient_profile, substance)
+
+
+def _resolve_nutrient_profile(substance: Substance) -> NutrientProfile:
+    *dependencies, _ = sort_substances(
+        (substance,),
+        is_resolved=lambda s: RESOLUTION_CACHE.contains(_resolve_nutrient_profile, s),
+    )
+    for dependency in dependencies:
+        RESOLUTION_CACHE.store(
+            _resolve_nutrient_profile, dependency, _compile_nutrient_profile(dependency)
+        )
+    return _compile_nutrient_profile(substance)
+
+
+def _compile_nutrient_profile(substance: Substance) -> NutrientProfile:
+    """
+    Compile the nutrient profile of a substance from the profiles of the substances it
+    is directly made of, which are combined in a single product.
+    """
     if isinstance(substance, SimpleSubstance):
-        return {substance.category: 1.0}
+        return NutrientProfile.create(substance.nutrient_ratios)
     if isinstance(substance, CompositeSubstance):
-        proportions: dict[Category, float] = {}
-        total_proportion = 0.0
-        for component in substance.components:
-            component_proportions = get_category_proportions(component.substance)
-            for category, proportion in component_proportions.items():
-                proportions[category] = (
-                    proportions.get(category, 0.0) + proportion * component.proportion
-                )
-            total_proportion += component.proportion
-        for category in proportions:
-            proportions[category] /= total_proportion
-        return proportions
+        total_proportion = sum(c.proportion for c in substance.components)
+        return NutrientProfile.combine(
+            [get_nutrient_profile(c.substance) for c in substance.components],
+            [c.proportion / total_proportion for c in substance.components],
+        )
     if isinstance(substance, DehydratedSubstance):
-        original_proportions = get_category_proportions(substance.original_substance)
-        return {
-            category: proportion / substance.dehydration_ratio
-            for category, proportion in original_proportions.items()
-        }
+        return get_nutrient_profile(substance.original_substance).scale(
+            1 / substance.dehydration_ratio
+        )
     raise ValueError(f"Unknown substance type: {substance}")
 
 
+def get_nutrient_ratios(substance: Substance) -> dict[Nutrient, float]:
+    if isinstance(substance, SimpleSubstance):
+        return substance.nutrient_ratios
+    return RESOLUTION_CACHE.resolve(_resolve_nutrient_ratios, substance)
+
+
+def _resolve_nutrient_ratios(substance: Substance) -> dict[Nutrient, float]:
+    return get_nutrient_profile(substance).to_dict()
+
+
+def get_nutrient_grams(ration: Ration) -> dict[Nutrient, float]:
+    nutrient_ratios = get_nutrient_ratios(ration.substance)
+    return {
+        nutrient: ration.grams * ratio for nutrient, ratio in nutrient_ratios.items()
+    }
+
+
+def get_kcal(nutrient_grams: dict[Nutrient, float]) -> float:
+    return sum(
+        kcal * nutrient_grams.get(nutrient, 0.0)
+        for nutrient, kcal in KCAL_PER_GRAM.items()
+    )
+
+
+# --------------------------------------------------------------------------------------
+
+
+def get_category_proportions(substance: Substance) -> dict[Category, float]:
+    return RESOLUTION_CACHE.resolve(_resolve_category_proportions, substance)
+
+
+def _resolve_category_proportions(substance: Substance) -> dict[Category, float]:
+    leaf_weights = get_leaf_weights(substance)
+    if PROFILER.enabled:
+        PROFILER.count("substance.category_proportions.leaf_visits", len(leaf_weights))
+
+    proportions: dict[Category, float] = defaultdict(float)
+    for leaf, weight in leaf_weights:
+        proportions[leaf.category] += weight
+    return dict(proportions)
+
+
 def get_category_grams(ration: Ration) -> dict[Category, float]:
     category_proportions = get_category_proportions(ration.substance)
     return {
@@ -116,92 +298,385 @@ def get_category_grams(ration: Ration) -> dict[Category, float]:
 # --------------------------------------------------------------------------------------
 
 
-def sum_money(*money: Money) -> Money:
-    unit_sum = sum(m.units for m in money)
-    cent_sum = sum(m.cents for m in money)
-    units = unit_sum + cent_sum // 100
-    cents = cent_sum % 100
-    return Money(units=units, cents=cents)
+def to_cents(money: Money) -> int:
+    return money.units * 100 + money.cents
 
 
-def multiply(money: Money, factor: float) -> Money:
-    original_total_cents = money.units * 100 + money.cents
-    total_cents = round(original_total_cents * factor)
+def from_cents(cents: float) -> Money:
+    total_cents = round(cents)
     units = total_cents // 100
     cents = total_cents % 100
     return Money(units=units, cents=cents)
 
 
+def sum_money(*money: Money) -> Money:
+    return from_cents(sum(to_cents(m) for m in money))
+
+
+def multiply(money: Money, factor: float) -> Money:
+    return from_cents(to_cents(money) * factor)
+
+
 class PriceCalculator:
+    """
+    A calculator of ration prices.
+
+    Prices are computed in unrounded cents and memoized per substance, and only
+    rounded when converted to money. If category prices or a world index are given,
+    substances without a product of their own are priced at the average kilogram
+    price of the substance products of their category instead of going unpriced, and
+    their prices are flagged as estimated. Categories are only looked up in the world
+    index once a substance of theirs needs their average.
+
+    Prices can be updated in place, which only invalidates the memoized prices of the
+    substances made from the updated ones.
+    """
 
     def __init__(
         self,
-        ration_prices: dict[NamedBalloon, Money],
-        substance_kg_prices: dict[NamedBalloon, Money],
+        ration_cents: dict[NamedBalloon, int],
+        substance_kg_cents: dict[NamedBalloon, float],
+        category_kg_cents: dict[Category, dict[Any, float]] | None = None,
+        world_index: WorldIndex | None = None,
     ) -> None:
-        self._ration_prices = ration_prices
-        self._substance_kg_prices = substance_kg_prices
+        """
+        `category_kg_cents` maps each category to the kilogram cents of its substance
+        products, keyed by their named substance, or by the content hash of anonymous
+        ones. Categories missing from it are looked up in `world_index`, if given.
+        """
+        if category_kg_cents is None and world_index is not None:
+            category_kg_cents = {}
+        self._ration_cents = ration_cents
+        self._substance_kg_cents = substance_kg_cents
+        self._category_kg_cents = category_kg_cents
+        self._world_index = world_index
+        self._category_kg_cents_totals = {
+            category: (sum(kg_cents.values()), len(kg_cents))
+            for category, kg_cents in (category_kg_cents or {}).items()
+        }
+        self._leaf_weights: dict[int, tuple[Substance, LeafWeights]] = {}
+        self._kg_cents: dict[int, tuple[Substance, float | None, bool]] = {}
+        self._dependency_index = DependencyIndex()
+        self._category_dependents: dict[Category, dict[int, Substance]] = defaultdict(
+            dict
+        )
+        self._version = 0
 
     def get_price(self, ration: Ration) -> Money | None:
-        if isinstance(ration, NamedBalloon):
-            if (price := self._ration_prices.get(ration)) is not None:
-                return price
+        if (cents := self.get_cents(ration)) is None:
+            return None
+        return from_cents(cents)
 
-        if (kg_price := self.get_kg_price(ration.substance)) is not None:
-            kg = ration.grams / 1000
-            price = multiply(kg_price, kg)
-            return price
+    def get_kg_price(self, substance: Substance) -> Money | None:
+        if (kg_cents := self.get_kg_cents(substance)) is None:
+            return None
+        return from_cents(kg_cents)
+
+    def get_cents(self, ration: Ration) -> float | None:
+        if PROFILER.enabled:
+            PROFILER.count("price.lookups")
+
+        if (
+            isinstance(ration, NamedBalloon)
+            and (cents := self._ration_cents.get(ration)) is not None
+        ):
+            return cents
+
+        if (kg_cents := self.get_kg_cents(ration.substance)) is not None:
+            return kg_cents * ration.grams / 1000
 
         return None
 
-    def get_kg_price(self, substance: Substance) -> Money | None:
-        if isinstance(substance, NamedBalloon):
-            if (kg_price := self._substance_kg_prices.get(substance)) is not None:
-                return kg_price
-
-        if isinstance(substance, CompositeSubstance):
-            total_kg_price = Money(0, 0)
-            total_proportion = 0.0
-            for component in substance.components:
-                if (kg_price := self.get_kg_price(component.substance)) is None:
-                    return None
-                proportional_kg_price = multiply(kg_price, component.proportion)
-                total_kg_price = sum_money(total_kg_price, proportional_kg_price)
-                total_proportion += component.proportion
-            total_kg_price = multiply(total_kg_price, 1 / total_proportion)
-            return total_kg_price
-
-        if isinstance(substance, DehydratedSubstance):
-            if (original_kg_price := self.get_kg_price(substance.original_substance)) is None:
-                return None
-            kg_price = multiply(original_kg_price, 1 / substance.dehydration_ratio)
-            return kg_price
-
-        if isinstance(substance, SimpleSubstance):
-            return None
+    def get_kg_cents(self, substance: Substance) -> float | None:
+        return self._get_kg_cents_entry(substance)[1]
+
+    def is_estimated(self, ration: Ration) -> bool:
+        """
+        Whether the price of a ration relies on the average price of a category.
+        """
+        if isinstance(ration, NamedBalloon) and ration in self._ration_cents:
+            return False
+        return self.is_kg_price_estimated(ration.substance)
+
+    def is_kg_price_estimated(self, substance: Substance) -> bool:
+        """
+        Whether the kilogram price of a substance relies on the average price of a
+        category.
+        """
+        return self._get_kg_cents_entry(substance)[2]
+
+    def get_version(self) -> int:
+        """
+        Get the number of price updates so far, so that prices derived from this
+        calculator can tell they are stale.
+        """
+        return self._version
+
+    def update_substance_kg_price(
+        self, substance: NamedBalloon, kg_price: Money
+    ) -> None:
+        """
+        Set the kilogram price of a substance, as sold by a substance product.
+        """
+        kg_cents = to_cents(kg_price)
+        self._set_category_kg_cents(cast(Substance, substance), substance, kg_cents)
+        self._set_substance_kg_cents(substance, kg_cents)
+
+    def update_ration_price(self, ration: Ration, price: Money) -> None:
+        """
+        Set the price of a named ration, which also prices its substance if named.
+        """
+        if not isinstance(ration, NamedBalloon):
+            raise ValueError(f"Cannot price an unnamed ration: {ration}")
+
+        self._ration_cents[ration] = to_cents(price)
+        self._version += 1
+        if isinstance(ration.substance, NamedBalloon):
+            kgs = ration.grams / 1000
+            self._set_substance_kg_cents(ration.substance, to_cents(price) / kgs)
+
+    def update_product(self, product: Product) -> None:
+        """
+        Set the prices of the items of a product, as `create` would have.
+        """
+        if isinstance(product, RationProduct):
+            if isinstance(product.item, NamedBalloon):
+                self.update_ration_price(product.item, product.price)
+            elif isinstance(product.item.substance, NamedBalloon):
+                kgs = product.item.grams / 1000
+                self._set_substance_kg_cents(
+                    product.item.substance, to_cents(product.price) / kgs
+                )
+        elif isinstance(product, SubstanceProduct):
+            if isinstance(product.item, NamedBalloon):
+                self.update_substance_kg_price(product.item, product.kg_price)
+            else:
+                self._set_category_kg_cents(
+                    product.item,
+                    _get_category_key(product.item),
+                    to_cents(product.kg_price),
+                )
+                self._invalidate(
+                    self._category_dependents.pop(product.item.category, {}).values(),
+                    False,
+                )
+        else:
+            raise ValueError(f"Unknown product type: {product}")
+
+    def _set_category_kg_cents(
+        self, substance: Substance, key: Any, kg_cents: float
+    ) -> None:
+        """
+        Set the kilogram cents of a substance product in the average of the category
+        of its substance, if simple.
+        """
+        if self._category_kg_cents is None or not isinstance(
+            substance, SimpleSubstance
+        ):
+            return
+
+        category = substance.category
+        self._load_category_kg_cents(category)
+
+        category_kg_cents = self._category_kg_cents.setdefault(category, {})
+        old_kg_cents = category_kg_cents.get(key)
+        category_kg_cents[key] = kg_cents
+        total, count = self._category_kg_cents_totals.get(category, (0.0, 0))
+        if old_kg_cents is None:
+            self._category_kg_cents_totals[category] = (total + kg_cents, count + 1)
+        else:
+            self._category_kg_cents_totals[category] = (
+                total + kg_cents - old_kg_cents,
+                count,
+            )
+
+    def _set_substance_kg_cents(self, substance: NamedBalloon, kg_cents: float) -> None:
+        """
+        Set the kilogram cents of a substance, invalidating the memoized prices of the
+        substances made from it and, through the average of its category, of those
+        made from unpriced substances of the same category.
+        """
+        old_kg_cents = self._substance_kg_cents.get(substance)
+        self._substance_kg_cents[substance] = kg_cents
+
+        # A newly priced substance becomes a leaf of the substances made from it.
+        invalidate_leaf_weights = old_kg_cents is None
+        invalidated = [substance, *self._dependency_index.get_where_used(substance)]
+        # Substances priced through the category average record themselves, since
+        # their leaf weights are flattened.
+        category = cast(Substance, substance).category
+        invalidated.extend(self._category_dependents.pop(category, {}).values())
+        self._invalidate(invalidated, invalidate_leaf_weights)
+
+    def _invalidate(
+        self, substances: Iterable[Substance], invalidate_leaf_weights: bool
+    ) -> None:
+        """
+        Invalidate the memoized prices of substances after a price update.
+        """
+        invalidated_count = 0
+        for substance in substances:
+            self._kg_cents.pop(id(substance), None)
+            if invalidate_leaf_weights:
+                self._leaf_weights.pop(id(substance), None)
+            invalidated_count += 1
+        self._version += 1
+        if PROFILER.enabled:
+            PROFILER.count("price.invalidations", invalidated_count)
+
+    def _get_kg_cents_entry(
+        self, substance: Substance
+    ) -> tuple[Substance, float | None, bool]:
+        if (entry := self._kg_cents.get(id(substance))) is not None:
+            if PROFILER.enabled:
+                PROFILER.count("price.kg_cents.hits")
+            return entry
+
+        if PROFILER.enabled:
+            PROFILER.count("price.kg_cents.misses")
+        entry = (substance, *self._compute_kg_cents(substance))
+        self._kg_cents[id(substance)] = entry
+        return entry
+
+    def _compute_kg_cents(self, substance: Substance) -> tuple[float | None, bool]:
+        """
+        Compute the kilogram cents of a substance, and whether they are estimated.
+        """
+        kg_cents = 0.0
+        is_estimated = False
+        for leaf, weight in self._get_leaf_weights(substance):
+            if (
+                isinstance(leaf, NamedBalloon)
+                and (leaf_kg_cents := self._substance_kg_cents.get(leaf)) is not None
+            ):
+                kg_cents += leaf_kg_cents * weight
+            elif (
+                leaf_kg_cents := self._get_category_kg_cents(leaf, substance)
+            ) is not None:
+                kg_cents += leaf_kg_cents * weight
+                is_estimated = True
+            else:
+                return None, False
+        return kg_cents, is_estimated
 
-        raise ValueError(f"Unknown substance type: {substance}")
+    def _get_category_kg_cents(
+        self, leaf: Substance, substance: Substance
+    ) -> float | None:
+        if self._category_kg_cents is None:
+            return None
 
+        if PROFILER.enabled:
+            PROFILER.count("price.category_fallbacks")
+        self._category_dependents[leaf.category][id(substance)] = substance
+        self._load_category_kg_cents(leaf.category)
+        if (totals := self._category_kg_cents_totals.get(leaf.category)) is None:
+            return None
+        total, count = totals
+        return total / count
+
+    def _load_category_kg_cents(self, category: Category) -> None:
+        """
+        Load the kilogram cents of the substance products of a category from the world
+        index, if not loaded yet.
+        """
+        if (
+            self._world_index is None
+            or self._category_kg_cents is None
+            or category in self._category_kg_cents
+        ):
+            return
+
+        # Only products of simple substances count, as those are what an unpriced
+        # leaf stands for, unlike composites spanning categories or rations priced
+        # per portion. Each substance counts once, so that updates can replace its
+        # price.
+        category_kg_cents: dict[Any, float] = {
+            _get_category_key(p.item): to_cents(p.kg_price)
+            for p in self._world_index.get_category_products(category)
+            if isinstance(p, SubstanceProduct) and isinstance(p.item, SimpleSubstance)
+        }
+        self._category_kg_cents[category] = category_kg_cents
+        if len(category_kg_cents) > 0:
+            self._category_kg_cents_totals[category] = (
+                sum(category_kg_cents.values()),
+                len(category_kg_cents),
+            )
+
+    def _get_leaf_weights(self, substance: Substance) -> LeafWeights:
+        """
+        Compile a substance down to the priced or simple substances it is made of.
+        """
+        if (entry := self._leaf_weights.get(id(substance))) is not None:
+            return entry[1]
+
+        order = sort_substances(
+            (substance,),
+            get_children=self._get_children,
+            is_resolved=lambda s: id(s) in self._leaf_weights,
+        )
+        if PROFILER.enabled:
+            PROFILER.count("price.compile.visits", len(order))
+        for dependency in order:
+            self._compile_leaf_weights(dependency)
+        return self._leaf_weights[id(substance)][1]
+
+    def _get_children(self, substance: Substance) -> tuple[Substance, ...]:
+        if self._is_leaf(substance):
+            return ()
+        return get_children(substance)
+
+    def _is_leaf(self, substance: Substance) -> bool:
+        return (
+            isinstance(substance, NamedBalloon)
+            and substance in self._substance_kg_cents
+        ) or isinstance(substance, SimpleSubstance)
+
+    def _compile_leaf_weights(self, substance: Substance) -> None:
+        if self._is_leaf(substance):
+            leaf_weights: LeafWeights = ((substance, 1.0),)
+        else:
+            leaf_weights = compile_substance(substance, self._get_leaf_weights)
+        self._leaf_weights[id(substance)] = (substance, leaf_weights)
+        self._dependency_index.add(substance)
 
     @staticmethod
-    def create(products: list[Product]) -> PriceCalculator:
-        ration_prices: dict[NamedBalloon, Money] = {}
-        substance_kg_prices: dict[NamedBalloon, Money] = {}
+    def create(
+        products: list[Product], world_index: WorldIndex | None = None
+    ) -> PriceCalculator:
+        """
+        Create a price calculator from products. If a world index is given,
+        substances without a product of their own fall back to the average kilogram
+        price of the substance products of their category in the index.
+        """
+        ration_cents: dict[NamedBalloon, int] = {}
+        substance_kg_cents: dict[NamedBalloon, float] = {}
 
         for product in products:
             if isinstance(product, RationProduct):
                 if isinstance(product.item, NamedBalloon):
-                    ration_prices[product.item] = product.price
+                    ration_cents[product.item] = to_cents(product.price)
                 if isinstance(product.item.substance, NamedBalloon):
                     kgs = product.item.grams / 1000
-                    kg_price = multiply(product.price, 1 / kgs)
-                    substance_kg_prices[product.item.substance] = kg_price
+                    kg_cents = to_cents(product.price) / kgs
+                    substance_kg_cents[product.item.substance] = kg_cents
             elif isinstance(product, SubstanceProduct):
                 if isinstance(product.item, NamedBalloon):
-                    substance_kg_prices[product.item] = product.kg_price
+                    substance_kg_cents[product.item] = to_cents(product.kg_price)
             else:
                 raise ValueError(f"Unknown product type: {product}")
 
         return PriceCalculator(
-            ration_prices=ration_prices, substance_kg_prices=substance_kg_prices
+            ration_cents=ration_cents,
+            substance_kg_cents=substance_kg_cents,
+            world_index=world_index,
         )
+
+
+def _get_category_key(substance: Substance) -> Any:
+    """
+    Get the key of a substance in the kilogram cents of its category, which is the
+    same for equal substances of other instances.
+    """
+    if isinstance(substance, NamedBalloon):
+        return substance
+    return get_content_hash(substance)
@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import json
+from bisect import bisect_right
+from collections import defaultdict
+from pathlib import Path
+
+from balloons import ClosedBalloonWorld
+
+from food_manager.content_store import (
+    CONTENT_STORE_VERSION,
+    ContentStore,
+    ContentWorld,
+    NameTable,
+)
+from food_manager.hashing import ContentHash
+from food_manager.path import CONTENT_STORE_PATH
+from food_manager.schema import WeeklyMealPlan
+from food_manager.store import NAMESPACE_TYPES
+
+WORLD_VERSIONS_FILE_NAME = "world-versions.json"
+
+
+class WorldVersions:
+    """
+    The versions of the named balloons of a world, kept in the content store at a
+    path.
+
+    A version only records the balloons added, changed or removed since the previous
+    one, and shares every other balloon with it. Stored balloons refer to named
+    balloons by name, so the balloons using an edited balloon see the edit in the
+    versions after it without being copied, while earlier versions still see the
+    balloon as it was. The hash of a balloon at a version is found by bisecting the
+    versions in which it changed.
+    """
+
+    def __init__(self, path: Path = CONTENT_STORE_PATH) -> None:
+        self._content_store = ContentStore(path)
+        self._path = path / WORLD_VERSIONS_FILE_NAME
+        self._changes: list[dict[str, dict[str, str | None]]] = []
+        self._versions: dict[tuple[str, str], list[int]] = {}
+        self._hashes: dict[tuple[str, str], list[ContentHash | None]] = {}
+        self._namespace_names: dict[str, set[str]] = defaultdict(set)
+
+        if self._path.is_file():
+            data = json.loads(self._path.read_text())
+            if data["version"] != CONTENT_STORE_VERSION:
+                raise ValueError(
+                    f"World versions have version {data['version']}, "
+                    f"expected {CONTENT_STORE_VERSION}; archive them again."
+                )
+            for changes in data["changes"]:
+                self._apply(changes)
+
+    def get_content_store(self) -> ContentStore:
+        return self._content_store
+
+    def get_version_count(self) -> int:
+        return len(self._changes)
+
+    def get_hash(self, namespace: str, name: str, version: int) -> ContentHash | None:
+        """
+        Get the hash of a named balloon at a version, or `None` if it did not exist.
+        """
+        if not 0 <= version < len(self._changes):
+            raise ValueError(f"No world version {version}.")
+        if (versions := self._versions.get((namespace, name))) is None:
+            return None
+        index = bisect_right(versions, version) - 1
+        return self._hashes[(namespace, name)][index] if index >= 0 else None
+
+    def get_names(self, namespace: str, version: int) -> list[str]:
+        """
+        Get the sorted names of the balloons of a namespace at a version.
+        """
+        return sorted(
+            name
+            for name in self._namespace_names.get(namespace, ())
+            if self.get_hash(namespace, name, version) is not None
+        )
+
+    def commit(self, world: ClosedBalloonWorld) -> int:
+        """
+        Store the named balloons of a world, record them as a new version unless they
+        are the same as in the latest version, and get the version of the world.
+        """
+        latest_version = len(self._changes) - 1
+        changes: dict[str, dict[str, str | None]] = defaultdict(dict)
+        for namespace_type in NAMESPACE_TYPES:
+            namespace = namespace_type.__name__
+            provider = world.get_provider(namespace_type)
+            names = provider.get_names()
+            for name in names:
+                content_hash = self._content_store.put(provider.get(name))
+                if (
+                    latest_version < 0
+                    or self.get_hash(namespace, name, latest_version) != content_hash
+                ):
+                    changes[namespace][name] = content_hash.hex()
+            for name in self._namespace_names.get(namespace, set()) - set(names):
+                if self.get_hash(namespace, name, latest_version) is not None:
+                    changes[namespace][name] = None
+
+        if latest_version >= 0 and not changes:
+            return latest_version
+
+        self._apply(dict(changes))
+        self._save()
+        return latest_version + 1
+
+    def at(self, version: int) -> ContentWorld:
+        """
+        Get the world as it was at a version, loading its balloons on first access.
+        """
+        if not 0 <= version < len(self._changes):
+            raise ValueError(f"No world version {version}.")
+        return ContentWorld(self._content_store, _WorldVersionNameTable(self, version))
+
+    def _apply(self, changes: dict[str, dict[str, str | None]]) -> None:
+        version = len(self._changes)
+        self._changes.append(changes)
+        for namespace, hashes in changes.items():
+            for name, hex_hash in hashes.items():
+                key = (namespace, name)
+                self._versions.setdefault(key, []).append(version)
+                self._hashes.setdefault(key, []).append(
+                    bytes.fromhex(hex_hash) if hex_hash is not None else None
+                )
+                self._namespace_names[namespace].add(name)
+
+    def _save(self) -> None:
+        data = {"version": CONTENT_STORE_VERSION, "changes": self._changes}
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = self._path.with_suffix(".tmp")
+        temporary_path.write_text(json.dumps(data) + "\n")
+        temporary_path.replace(self._path)
+
+
+def archive_weekly_meal_plan(
+    world: ClosedBalloonWorld,
+    weekly_meal_plan: WeeklyMealPlan,
+    manifest_path: Path,
+    world_versions: WorldVersions,
+    fingerprint: str | None = None,
+) -> int:
+    """
+    Store a weekly meal plan inflated in a world, and write a manifest pinning it to
+    the version of the world, which is committed unless unchanged. Get the version.
+
+    The fingerprint of the files the meal plan was inflated from is recorded, so that
+    the manifest can be told apart from one archived before they were edited.
+    """
+    world_version = world_versions.commit(world)
+    manifest = {
+        "version": CONTENT_STORE_VERSION,
+        "world_version": world_version,
+        "weekly_meal_plan": (
+            world_versions.get_content_store().put(weekly_meal_plan).hex()
+        ),
+        "fingerprint": fingerprint,
+    }
+    temporary_path = manifest_path.with_suffix(".tmp")
+    temporary_path.write_text(json.dumps(manifest, indent=2) + "\n")
+    temporary_path.replace(manifest_path)
+    return world_version
+
+
+def is_valid_manifest(
+    manifest_path: Path, world_versions: WorldVersions, fingerprint: str | None = None
+) -> bool:
+    """
+    Check whether a manifest pins a stored weekly meal plan to a version of the world
+    versions, in the current format, and was archived from files with the given
+    fingerprint, if any.
+    """
+    try:
+        manifest = json.loads(manifest_path.read_text())
+        return bool(
+            manifest["version"] == CONTENT_STORE_VERSION
+            and (fingerprint is None or manifest["fingerprint"] == fingerprint)
+            and 0 <= manifest["world_version"] < world_versions.get_version_count()
+            and world_versions.get_content_store().contains(
+                bytes.fromhex(manifest["weekly_meal_plan"])
+            )
+        )
+    except (OSError, ValueError, KeyError, TypeError):
+        return False
+
+
+def load_archived_weekly_meal_plan(
+    manifest_path: Path, world_versions: WorldVersions
+) -> tuple[ContentWorld, WeeklyMealPlan]:
+    """
+    Load a weekly meal plan from its manifest, with the world at the version it pins.
+    """
+    manifest = json.loads(manifest_path.read_text())
+    if manifest["version"] != CONTENT_STORE_VERSION:
+        raise ValueError(
+            f"Manifest {manifest_path} has version {manifest['version']}, "
+            f"expected {CONTENT_STORE_VERSION}; archive it again."
+        )
+
+    content_world = world_versions.at(manifest["world_version"])
+    weekly_meal_plan = content_world.load(bytes.fromhex(manifest["weekly_meal_plan"]))
+    return content_world, weekly_meal_plan
+
+
+# --------------------------------------------------------------------------------------
+
+
+class _WorldVersionNameTable(NameTable):
+    def __init__(self, world_versions: WorldVersions, version: int) -> None:
+        self._world_versions = world_versions
+        self._version = version
+
+    def get_hash(self, namespace: str, name: str) -> ContentHash | None:
+        return self._world_versions.get_hash(namespace, name, self._version)
+
+    def get_names(self, namespace: str) -> list[str]:
+        return self._world_versions.get_names(namespace, self._version)
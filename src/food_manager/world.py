@@ -0,0 +1,329 @@
+from __future__ import annotations
+
+import hashlib
+import pickle
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import Any, TypeVar
+
+from balloons import ClosedBalloonWorld
+
+from food_manager.cache import RESOLUTION_CACHE
+from food_manager.hashing import Interner
+from food_manager.index import (
+    DependencyIndex,
+    WorldIndex,
+    create_dependency_index,
+    create_world_index,
+)
+from food_manager.path import CACHE_PATH
+from food_manager.profiling import PROFILER
+from food_manager.schema import (
+    DailyMealPlan,
+    Day,
+    Substance,
+    WeeklyMealPlan,
+    create_base_world,
+)
+from food_manager.store import WorldStore, open_world_store
+from food_manager.streaming import iter_object_members
+from food_manager.utils import compile_substances
+
+T = TypeVar("T")
+
+SNAPSHOT_VERSION = 1
+"""
+The version of the world snapshot format, to be bumped whenever the schema changes.
+"""
+
+
+def load_world(
+    *paths: Path, use_snapshot: bool = True, cache_path: Path | None = None
+) -> ClosedBalloonWorld:
+    """
+    Load a world for the Food Manager schema, populating it from the given paths in
+    order.
+
+    If a snapshot is used, the populated world is restored from a snapshot of a
+    previous load kept under the cache path, `CACHE_PATH` by default, which is rebuilt
+    whenever a file under the paths changes.
+
+    Values resolved from balloons of previously loaded worlds are invalidated, and
+    every substance of the world is compiled.
+    """
+    with PROFILER.phase("populate"):
+        world = (
+            _load_snapshot_world(paths, cache_path)
+            if use_snapshot
+            else _populate_world(paths)
+        )
+    RESOLUTION_CACHE.invalidate()
+    compile_world(world)
+    return world
+
+
+def compile_world(world: ClosedBalloonWorld) -> None:
+    """
+    Compile every substance of a world in a single bottom-up sweep.
+
+    Raises a `ValueError` if substances of the world form a cycle.
+    """
+    with PROFILER.phase("compile"):
+        substance_provider = world.get_provider(Substance)
+        compile_substances(
+            substance_provider.get(name) for name in substance_provider.get_names()
+        )
+
+
+def compile_weekly_meal_plan(weekly_meal_plan: WeeklyMealPlan) -> None:
+    """
+    Compile the substances reachable from a weekly meal plan in a single bottom-up
+    sweep.
+    """
+    with PROFILER.phase("compile"):
+        compile_substances(
+            ration.substance
+            for daily_meal_plan in weekly_meal_plan.dailies.values()
+            for meal in daily_meal_plan.meals.values()
+            for ration in meal.rations
+        )
+
+
+class DeferredWorld:
+    """
+    A world for the Food Manager schema whose loading is deferred to first access.
+
+    The world is then populated in full, so its load time and memory still grow with
+    the world rather than with what is used of it: balloonists resolve the named
+    references of what they inflate against a closed world, which balloons only
+    builds by populating whole directories. Unlike worlds from `load_world`,
+    substances are not compiled upfront, but only as they are reached from the meal
+    plans being analyzed.
+
+    If a snapshot is used, the indexes of substances and products are answered by a
+    world store kept alongside it, which does not need the world to be populated and
+    only fetches the categories looked up.
+    """
+
+    def __init__(
+        self,
+        paths: tuple[Path, ...],
+        use_snapshot: bool,
+        cache_path: Path | None = None,
+    ) -> None:
+        self._paths = paths
+        self._use_snapshot = use_snapshot
+        self._cache_path = cache_path
+        self._world: ClosedBalloonWorld | None = None
+        self._world_store: WorldStore | None = None
+        self._index: WorldIndex | None = None
+        self._dependency_index: DependencyIndex | None = None
+        self._interner = Interner()
+
+    def get_provider(self, type_: type[T]) -> Any:
+        return self.get_world().get_provider(type_)
+
+    def get_balloonist(self, type_: type[T]) -> Any:
+        return self.get_world().get_balloonist(type_)
+
+    def get_world(self) -> ClosedBalloonWorld:
+        if self._world is None:
+            with PROFILER.phase("populate"):
+                self._world = (
+                    _load_snapshot_world(self._paths, self._cache_path)
+                    if self._use_snapshot
+                    else _populate_world(self._paths)
+                )
+            RESOLUTION_CACHE.invalidate()
+        return self._world
+
+    def get_index(self) -> WorldIndex:
+        """
+        Get the indexes of the substances and products of the world, built on first
+        access.
+        """
+        if self._index is None:
+            with PROFILER.phase("index"):
+                if self._use_snapshot:
+                    self._index = create_world_index(self.get_world_store())
+                else:
+                    self._index = create_world_index(self.get_world())
+        return self._index
+
+    def get_world_store(self) -> WorldStore:
+        """
+        Get the world store of the named balloons of the world, kept under the cache
+        path and rebuilt on first access if a file under the paths changed.
+        """
+        if self._world_store is None:
+            self._world_store = load_world_store(
+                *self._paths, cache_path=self._cache_path, load_world=self.get_world
+            )
+        return self._world_store
+
+    def get_dependency_index(self) -> DependencyIndex:
+        """
+        Get the reverse-dependency index of the world, built on first access and kept
+        up to date with the weekly meal plans inflated afterwards.
+        """
+        if self._dependency_index is None:
+            with PROFILER.phase("index"):
+                self._dependency_index = create_dependency_index(self.get_world())
+        return self._dependency_index
+
+    def inflate_weekly_meal_plan(self, deflated: Any) -> WeeklyMealPlan:
+        """
+        Inflate a weekly meal plan, compiling the substances reachable from it.
+
+        Anonymous balloons equal to ones inflated before by the world are replaced by
+        the same shared instances.
+        """
+        weekly_meal_plan_balloonist = self.get_balloonist(WeeklyMealPlan)
+        with PROFILER.phase("inflate"):
+            weekly_meal_plan = self._interner.intern(
+                weekly_meal_plan_balloonist.inflate(deflated)
+            )
+        compile_weekly_meal_plan(weekly_meal_plan)
+        if self._dependency_index is not None:
+            self._dependency_index.add_weekly_meal_plan(weekly_meal_plan)
+        return weekly_meal_plan
+
+
+def inflate_daily_meal_plans(
+    world: ClosedBalloonWorld | DeferredWorld,
+    path: Path,
+    interner: Interner | None = None,
+) -> Iterator[tuple[Day, DailyMealPlan]]:
+    """
+    Inflate the daily meal plans of a weekly meal plan file one day at a time, compiling
+    the substances reachable from each.
+
+    Unlike inflating the whole weekly meal plan, only the day being inflated is held in
+    memory, and days can be analyzed while the rest of the file is still being read.
+    Anonymous balloons are interned with the given interner, which must only be used
+    with the world.
+    """
+    if interner is None:
+        interner = Interner()
+
+    weekly_meal_plan_balloonist = world.get_balloonist(WeeklyMealPlan)
+    with path.open() as file:
+        for key, deflated_daily_meal_plan in iter_object_members(file, ("dailies",)):
+            with PROFILER.phase("inflate"):
+                weekly_meal_plan = interner.intern(
+                    weekly_meal_plan_balloonist.inflate(
+                        {"dailies": {key: deflated_daily_meal_plan}}
+                    )
+                )
+            compile_weekly_meal_plan(weekly_meal_plan)
+            yield from weekly_meal_plan.dailies.items()
+
+
+def load_deferred_world(
+    *paths: Path, use_snapshot: bool = True, cache_path: Path | None = None
+) -> DeferredWorld:
+    """
+    Load a world for the Food Manager schema on first access, populating it from the
+    given paths in order.
+    """
+    return DeferredWorld(paths, use_snapshot, cache_path)
+
+
+def load_world_store(
+    *paths: Path,
+    store_path: Path | None = None,
+    cache_path: Path | None = None,
+    load_world: Callable[[], ClosedBalloonWorld] | None = None,
+) -> WorldStore:
+    """
+    Open a world store of the named balloons of a world for the Food Manager schema,
+    populated from the given paths in order.
+
+    The store is kept at the store path, or by default under the cache path,
+    `CACHE_PATH` by default, and is rebuilt whenever a file under the paths changes,
+    from the world returned by `load_world` if given, or else from a snapshot of it.
+    """
+    if store_path is None:
+        if cache_path is None:
+            cache_path = CACHE_PATH
+        store_path = cache_path / f"world-{_get_paths_key(paths)}.sqlite3"
+    world_store = open_world_store(store_path)
+
+    fingerprint = get_fingerprint(paths)
+    if world_store.get_fingerprint() != fingerprint:
+        with PROFILER.phase("store"):
+            world = (
+                load_world()
+                if load_world is not None
+                else _load_snapshot_world(paths, cache_path)
+            )
+            world_store.replace_world(world, fingerprint)
+    return world_store
+
+
+def get_fingerprint(paths: tuple[Path, ...]) -> str:
+    """
+    Get a fingerprint of the files under the given paths, which changes whenever a
+    file is added, removed or modified.
+    """
+    digest = hashlib.sha256(f"{SNAPSHOT_VERSION}".encode())
+    for path in paths:
+        digest.update(f"\0{path.resolve()}".encode())
+        for file_path in sorted(p for p in path.rglob("*") if p.is_file()):
+            stat = file_path.stat()
+            relative_path = file_path.relative_to(path)
+            digest.update(
+                f"\0{relative_path}:{stat.st_size}:{stat.st_mtime_ns}".encode()
+            )
+    return digest.hexdigest()
+
+
+# --------------------------------------------------------------------------------------
+
+
+def _populate_world(paths: tuple[Path, ...]) -> ClosedBalloonWorld:
+    world = create_base_world()
+    for path in paths:
+        world = world.populate(path)
+    return world
+
+
+def _get_paths_key(paths: tuple[Path, ...]) -> str:
+    """
+    Get a key of the given paths, to name the files cached for a world.
+    """
+    return hashlib.sha256(
+        "\0".join(str(p.resolve()) for p in paths).encode()
+    ).hexdigest()[:16]
+
+
+def _load_snapshot_world(
+    paths: tuple[Path, ...], cache_path: Path | None = None
+) -> ClosedBalloonWorld:
+    if cache_path is None:
+        cache_path = CACHE_PATH
+    snapshot_path = cache_path / f"world-{_get_paths_key(paths)}.pickle"
+    fingerprint = get_fingerprint(paths)
+
+    if snapshot_path.exists():
+        try:
+            with snapshot_path.open("rb") as snapshot_file:
+                if pickle.load(snapshot_file) == fingerprint:
+                    return pickle.load(snapshot_file)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            pass
+
+    world = _populate_world(paths)
+
+    cache_path.mkdir(parents=True, exist_ok=True)
+    temporary_path = snapshot_path.with_suffix(".tmp")
+    try:
+        with temporary_path.open("wb") as snapshot_file:
+            pickle.dump(fingerprint, snapshot_file, pickle.HIGHEST_PROTOCOL)
+            pickle.dump(world, snapshot_file, pickle.HIGHEST_PROTOCOL)
+    except (pickle.PicklingError, TypeError, AttributeError):
+        temporary_path.unlink(missing_ok=True)
+    else:
+        temporary_path.replace(snapshot_path)
+
+    return world
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from food_manager.cache import RESOLUTION_CACHE
+from tests.helpers import SampleWorld, create_sample_world, write_world
+
+
+@pytest.fixture(autouse=True)
+def isolate_caches(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    """
+    Keep world snapshots out of the data directory, and resolved values out of other
+    tests.
+    """
+    monkeypatch.setattr("food_manager.world.CACHE_PATH", tmp_path / "cache")
+    RESOLUTION_CACHE.invalidate()
+    yield
+    RESOLUTION_CACHE.invalidate()
+
+
+@pytest.fixture
+def sample_world() -> SampleWorld:
+    return create_sample_world()
+
+
+@pytest.fixture
+def world_path(tmp_path: Path, sample_world: SampleWorld) -> Path:
+    world_path = tmp_path / "world"
+    write_world(sample_world, world_path)
+    return world_path
@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+
+from food_manager.schema import (
+    Category,
+    CompositeSubstance,
+    DailyMealPlan,
+    Day,
+    DehydratedSubstance,
+    Meal,
+    MealSlot,
+    Money,
+    Nutrient,
+    Product,
+    Ration,
+    RationProduct,
+    SimpleSubstance,
+    Substance,
+    SubstanceProduct,
+    WeeklyMealPlan,
+    create_base_world,
+)
+
+
+@dataclass(frozen=True)
+class SampleWorld:
+    """
+    A small world with simple and composite substances, a named ration and products,
+    and an anonymous dehydrated substance used by meal plans.
+    """
+
+    oil: Category
+    tomato: Category
+    pasta: Category
+
+    olive_oil: SimpleSubstance
+    tomato_pulp: SimpleSubstance
+    durum_wheat: SimpleSubstance
+    sauce: CompositeSubstance
+    dried_tomato: DehydratedSubstance
+
+    spaghetti: Ration
+
+    products: tuple[Product, ...]
+
+    lunch: MealSlot
+    dinner: MealSlot
+
+    def get_categories(self) -> tuple[Category, ...]:
+        return (self.oil, self.tomato, self.pasta)
+
+    def get_substances(self) -> tuple[Substance, ...]:
+        return (
+            self.olive_oil,
+            self.tomato_pulp,
+            self.durum_wheat,
+            self.sauce,
+        )
+
+    def get_meal_slots(self) -> tuple[MealSlot, ...]:
+        return (self.lunch, self.dinner)
+
+    def create_weekly_meal_plan(self, sauce_grams: float = 80.0) -> WeeklyMealPlan:
+        lunch = Meal(
+            slot=self.lunch,
+            rations=(
+                self.spaghetti,
+                Ration(substance=self.sauce, grams=sauce_grams),
+            ),
+        )
+        dinner = Meal(
+            slot=self.dinner,
+            rations=(
+                Ration(substance=self.dried_tomato, grams=30.0),
+                Ration(substance=self.olive_oil, grams=10.0),
+            ),
+        )
+        return WeeklyMealPlan(
+            dailies={
+                Day.MONDAY: DailyMealPlan(
+                    meals={self.lunch: lunch, self.dinner: dinner}
+                ),
+                Day.TUESDAY: DailyMealPlan(meals={self.lunch: lunch}),
+            }
+        )
+
+
+def create_sample_world(olive_oil_fat: float = 1.0) -> SampleWorld:
+    oil = Category("oil")
+    tomato = Category("tomato")
+    pasta = Category("pasta")
+
+    olive_oil = SimpleSubstance(
+        category=oil, nutrient_ratios={Nutrient.FAT: olive_oil_fat}
+    ).to_named("olive-oil")
+    tomato_pulp = SimpleSubstance(
+        category=tomato,
+        nutrient_ratios={Nutrient.CARB: 0.04, Nutrient.PROTEIN: 0.01},
+    ).to_named("tomato-pulp")
+    durum_wheat = SimpleSubstance(
+        category=pasta,
+        nutrient_ratios={
+            Nutrient.CARB: 0.7,
+            Nutrient.FAT: 0.015,
+            Nutrient.PROTEIN: 0.13,
+        },
+    ).to_named("durum-wheat")
+    sauce = CompositeSubstance(
+        category=tomato,
+        components=(
+            CompositeSubstance.Component(substance=tomato_pulp, proportion=9.0),
+            CompositeSubstance.Component(substance=olive_oil, proportion=1.0),
+        ),
+    ).to_named("sauce")
+    dried_tomato = DehydratedSubstance(
+        category=tomato, original_substance=tomato_pulp, dehydration_ratio=0.25
+    )
+
+    spaghetti = Ration(substance=durum_wheat, grams=100.0).to_named("spaghetti")
+
+    products = (
+        SubstanceProduct(item=olive_oil, kg_price=Money(units=9, cents=50)).to_named(
+            "olive-oil-bottle"
+        ),
+        SubstanceProduct(item=tomato_pulp, kg_price=Money(units=2, cents=20)).to_named(
+            "tomato-pulp-can"
+        ),
+        RationProduct(item=spaghetti, price=Money(units=0, cents=35)).to_named(
+            "spaghetti-pack"
+        ),
+    )
+
+    return SampleWorld(
+        oil=oil,
+        tomato=tomato,
+        pasta=pasta,
+        olive_oil=olive_oil,
+        tomato_pulp=tomato_pulp,
+        durum_wheat=durum_wheat,
+        sauce=sauce,
+        dried_tomato=dried_tomato,
+        spaghetti=spaghetti,
+        products=products,
+        lunch=MealSlot("lunch"),
+        dinner=MealSlot("dinner"),
+    )
+
+
+def write_world(sample_world: SampleWorld, world_path: Path) -> None:
+    """
+    Write the named balloons of a sample world to a world directory.
+    """
+    world = create_base_world().to_open(world_path)
+    for type_, balloons in (
+        (Category, sample_world.get_categories()),
+        (Substance, sample_world.get_substances()),
+        (Ration, (sample_world.spaghetti,)),
+        (Product, sample_world.products),
+        (MealSlot, sample_world.get_meal_slots()),
+    ):
+        manager = world.get_manager(type_)
+        for balloon in balloons:
+            manager.track(balloon)
+
+
+def write_weekly_meal_plan(
+    world_path: Path, week_path: Path, weekly_meal_plan: WeeklyMealPlan
+) -> None:
+    """
+    Write a weekly meal plan to the meal plan file of a week directory.
+    """
+    world = create_base_world().populate(world_path)
+    deflated_weekly_meal_plan = world.get_balloonist(WeeklyMealPlan).deflate(
+        weekly_meal_plan
+    )
+    week_path.mkdir(parents=True, exist_ok=True)
+    (week_path / "meal-plan.json").write_text(json.dumps(deflated_weekly_meal_plan))
+
+
+def get_reference_nutrient_ratios(substance: Substance) -> dict[Nutrient, float]:
+    """
+    Get the nutrient ratios of a substance by plain recursion, as a reference for the
+    compiled resolvers.
+    """
+    if isinstance(substance, SimpleSubstance):
+        return dict(substance.nutrient_ratios)
+    if isinstance(substance, CompositeSubstance):
+        nutrient_ratios: dict[Nutrient, float] = {}
+        total_proportion = 0.0
+        for component in substance.components:
+            for nutrient, ratio in get_reference_nutrient_ratios(
+                component.substance
+            ).items():
+                nutrient_ratios[nutrient] = (
+                    nutrient_ratios.get(nutrient, 0.0) + ratio * component.proportion
+                )
+            total_proportion += component.proportion
+        return {n: r / total_proportion for n, r in nutrient_ratios.items()}
+    if isinstance(substance, DehydratedSubstance):
+        return {
+            nutrient: ratio / substance.dehydration_ratio
+            for nutrient, ratio in get_reference_nutrient_ratios(
+                substance.original_substance
+            ).items()
+        }
+    raise ValueError(f"Unknown substance type: {substance}")
+
+
+def get_reference_category_proportions(substance: Substance) -> dict[Category, float]:
+    """
+    Get the category proportions of a substance by plain recursion, as a reference for
+    the compiled resolvers.
+    """
+    if isinstance(substance, SimpleSubstance):
+        return {substance.category: 1.0}
+    if isinstance(substance, CompositeSubstance):
+        proportions: dict[Category, float] = {}
+        total_proportion = 0.0
+        for component in substance.components:
+            for category, proportion in get_reference_category_proportions(
+                component.substance
+            ).items():
+                proportions[category] = (
+                    proportions.get(category, 0.0) + proportion * component.proportion
+                )
+            total_proportion += component.proportion
+        return {c: p / total_proportion for c, p in proportions.items()}
+    if isinstance(substance, DehydratedSubstance):
+        return {
+            category: proportion / substance.dehydration_ratio
+            for category, proportion in get_reference_category_proportions(
+                substance.original_substance
+            ).items()
+        }
+    raise ValueError(f"Unknown substance type: {substance}")
+
+
+def get_reference_nutrient_grams(
+    weekly_meal_plan: WeeklyMealPlan,
+) -> dict[Day, dict[Nutrient, float]]:
+    """
+    Get the grams of each nutrient per day of a weekly meal plan, ration by ration.
+    """
+    day_grams: dict[Day, dict[Nutrient, float]] = {}
+    for day, daily_meal_plan in weekly_meal_plan.dailies.items():
+        nutrient_grams = day_grams.setdefault(day, {})
+        for meal in daily_meal_plan.meals.values():
+            for ration in meal.rations:
+                for nutrient, ratio in get_reference_nutrient_ratios(
+                    ration.substance
+                ).items():
+                    nutrient_grams[nutrient] = (
+                        nutrient_grams.get(nutrient, 0.0) + ration.grams * ratio
+                    )
+    return day_grams
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import pytest
+
+from food_manager.analysis import (
+    GroceryReporter,
+    NutrientReporter,
+    PriceReporter,
+    analyze_weekly_meal_plan,
+)
+from food_manager.schema import Day, Ration
+from food_manager.utils import PriceCalculator, get_kcal
+from tests.helpers import (
+    SampleWorld,
+    get_reference_category_proportions,
+    get_reference_nutrient_grams,
+)
+
+
+def test_analysis_matches_reference(sample_world: SampleWorld) -> None:
+    weekly_meal_plan = sample_world.create_weekly_meal_plan()
+    price_calculator = PriceCalculator.create(list(sample_world.products))
+
+    results = analyze_weekly_meal_plan(
+        weekly_meal_plan,
+        {
+            "nutrients": NutrientReporter(),
+            "prices": PriceReporter(price_calculator),
+            "groceries": GroceryReporter(),
+        },
+    )
+
+    nutrient_report = results["nutrients"]
+    reference_grams = get_reference_nutrient_grams(weekly_meal_plan)
+    assert list(nutrient_report.day_grams) == [Day.MONDAY, Day.TUESDAY]
+    for day, nutrient_grams in reference_grams.items():
+        assert nutrient_report.day_grams[day] == pytest.approx(nutrient_grams)
+        assert nutrient_report.day_kcal[day] == pytest.approx(get_kcal(nutrient_grams))
+    assert nutrient_report.week_kcal == pytest.approx(
+        sum(get_kcal(g) for g in reference_grams.values())
+    )
+
+    rations = [
+        ration
+        for daily_meal_plan in weekly_meal_plan.dailies.values()
+        for meal in daily_meal_plan.meals.values()
+        for ration in meal.rations
+    ]
+    price_report = results["prices"]
+    assert price_report.week_cents == pytest.approx(
+        sum(price_calculator.get_cents(r) or 0.0 for r in rations)
+    )
+    assert price_report.unpriced_rations == ()
+
+    expected_category_grams: dict[object, float] = {}
+    for ration in rations:
+        for category, proportion in get_reference_category_proportions(
+            ration.substance
+        ).items():
+            expected_category_grams[category] = (
+                expected_category_grams.get(category, 0.0) + ration.grams * proportion
+            )
+    assert results["groceries"] == pytest.approx(expected_category_grams)
+
+
+def test_price_reporter_reports_unpriced_rations(sample_world: SampleWorld) -> None:
+    ration = Ration(substance=sample_world.durum_wheat, grams=50.0)
+    reporter = PriceReporter(PriceCalculator.create([]))
+
+    reporter.report_ration(Day.MONDAY, sample_world.lunch, ration)
+    price_report = reporter.get_result()
+
+    assert price_report.week_cents == 0
+    assert price_report.unpriced_rations == ((Day.MONDAY, sample_world.lunch, ration),)
+
+
+def test_nutrient_reporter_without_rations() -> None:
+    nutrient_report = NutrientReporter().get_result()
+
+    assert nutrient_report.day_grams == {}
+    assert nutrient_report.week_kcal == 0
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import pytest
+
+from food_manager.cache import ResolutionCache
+from food_manager.utils import compile_substances, get_category_proportions
+from tests.helpers import SampleWorld
+
+
+class _Balloon:
+    pass
+
+
+def _resolve_id(balloon: _Balloon) -> int:
+    return id(balloon)
+
+
+def test_resolution_cache_resolves_once_per_balloon() -> None:
+    cache = ResolutionCache(max_size=4)
+    balloon = _Balloon()
+
+    assert cache.resolve(_resolve_id, balloon) == id(balloon)
+    assert cache.resolve(_resolve_id, balloon) == id(balloon)
+
+    stats = cache.get_stats()
+    assert (stats.hits, stats.misses, stats.size) == (1, 1, 1)
+
+
+def test_resolution_cache_evicts_least_recently_used_entries() -> None:
+    cache = ResolutionCache(max_size=2)
+    balloons = [_Balloon() for _ in range(3)]
+
+    cache.resolve(_resolve_id, balloons[0])
+    cache.resolve(_resolve_id, balloons[1])
+    cache.resolve(_resolve_id, balloons[0])
+    cache.resolve(_resolve_id, balloons[2])
+
+    assert cache.contains(_resolve_id, balloons[0])
+    assert not cache.contains(_resolve_id, balloons[1])
+    assert cache.get_stats().evictions == 1
+
+
+def test_resolution_cache_reserve_grows_on_top_of_initial_size() -> None:
+    cache = ResolutionCache(max_size=2)
+
+    cache.reserve(3)
+    cache.reserve(1)
+
+    assert cache.get_max_size() == 5
+
+
+def test_resolution_cache_rejects_non_positive_sizes() -> None:
+    with pytest.raises(ValueError, match="must be positive"):
+        ResolutionCache(max_size=0)
+
+
+def test_compile_substances_does_not_evict_its_own_entries(
+    monkeypatch: pytest.MonkeyPatch, sample_world: SampleWorld
+) -> None:
+    cache = ResolutionCache(max_size=2)
+    monkeypatch.setattr("food_manager.utils.RESOLUTION_CACHE", cache)
+
+    compile_substances((sample_world.sauce, sample_world.dried_tomato))
+    cache.reset_stats()
+    for substance in (sample_world.sauce, sample_world.dried_tomato):
+        get_category_proportions(substance)
+
+    stats = cache.get_stats()
+    assert (stats.hits, stats.misses, stats.evictions) == (2, 0, 0)
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from food_manager.content_store import ContentStore
+from food_manager.hashing import have_same_content
+from food_manager.schema import (
+    CompositeSubstance,
+    Nutrient,
+    SimpleSubstance,
+    Substance,
+)
+from food_manager.utils import get_nutrient_grams
+from food_manager.versions import (
+    WorldVersions,
+    archive_weekly_meal_plan,
+    is_valid_manifest,
+    load_archived_weekly_meal_plan,
+)
+from food_manager.world import load_world
+from tests.helpers import SampleWorld, create_sample_world, write_world
+
+
+def test_content_store_stores_shared_balloons_once(
+    tmp_path: Path, sample_world: SampleWorld
+) -> None:
+    content_store = ContentStore(tmp_path / "content")
+    weekly_meal_plan = sample_world.create_weekly_meal_plan()
+
+    content_hash = content_store.put(weekly_meal_plan)
+    size = content_store.get_size()
+
+    assert content_store.contains(content_hash)
+    assert content_store.put(sample_world.create_weekly_meal_plan()) == content_hash
+    assert content_store.get_size() == size
+    with pytest.raises(ValueError, match="No balloon"):
+        content_store.read(bytes(len(content_hash)))
+
+
+def test_world_versions_round_trip_weekly_meal_plans(
+    tmp_path: Path, world_path: Path, sample_world: SampleWorld
+) -> None:
+    world_versions = WorldVersions(tmp_path / "content")
+    manifest_path = tmp_path / "manifest.json"
+    weekly_meal_plan = sample_world.create_weekly_meal_plan()
+
+    world_version = archive_weekly_meal_plan(
+        load_world(world_path), weekly_meal_plan, manifest_path, world_versions
+    )
+    content_world, archived_weekly_meal_plan = load_archived_weekly_meal_plan(
+        manifest_path, WorldVersions(tmp_path / "content")
+    )
+
+    assert world_version == 0
+    assert is_valid_manifest(manifest_path, world_versions)
+    assert have_same_content(archived_weekly_meal_plan, weekly_meal_plan)
+    assert content_world.get_provider(Substance).get_names() == [
+        "durum-wheat",
+        "olive-oil",
+        "sauce",
+        "tomato-pulp",
+    ]
+    for day, daily_meal_plan in weekly_meal_plan.dailies.items():
+        archived_daily_meal_plan = archived_weekly_meal_plan.dailies[day]
+        for meal_slot, meal in daily_meal_plan.meals.items():
+            archived_meal = archived_daily_meal_plan.meals[meal_slot]
+            for ration, archived_ration in zip(
+                meal.rations, archived_meal.rations, strict=True
+            ):
+                assert get_nutrient_grams(archived_ration) == pytest.approx(
+                    get_nutrient_grams(ration)
+                )
+
+
+def test_content_store_shares_balloons_across_world_versions(
+    tmp_path: Path, world_path: Path
+) -> None:
+    world_versions = WorldVersions(tmp_path / "content")
+    world_versions.commit(load_world(world_path))
+    size = world_versions.get_content_store().get_size()
+
+    write_world(create_sample_world(olive_oil_fat=0.5), world_path)
+    world_versions.commit(load_world(world_path))
+
+    assert world_versions.get_content_store().get_size() == size + 1
+    assert world_versions.get_hash("Substance", "sauce", 0) == (
+        world_versions.get_hash("Substance", "sauce", 1)
+    )
+    for version, fat in ((0, 1.0), (1, 0.5)):
+        world = world_versions.at(version)
+        olive_oil = world.get(Substance, "olive-oil")
+        sauce = world.get(Substance, "sauce")
+        assert isinstance(olive_oil, SimpleSubstance)
+        assert isinstance(sauce, CompositeSubstance)
+        assert olive_oil.nutrient_ratios == {Nutrient.FAT: fat}
+        assert sauce.components[1].substance is olive_oil
+
+
+def test_manifests_with_other_fingerprints_are_invalid(
+    tmp_path: Path, world_path: Path, sample_world: SampleWorld
+) -> None:
+    world_versions = WorldVersions(tmp_path / "content")
+    manifest_path = tmp_path / "manifest.json"
+    archive_weekly_meal_plan(
+        load_world(world_path),
+        sample_world.create_weekly_meal_plan(),
+        manifest_path,
+        world_versions,
+        fingerprint="a",
+    )
+
+    assert is_valid_manifest(manifest_path, world_versions, fingerprint="a")
+    assert not is_valid_manifest(manifest_path, world_versions, fingerprint="b")
+    assert not is_valid_manifest(tmp_path / "missing.json", world_versions)
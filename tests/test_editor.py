@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import pytest
+
+from food_manager.editor import MealManager, WeeklyMealPlanManager
+from food_manager.schema import Day, Meal, Money, Nutrient, Ration, WeeklyMealPlan
+from food_manager.totals import Totals, TotalsCalculator
+from food_manager.utils import PriceCalculator
+from tests.helpers import SampleWorld
+
+
+def _create_totals_calculator(sample_world: SampleWorld) -> TotalsCalculator:
+    return TotalsCalculator(PriceCalculator.create(list(sample_world.products)))
+
+
+def _assert_totals_equal(totals: Totals, expected_totals: Totals) -> None:
+    assert totals.nutrient_grams == pytest.approx(expected_totals.nutrient_grams)
+    assert totals.kcal == pytest.approx(expected_totals.kcal)
+    assert totals.cents == pytest.approx(expected_totals.cents)
+    assert totals.unpriced_ration_count == expected_totals.unpriced_ration_count
+    assert totals.category_grams == pytest.approx(expected_totals.category_grams)
+
+
+def _get_fresh_totals(
+    sample_world: SampleWorld, weekly_meal_plan: WeeklyMealPlan
+) -> Totals:
+    return _create_totals_calculator(sample_world).get_weekly_meal_plan_totals(
+        weekly_meal_plan
+    )
+
+
+def _add_olive_oil(manager: WeeklyMealPlanManager, sample_world: SampleWorld) -> None:
+    daily_meal_plan_manager = manager.get_daily_meal_plan_manager(Day.TUESDAY)
+    meal_manager = daily_meal_plan_manager.get_meal_manager(sample_world.lunch)
+    meal_manager.upsert_ration(
+        sample_world.oil, Ration(substance=sample_world.olive_oil, grams=15.0)
+    )
+    daily_meal_plan_manager.upsert_meal(sample_world.lunch, meal_manager.get_entity())
+    manager.upsert_daily_meal_plan(Day.TUESDAY, daily_meal_plan_manager.get_entity())
+
+
+def test_editor_totals_match_totals_of_edited_entity(
+    sample_world: SampleWorld,
+) -> None:
+    manager = WeeklyMealPlanManager(
+        sample_world.create_weekly_meal_plan(), _create_totals_calculator(sample_world)
+    )
+
+    _add_olive_oil(manager, sample_world)
+    manager.delete_daily_meal_plan(Day.MONDAY)
+    weekly_meal_plan = manager.get_entity()
+
+    assert list(weekly_meal_plan.dailies) == [Day.TUESDAY]
+    _assert_totals_equal(
+        manager.get_totals(), _get_fresh_totals(sample_world, weekly_meal_plan)
+    )
+
+
+def test_editor_undo_and_redo_restore_entities_and_totals(
+    sample_world: SampleWorld,
+) -> None:
+    weekly_meal_plan = sample_world.create_weekly_meal_plan()
+    manager = WeeklyMealPlanManager(
+        weekly_meal_plan, _create_totals_calculator(sample_world)
+    )
+    _add_olive_oil(manager, sample_world)
+    edited_weekly_meal_plan = manager.get_entity()
+
+    manager.undo()
+
+    assert manager.get_entity() is weekly_meal_plan
+    _assert_totals_equal(
+        manager.get_totals(), _get_fresh_totals(sample_world, weekly_meal_plan)
+    )
+
+    manager.redo()
+
+    assert manager.get_entity() is edited_weekly_meal_plan
+    _assert_totals_equal(
+        manager.get_totals(), _get_fresh_totals(sample_world, edited_weekly_meal_plan)
+    )
+
+
+def test_editor_batch_is_undone_as_a_whole(sample_world: SampleWorld) -> None:
+    weekly_meal_plan = sample_world.create_weekly_meal_plan()
+    manager = WeeklyMealPlanManager(weekly_meal_plan)
+
+    with manager.batch():
+        manager.delete_daily_meal_plan(Day.MONDAY)
+        manager.delete_daily_meal_plan(Day.TUESDAY)
+    manager.undo()
+
+    assert manager.get_entity() is weekly_meal_plan
+
+
+def test_editor_batch_is_rolled_back_on_error(sample_world: SampleWorld) -> None:
+    weekly_meal_plan = sample_world.create_weekly_meal_plan()
+    manager = WeeklyMealPlanManager(weekly_meal_plan)
+    totals = manager.get_totals()
+
+    with pytest.raises(ValueError, match="does not exist"), manager.batch():
+        manager.delete_daily_meal_plan(Day.MONDAY)
+        manager.delete_daily_meal_plan(Day.WEDNESDAY)
+
+    assert manager.get_entity() is weekly_meal_plan
+    assert manager.get_totals() == totals
+    with pytest.raises(ValueError, match="Nothing to undo"):
+        manager.undo()
+
+
+def test_editor_totals_follow_price_updates(sample_world: SampleWorld) -> None:
+    price_calculator = PriceCalculator.create(list(sample_world.products))
+    manager = WeeklyMealPlanManager(
+        sample_world.create_weekly_meal_plan(), TotalsCalculator(price_calculator)
+    )
+    _add_olive_oil(manager, sample_world)
+    weekly_meal_plan = manager.get_entity()
+
+    price_calculator.update_substance_kg_price(
+        sample_world.olive_oil, Money(units=19, cents=0)
+    )
+    price_calculator.update_ration_price(
+        sample_world.spaghetti, Money(units=0, cents=70)
+    )
+    expected_totals = TotalsCalculator(price_calculator).get_weekly_meal_plan_totals(
+        weekly_meal_plan
+    )
+
+    _assert_totals_equal(manager.get_totals(), expected_totals)
+    manager.undo()
+    manager.redo()
+    _assert_totals_equal(manager.get_totals(), expected_totals)
+
+
+def test_meal_totals_follow_price_updates(sample_world: SampleWorld) -> None:
+    price_calculator = PriceCalculator.create(list(sample_world.products))
+    totals_calculator = TotalsCalculator(price_calculator)
+    meal = Meal(slot=sample_world.lunch, rations=(sample_world.spaghetti,))
+    assert totals_calculator.get_meal_totals(meal).cents == pytest.approx(35.0)
+
+    price_calculator.update_ration_price(
+        sample_world.spaghetti, Money(units=0, cents=70)
+    )
+
+    assert totals_calculator.get_meal_totals(meal).cents == pytest.approx(70.0)
+    assert totals_calculator.get_meal_totals(meal).nutrient_grams[
+        Nutrient.CARB
+    ] == pytest.approx(70.0)
+
+
+def test_update_ration_price_rejects_unnamed_rations(
+    sample_world: SampleWorld,
+) -> None:
+    price_calculator = PriceCalculator.create(list(sample_world.products))
+
+    with pytest.raises(ValueError, match="unnamed ration"):
+        price_calculator.update_ration_price(
+            Ration(substance=sample_world.durum_wheat, grams=50.0),
+            Money(units=0, cents=20),
+        )
+
+
+def _create_meal_with_two_tomato_rations(sample_world: SampleWorld) -> Meal:
+    return Meal(
+        slot=sample_world.dinner,
+        rations=(
+            Ration(substance=sample_world.tomato_pulp, grams=50.0),
+            Ration(substance=sample_world.olive_oil, grams=10.0),
+            Ration(substance=sample_world.dried_tomato, grams=20.0),
+        ),
+    )
+
+
+def _assert_meal_totals_match(manager: MealManager, meal: Meal) -> None:
+    _assert_totals_equal(manager.get_totals(), TotalsCalculator().get_meal_totals(meal))
+
+
+def test_meal_manager_upserts_a_single_ration_per_category(
+    sample_world: SampleWorld,
+) -> None:
+    manager = MealManager(_create_meal_with_two_tomato_rations(sample_world))
+    sauce_ration = Ration(substance=sample_world.sauce, grams=80.0)
+
+    manager.upsert_ration(sample_world.tomato, sauce_ration)
+    meal = manager.get_entity()
+
+    assert [r.substance for r in meal.rations] == [
+        sample_world.sauce,
+        sample_world.olive_oil,
+    ]
+    _assert_meal_totals_match(manager, meal)
+
+
+def test_meal_manager_deletes_every_ration_of_a_category(
+    sample_world: SampleWorld,
+) -> None:
+    manager = MealManager(_create_meal_with_two_tomato_rations(sample_world))
+
+    manager.delete_ration(sample_world.tomato)
+    meal = manager.get_entity()
+
+    assert [r.substance for r in meal.rations] == [sample_world.olive_oil]
+    _assert_meal_totals_match(manager, meal)
+    with pytest.raises(ValueError, match="does not exist"):
+        manager.delete_ration(sample_world.tomato)
+
+
+def test_meal_manager_replaces_rations_by_position(
+    sample_world: SampleWorld,
+) -> None:
+    manager = MealManager(_create_meal_with_two_tomato_rations(sample_world))
+    sauce_ration = Ration(substance=sample_world.sauce, grams=80.0)
+
+    manager.replace_ration(2, sauce_ration)
+    meal = manager.get_entity()
+
+    assert [r.substance for r in meal.rations] == [
+        sample_world.tomato_pulp,
+        sample_world.olive_oil,
+        sample_world.sauce,
+    ]
+    _assert_meal_totals_match(manager, meal)
+    with pytest.raises(ValueError, match="does not exist"):
+        manager.replace_ration(3, sauce_ration)
+
+
+def test_meal_manager_rejects_rations_of_another_category(
+    sample_world: SampleWorld,
+) -> None:
+    manager = MealManager(_create_meal_with_two_tomato_rations(sample_world))
+
+    with pytest.raises(ValueError, match="cannot be upserted"):
+        manager.upsert_ration(
+            sample_world.oil, Ration(substance=sample_world.sauce, grams=80.0)
+        )
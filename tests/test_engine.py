@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from food_manager.engine import DAYS, NutrientEngine
+from food_manager.nutrients import NUTRIENT_INDICES
+from food_manager.schema import Day, Nutrient
+from food_manager.utils import get_kcal
+from tests.helpers import SampleWorld, get_reference_nutrient_grams
+
+
+def test_engine_day_grams_match_reference(sample_world: SampleWorld) -> None:
+    weekly_meal_plan = sample_world.create_weekly_meal_plan()
+    engine = NutrientEngine()
+
+    plan_nutrients = engine.evaluate(engine.vectorize(weekly_meal_plan))
+
+    for day, nutrient_grams in get_reference_nutrient_grams(weekly_meal_plan).items():
+        day_grams = plan_nutrients.day_grams[DAYS.index(day)]
+        for nutrient, grams in nutrient_grams.items():
+            assert day_grams[NUTRIENT_INDICES[nutrient]] == pytest.approx(grams)
+        assert plan_nutrients.day_kcal[DAYS.index(day)] == pytest.approx(
+            get_kcal(nutrient_grams)
+        )
+    assert plan_nutrients.week_kcal == pytest.approx(plan_nutrients.day_kcal.sum())
+
+
+def test_engine_meal_grams_sum_to_day_grams(sample_world: SampleWorld) -> None:
+    engine = NutrientEngine()
+    plan_vector = engine.vectorize(sample_world.create_weekly_meal_plan())
+
+    plan_nutrients = engine.evaluate(plan_vector)
+
+    assert plan_vector.meals == (
+        (Day.MONDAY, sample_world.lunch),
+        (Day.MONDAY, sample_world.dinner),
+        (Day.TUESDAY, sample_world.lunch),
+    )
+    assert plan_nutrients.meal_grams[:2].sum(axis=0) == pytest.approx(
+        plan_nutrients.day_grams[DAYS.index(Day.MONDAY)]
+    )
+    assert plan_nutrients.meal_grams[2] == pytest.approx(
+        plan_nutrients.day_grams[DAYS.index(Day.TUESDAY)]
+    )
+
+
+def test_engine_evaluates_variants_like_plans(sample_world: SampleWorld) -> None:
+    engine = NutrientEngine()
+    plan_vector = engine.vectorize(sample_world.create_weekly_meal_plan())
+    grams = np.stack([plan_vector.grams, 2 * plan_vector.grams])
+
+    day_grams, day_kcal = engine.evaluate_variants(plan_vector, grams)
+
+    for variant_grams, variant_day_grams, variant_day_kcal in zip(
+        grams, day_grams, day_kcal, strict=True
+    ):
+        plan_nutrients = engine.evaluate(plan_vector, variant_grams)
+        assert variant_day_grams == pytest.approx(plan_nutrients.day_grams)
+        assert variant_day_kcal == pytest.approx(plan_nutrients.day_kcal)
+
+
+def test_engine_indexes_each_substance_once(sample_world: SampleWorld) -> None:
+    engine = NutrientEngine()
+    plan_vector = engine.vectorize(sample_world.create_weekly_meal_plan())
+
+    present = engine.get_present(plan_vector)
+
+    assert engine.get_matrix().shape == (4, len(NUTRIENT_INDICES))
+    assert engine.get_substance_index(sample_world.sauce) == 1
+    assert present[:, NUTRIENT_INDICES[Nutrient.CARB]].tolist() == [
+        True,
+        True,
+        True,
+        False,
+        True,
+        True,
+    ]
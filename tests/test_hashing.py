@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from food_manager.hashing import (
+    DIGEST_SIZE,
+    Interner,
+    get_content_hash,
+    have_same_content,
+)
+from food_manager.schema import DehydratedSubstance, Ration, Substance
+from tests.helpers import SampleWorld
+
+
+def _create_dried_tomato(sample_world: SampleWorld) -> DehydratedSubstance:
+    return DehydratedSubstance(
+        category=sample_world.tomato,
+        original_substance=sample_world.tomato_pulp,
+        dehydration_ratio=0.25,
+    )
+
+
+def test_equal_balloons_have_the_same_content(sample_world: SampleWorld) -> None:
+    dried_tomato = _create_dried_tomato(sample_world)
+
+    assert dried_tomato is not sample_world.dried_tomato
+    assert have_same_content(dried_tomato, sample_world.dried_tomato)
+    assert have_same_content(
+        Ration(substance=dried_tomato, grams=30.0),
+        Ration(substance=sample_world.dried_tomato, grams=30.0),
+    )
+    assert not have_same_content(
+        Ration(substance=dried_tomato, grams=30.0),
+        Ration(substance=dried_tomato, grams=31.0),
+    )
+
+
+def test_named_balloons_are_hashed_by_name(sample_world: SampleWorld) -> None:
+    assert get_content_hash(sample_world.sauce) != get_content_hash(
+        sample_world.tomato_pulp
+    )
+    assert get_content_hash(sample_world.sauce) == get_content_hash(
+        sample_world.sauce.to_named("sauce")
+    )
+
+
+def test_interner_shares_instances_with_the_same_content(
+    sample_world: SampleWorld,
+) -> None:
+    interner = Interner()
+    ration = Ration(substance=_create_dried_tomato(sample_world), grams=30.0)
+    other_ration = Ration(substance=_create_dried_tomato(sample_world), grams=60.0)
+
+    interned_ration = interner.intern(ration)
+    interned_other_ration = interner.intern(other_ration)
+
+    assert interned_ration == ration
+    assert interned_other_ration.substance is interned_ration.substance
+    assert interner.intern(sample_world.sauce) is sample_world.sauce
+    assert interner.get_size() == 3
+
+
+def test_content_hash_of_deep_substances(sample_world: SampleWorld) -> None:
+    substance: Substance = sample_world.tomato_pulp
+    for _ in range(5000):
+        substance = DehydratedSubstance(
+            category=sample_world.tomato,
+            original_substance=substance,
+            dehydration_ratio=1.0,
+        )
+
+    assert len(get_content_hash(substance)) == DIGEST_SIZE
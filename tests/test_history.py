@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from food_manager.history import (
+    MANIFEST_FILE_NAME,
+    WEEK_WORLD_DIRECTORY_NAME,
+    analyze_history,
+    archive_history,
+)
+from food_manager.schema import Nutrient, WeeklyMealPlan
+from food_manager.utils import get_nutrient_grams
+from food_manager.versions import WorldVersions
+from tests.helpers import (
+    SampleWorld,
+    create_sample_world,
+    write_weekly_meal_plan,
+    write_world,
+)
+
+
+def _get_world_version(week_path: Path) -> int:
+    manifest = json.loads((week_path / MANIFEST_FILE_NAME).read_text())
+    return int(manifest["world_version"])
+
+
+def test_archive_history_keeps_archived_weeks_pinned(
+    tmp_path: Path, world_path: Path, sample_world: SampleWorld
+) -> None:
+    content_store_path = tmp_path / "content"
+    old_week_path = tmp_path / "weekly" / "2024-01"
+    write_weekly_meal_plan(
+        world_path, old_week_path, sample_world.create_weekly_meal_plan()
+    )
+    archive_history([old_week_path], world_path, content_store_path)
+
+    write_world(create_sample_world(olive_oil_fat=0.5), world_path)
+    new_week_path = tmp_path / "weekly" / "2024-02"
+    write_weekly_meal_plan(
+        world_path, new_week_path, sample_world.create_weekly_meal_plan()
+    )
+    archived_week_paths = archive_history(
+        [old_week_path, new_week_path], world_path, content_store_path
+    )
+
+    assert archived_week_paths == [new_week_path]
+    assert _get_world_version(old_week_path) == 0
+    assert _get_world_version(new_week_path) == 1
+    assert WorldVersions(content_store_path).get_version_count() == 2
+
+
+def test_archive_history_with_force_repins_archived_weeks(
+    tmp_path: Path, world_path: Path, sample_world: SampleWorld
+) -> None:
+    content_store_path = tmp_path / "content"
+    week_path = tmp_path / "weekly" / "2024-01"
+    write_weekly_meal_plan(
+        world_path, week_path, sample_world.create_weekly_meal_plan()
+    )
+    archive_history([week_path], world_path, content_store_path)
+
+    write_world(create_sample_world(olive_oil_fat=0.5), world_path)
+    archived_week_paths = archive_history(
+        [week_path], world_path, content_store_path, force=True
+    )
+
+    assert archived_week_paths == [week_path]
+    assert _get_world_version(week_path) == 1
+
+
+def test_archive_history_archives_weeks_with_invalid_manifests(
+    tmp_path: Path, world_path: Path, sample_world: SampleWorld
+) -> None:
+    content_store_path = tmp_path / "content"
+    week_path = tmp_path / "weekly" / "2024-01"
+    write_weekly_meal_plan(
+        world_path, week_path, sample_world.create_weekly_meal_plan()
+    )
+    (week_path / MANIFEST_FILE_NAME).write_text('{"version": 1}')
+
+    assert archive_history([week_path], world_path, content_store_path) == [week_path]
+    assert _get_world_version(week_path) == 0
+
+
+def _get_week_fat_grams(weekly_meal_plan: WeeklyMealPlan) -> float:
+    return sum(
+        get_nutrient_grams(ration).get(Nutrient.FAT, 0.0)
+        for daily_meal_plan in weekly_meal_plan.dailies.values()
+        for meal in daily_meal_plan.meals.values()
+        for ration in meal.rations
+    )
+
+
+def test_analyze_history_uses_pinned_world_of_archived_weeks(
+    tmp_path: Path, world_path: Path, sample_world: SampleWorld
+) -> None:
+    content_store_path = tmp_path / "content"
+    week_path = tmp_path / "weekly" / "2024-01"
+    weekly_meal_plan = sample_world.create_weekly_meal_plan()
+    write_weekly_meal_plan(world_path, week_path, weekly_meal_plan)
+    archive_history([week_path], world_path, content_store_path)
+
+    write_world(create_sample_world(olive_oil_fat=0.5), world_path)
+    (week_analysis,) = analyze_history(
+        [week_path], world_path, content_store_path, max_workers=1
+    )
+
+    assert week_analysis.day_count == 2
+    assert week_analysis.week_grams[Nutrient.FAT] == pytest.approx(
+        _get_week_fat_grams(weekly_meal_plan)
+    )
+
+
+def test_analyze_history_analyzes_edited_archived_weeks_live(
+    tmp_path: Path, world_path: Path, sample_world: SampleWorld
+) -> None:
+    content_store_path = tmp_path / "content"
+    week_path = tmp_path / "weekly" / "2024-01"
+    write_weekly_meal_plan(
+        world_path, week_path, sample_world.create_weekly_meal_plan()
+    )
+    archive_history([week_path], world_path, content_store_path)
+
+    edited_weekly_meal_plan = sample_world.create_weekly_meal_plan(sauce_grams=160.0)
+    write_weekly_meal_plan(world_path, week_path, edited_weekly_meal_plan)
+    (week_analysis,) = analyze_history(
+        [week_path], world_path, content_store_path, max_workers=1
+    )
+
+    assert week_analysis.week_grams[Nutrient.FAT] == pytest.approx(
+        _get_week_fat_grams(edited_weekly_meal_plan)
+    )
+
+
+def test_archive_history_archives_edited_weeks_again(
+    tmp_path: Path, world_path: Path, sample_world: SampleWorld
+) -> None:
+    content_store_path = tmp_path / "content"
+    week_path = tmp_path / "weekly" / "2024-01"
+    write_weekly_meal_plan(
+        world_path, week_path, sample_world.create_weekly_meal_plan()
+    )
+    archive_history([week_path], world_path, content_store_path)
+    assert archive_history([week_path], world_path, content_store_path) == []
+
+    week_world_path = week_path / WEEK_WORLD_DIRECTORY_NAME
+    write_world(create_sample_world(olive_oil_fat=0.5), week_world_path)
+
+    assert archive_history([week_path], world_path, content_store_path) == [week_path]
+
+
+def test_analyze_history_keeps_week_worlds_apart(
+    tmp_path: Path, world_path: Path, sample_world: SampleWorld
+) -> None:
+    week_paths = [tmp_path / "weekly" / f"2024-0{i}" for i in range(1, 4)]
+    weekly_meal_plan = sample_world.create_weekly_meal_plan()
+    for week_path in week_paths:
+        write_weekly_meal_plan(world_path, week_path, weekly_meal_plan)
+    week_world = create_sample_world(olive_oil_fat=0.5)
+    write_world(week_world, week_paths[1] / WEEK_WORLD_DIRECTORY_NAME)
+
+    week_analyses = analyze_history(
+        week_paths, world_path, tmp_path / "content", max_workers=1
+    )
+
+    assert [a.week for a in week_analyses] == ["2024-01", "2024-02", "2024-03"]
+    assert [a.week_grams[Nutrient.FAT] for a in week_analyses] == pytest.approx(
+        [
+            _get_week_fat_grams(weekly_meal_plan),
+            _get_week_fat_grams(week_world.create_weekly_meal_plan()),
+            _get_week_fat_grams(weekly_meal_plan),
+        ]
+    )
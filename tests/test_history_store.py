@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from food_manager.engine import DAYS
+from food_manager.history_store import (
+    HISTORY_STORE_VERSION,
+    META_FILE_NAME,
+    HistoryStore,
+    export_history,
+)
+from food_manager.nutrients import NUTRIENT_INDICES
+from food_manager.utils import get_kcal
+from tests.helpers import (
+    SampleWorld,
+    get_reference_nutrient_grams,
+    write_weekly_meal_plan,
+)
+
+
+def test_history_store_matches_reference(
+    tmp_path: Path, world_path: Path, sample_world: SampleWorld
+) -> None:
+    weekly_meal_plans = [
+        sample_world.create_weekly_meal_plan(),
+        sample_world.create_weekly_meal_plan(sauce_grams=120.0),
+    ]
+    week_paths = [tmp_path / "weekly" / "2024-01", tmp_path / "weekly" / "2024-02"]
+    for week_path, weekly_meal_plan in zip(week_paths, weekly_meal_plans, strict=True):
+        write_weekly_meal_plan(world_path, week_path, weekly_meal_plan)
+
+    export_history(week_paths, world_path, tmp_path / "history")
+    history_store = HistoryStore.open(tmp_path / "history")
+
+    assert history_store.weeks == ("2024-01", "2024-02")
+    assert history_store.rations == ("spaghetti",)
+    assert history_store.meal_slots == ("lunch", "dinner")
+    assert len(history_store.grams) == 12
+    day_kcal = history_store.get_day_kcal()
+    day_nutrient_grams = history_store.get_day_nutrient_grams()
+    for week_index, weekly_meal_plan in enumerate(weekly_meal_plans):
+        reference_grams = get_reference_nutrient_grams(weekly_meal_plan)
+        for day_index, day in enumerate(DAYS):
+            nutrient_grams = reference_grams.get(day, {})
+            assert day_kcal[week_index, day_index] == pytest.approx(
+                get_kcal(nutrient_grams), rel=1e-6
+            )
+            for nutrient, grams in nutrient_grams.items():
+                assert day_nutrient_grams[
+                    week_index, day_index, NUTRIENT_INDICES[nutrient]
+                ] == pytest.approx(grams, rel=1e-6)
+    assert np.asarray(history_store.get_kcal()).sum() == pytest.approx(day_kcal.sum())
+
+
+def test_history_store_rejects_other_versions(
+    tmp_path: Path, world_path: Path, sample_world: SampleWorld
+) -> None:
+    week_path = tmp_path / "weekly" / "2024-01"
+    write_weekly_meal_plan(
+        world_path, week_path, sample_world.create_weekly_meal_plan()
+    )
+    export_history([week_path], world_path, tmp_path / "history")
+    meta_path = tmp_path / "history" / META_FILE_NAME
+    meta = json.loads(meta_path.read_text())
+    meta_path.write_text(json.dumps({**meta, "version": HISTORY_STORE_VERSION - 1}))
+
+    with pytest.raises(ValueError, match="export it again"):
+        HistoryStore.open(tmp_path / "history")
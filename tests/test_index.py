@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from food_manager.editor import WeeklyMealPlanManager
+from food_manager.index import (
+    DependencyIndex,
+    LoadedWorldIndex,
+    create_dependency_index,
+)
+from food_manager.schema import Day, Meal, Ration, Substance
+from food_manager.world import load_world
+from tests.helpers import SampleWorld
+
+
+def _get_where_used_ids(dependency_index: DependencyIndex, balloon: object) -> set[int]:
+    return {id(b) for b in dependency_index.get_where_used(balloon)}
+
+
+def test_world_index_indexes_substances_and_products_by_category(
+    sample_world: SampleWorld,
+) -> None:
+    olive_oil_bottle, tomato_pulp_can, spaghetti_pack = sample_world.products
+
+    world_index = LoadedWorldIndex.create(
+        sample_world.get_substances(), sample_world.products
+    )
+
+    assert world_index.get_category_substances(sample_world.tomato) == (
+        sample_world.tomato_pulp,
+        sample_world.sauce,
+    )
+    assert world_index.get_category_products(sample_world.pasta) == (spaghetti_pack,)
+    assert world_index.get_substance_products(sample_world.olive_oil) == (
+        olive_oil_bottle,
+    )
+    assert world_index.get_substance_products(sample_world.dried_tomato) == ()
+
+
+def test_dependency_index_answers_where_used(
+    sample_world: SampleWorld,
+) -> None:
+    dependency_index = DependencyIndex()
+    weekly_meal_plan = sample_world.create_weekly_meal_plan()
+    for substance in sample_world.get_substances():
+        dependency_index.add(substance)
+    dependency_index.add_weekly_meal_plan(weekly_meal_plan)
+
+    lunch = weekly_meal_plan.dailies[Day.MONDAY].meals[sample_world.lunch]
+    dinner = weekly_meal_plan.dailies[Day.MONDAY].meals[sample_world.dinner]
+    sauce_ration = lunch.rations[1]
+    olive_oil_ration = dinner.rations[1]
+
+    assert [id(b) for b in dependency_index.get_dependents(sample_world.sauce)] == [
+        id(sauce_ration)
+    ]
+    assert _get_where_used_ids(dependency_index, sample_world.olive_oil) == {
+        id(sample_world.sauce),
+        id(sauce_ration),
+        id(lunch),
+        id(olive_oil_ration),
+        id(dinner),
+    }
+
+
+def test_dependency_index_of_world(world_path: Path) -> None:
+    world = load_world(world_path)
+    durum_wheat = world.get_provider(Substance).get("durum-wheat")
+
+    dependency_index = create_dependency_index(world)
+
+    assert {b.name for b in dependency_index.get_where_used(durum_wheat)} == {
+        "spaghetti",
+        "spaghetti-pack",
+    }
+
+
+def test_editor_keeps_dependency_index_in_sync(sample_world: SampleWorld) -> None:
+    weekly_meal_plan = sample_world.create_weekly_meal_plan()
+    lunch = weekly_meal_plan.dailies[Day.MONDAY].meals[sample_world.lunch]
+    dinner = weekly_meal_plan.dailies[Day.MONDAY].meals[sample_world.dinner]
+    dependency_index = DependencyIndex()
+    manager = WeeklyMealPlanManager(weekly_meal_plan, dependency_index=dependency_index)
+
+    # The lunch of Monday is also the lunch of Tuesday, so it stays indexed.
+    manager.delete_daily_meal_plan(Day.MONDAY)
+
+    assert _get_where_used_ids(dependency_index, sample_world.olive_oil) == {
+        id(sample_world.sauce),
+        id(lunch.rations[1]),
+        id(lunch),
+    }
+
+    manager.undo()
+
+    assert id(dinner) in _get_where_used_ids(dependency_index, sample_world.olive_oil)
+
+    manager.redo()
+
+    assert id(dinner) not in _get_where_used_ids(
+        dependency_index, sample_world.olive_oil
+    )
+
+
+def test_editor_indexes_upserted_meals(sample_world: SampleWorld) -> None:
+    weekly_meal_plan = sample_world.create_weekly_meal_plan()
+    dependency_index = DependencyIndex()
+    manager = WeeklyMealPlanManager(weekly_meal_plan, dependency_index=dependency_index)
+    olive_oil_ration = Ration(substance=sample_world.olive_oil, grams=5.0)
+    meal = Meal(slot=sample_world.dinner, rations=(olive_oil_ration,))
+
+    daily_meal_plan_manager = manager.get_daily_meal_plan_manager(Day.TUESDAY)
+    daily_meal_plan_manager.upsert_meal(sample_world.dinner, meal)
+    manager.upsert_daily_meal_plan(Day.TUESDAY, daily_meal_plan_manager.get_entity())
+
+    assert {id(olive_oil_ration), id(meal)} <= _get_where_used_ids(
+        dependency_index, sample_world.olive_oil
+    )
+
+    manager.undo()
+
+    assert not {id(olive_oil_ration), id(meal)} & _get_where_used_ids(
+        dependency_index, sample_world.olive_oil
+    )
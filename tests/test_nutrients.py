@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import pytest
+
+from food_manager.nutrients import NutrientProfile
+from food_manager.schema import Nutrient
+from food_manager.utils import get_kcal
+
+NUTRIENT_GRAMS = {
+    Nutrient.CARB: 30.0,
+    Nutrient.SUGARS: 12.0,
+    Nutrient.FAT: 10.0,
+    Nutrient.SATURATED_FAT: 4.0,
+    Nutrient.PROTEIN: 8.0,
+    Nutrient.ETHANOL: 2.0,
+    Nutrient.FIBER: 6.0,
+}
+
+
+def test_get_kcal_counts_energy_yielding_nutrients_only() -> None:
+    assert get_kcal(NUTRIENT_GRAMS) == pytest.approx(
+        4 * 30.0 + 9 * 10.0 + 4 * 8.0 + 7 * 2.0
+    )
+
+
+def test_nutrient_profile_get_kcal_matches_get_kcal() -> None:
+    profile = NutrientProfile.create(NUTRIENT_GRAMS)
+
+    assert profile.get_kcal() == pytest.approx(get_kcal(NUTRIENT_GRAMS))
+
+
+def test_nutrient_profile_round_trips_through_encoding() -> None:
+    profile = NutrientProfile.create({Nutrient.FAT: 0.5, Nutrient.FIBER: 0.0})
+
+    decoded_profile = NutrientProfile.decode(profile.encode())
+
+    assert decoded_profile.to_dict() == {Nutrient.FAT: 0.5, Nutrient.FIBER: 0.0}
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import pytest
+
+from food_manager.index import LoadedWorldIndex
+from food_manager.schema import Money, Ration, SimpleSubstance, SubstanceProduct
+from food_manager.utils import PriceCalculator
+from tests.helpers import SampleWorld
+
+
+def _create_price_calculator(
+    sample_world: SampleWorld, category_fallback: bool = False
+) -> PriceCalculator:
+    products = list(sample_world.products)
+    world_index = LoadedWorldIndex.create(sample_world.get_substances(), products)
+    return PriceCalculator.create(
+        products, world_index=world_index if category_fallback else None
+    )
+
+
+def test_price_calculator_prices_substances_from_their_products(
+    sample_world: SampleWorld,
+) -> None:
+    price_calculator = _create_price_calculator(sample_world)
+
+    assert price_calculator.get_kg_cents(sample_world.olive_oil) == 950
+    assert price_calculator.get_kg_cents(sample_world.durum_wheat) == 350
+    assert price_calculator.get_kg_cents(sample_world.sauce) == pytest.approx(
+        0.9 * 220 + 0.1 * 950
+    )
+    assert price_calculator.get_kg_cents(sample_world.dried_tomato) == pytest.approx(
+        220 / 0.25
+    )
+    assert price_calculator.get_price(sample_world.spaghetti) == Money(0, 35)
+    assert not price_calculator.is_estimated(
+        Ration(substance=sample_world.sauce, grams=100.0)
+    )
+
+
+def test_price_calculator_leaves_unpriced_substances_unpriced_by_default(
+    sample_world: SampleWorld,
+) -> None:
+    price_calculator = _create_price_calculator(sample_world)
+    seed_oil = SimpleSubstance(category=sample_world.oil, nutrient_ratios={})
+
+    assert price_calculator.get_kg_cents(seed_oil) is None
+    assert not price_calculator.is_kg_price_estimated(seed_oil)
+
+
+def test_price_calculator_estimates_unpriced_substances_when_opted_in(
+    sample_world: SampleWorld,
+) -> None:
+    price_calculator = _create_price_calculator(sample_world, category_fallback=True)
+    seed_oil = SimpleSubstance(category=sample_world.oil, nutrient_ratios={})
+    seed_oil_ration = Ration(substance=seed_oil, grams=100.0)
+
+    assert price_calculator.get_kg_cents(seed_oil) == 950
+    assert price_calculator.is_estimated(seed_oil_ration)
+    assert not price_calculator.is_estimated(sample_world.spaghetti)
+
+
+def test_price_calculator_averages_substance_products_only(
+    sample_world: SampleWorld,
+) -> None:
+    price_calculator = _create_price_calculator(sample_world, category_fallback=True)
+    semolina = SimpleSubstance(category=sample_world.pasta, nutrient_ratios={})
+
+    # The only pasta product is a ration product, which is priced per portion.
+    assert price_calculator.get_kg_cents(semolina) is None
+
+
+def test_price_calculator_updates_estimates_with_category_prices(
+    sample_world: SampleWorld,
+) -> None:
+    price_calculator = _create_price_calculator(sample_world, category_fallback=True)
+    seed_oil = SimpleSubstance(category=sample_world.oil, nutrient_ratios={})
+    assert price_calculator.get_kg_cents(seed_oil) == 950
+
+    price_calculator.update_substance_kg_price(
+        sample_world.olive_oil, Money(units=12, cents=50)
+    )
+
+    assert price_calculator.get_kg_cents(seed_oil) == 1250
+    assert price_calculator.get_kg_cents(sample_world.sauce) == pytest.approx(
+        0.9 * 220 + 0.1 * 1250
+    )
+
+
+def test_price_calculator_replaces_equal_anonymous_products(
+    sample_world: SampleWorld,
+) -> None:
+    def create_seed_oil_bottle(kg_price: Money) -> SubstanceProduct:
+        seed_oil = SimpleSubstance(category=sample_world.oil, nutrient_ratios={})
+        return SubstanceProduct(item=seed_oil, kg_price=kg_price)
+
+    products = [*sample_world.products, create_seed_oil_bottle(Money(3, 50))]
+    world_index = LoadedWorldIndex.create(sample_world.get_substances(), products)
+    price_calculator = PriceCalculator.create(products, world_index=world_index)
+    peanut_oil = SimpleSubstance(category=sample_world.oil, nutrient_ratios={})
+    assert price_calculator.get_kg_cents(peanut_oil) == (950 + 350) / 2
+
+    # An equal product from another inflation replaces the price of the first.
+    price_calculator.update_product(create_seed_oil_bottle(Money(5, 50)))
+
+    assert price_calculator.get_kg_cents(peanut_oil) == (950 + 550) / 2
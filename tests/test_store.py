@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from pathlib import Path
+
+import pytest
+from balloons import ClosedBalloonWorld, NamedBalloon
+
+from food_manager.schema import (
+    CompositeSubstance,
+    Nutrient,
+    Product,
+    Ration,
+    SimpleSubstance,
+    Substance,
+)
+from food_manager.store import WorldStore
+from food_manager.utils import get_nutrient_grams
+from food_manager.world import _load_snapshot_world as load_snapshot_world
+from food_manager.world import load_deferred_world, load_world, load_world_store
+from tests.helpers import SampleWorld, create_sample_world, write_world
+
+
+def _get_names(balloons: Iterable[object]) -> list[str]:
+    names = []
+    for balloon in balloons:
+        assert isinstance(balloon, NamedBalloon)
+        names.append(balloon.name)
+    return names
+
+
+def test_world_store_round_trips_named_balloons(
+    tmp_path: Path, world_path: Path, sample_world: SampleWorld
+) -> None:
+    with WorldStore(tmp_path / "world.sqlite3") as world_store:
+        world_store.add_world(load_world(world_path))
+
+        sauce = world_store.get(Substance, "sauce")
+        olive_oil = world_store.get(Substance, "olive-oil")
+        spaghetti = world_store.get(Ration, "spaghetti")
+
+        assert world_store.get_names(Substance) == [
+            "durum-wheat",
+            "olive-oil",
+            "sauce",
+            "tomato-pulp",
+        ]
+        assert world_store.get_names(SimpleSubstance) == [
+            "durum-wheat",
+            "olive-oil",
+            "tomato-pulp",
+        ]
+        assert world_store.get_names_by_category(Product, sample_world.tomato) == [
+            "tomato-pulp-can"
+        ]
+        assert isinstance(sauce, CompositeSubstance)
+        assert sauce.components[1].substance is olive_oil
+        assert get_nutrient_grams(spaghetti) == get_nutrient_grams(
+            sample_world.spaghetti
+        )
+        assert world_store.get_fingerprint() is None
+
+
+def test_load_world_store_rebuilds_stale_stores(
+    tmp_path: Path, world_path: Path
+) -> None:
+    store_path = tmp_path / "world.sqlite3"
+    world_store = load_world_store(world_path, store_path=store_path)
+    fingerprint = world_store.get_fingerprint()
+    olive_oil = world_store.get(Substance, "olive-oil")
+    assert isinstance(olive_oil, SimpleSubstance)
+    assert olive_oil.nutrient_ratios == {Nutrient.FAT: 1.0}
+    assert load_world_store(world_path, store_path=store_path) is world_store
+    assert world_store.get_fingerprint() == fingerprint
+
+    write_world(create_sample_world(olive_oil_fat=0.25), world_path)
+    world_store = load_world_store(world_path, store_path=store_path)
+
+    assert world_store.get_fingerprint() != fingerprint
+    olive_oil = world_store.get(Substance, "olive-oil")
+    assert isinstance(olive_oil, SimpleSubstance)
+    assert olive_oil.nutrient_ratios == {Nutrient.FAT: 0.25}
+
+
+def test_deferred_world_indexes_from_world_store(
+    tmp_path: Path, world_path: Path, sample_world: SampleWorld
+) -> None:
+    cache_path = tmp_path / "cache"
+    world = load_deferred_world(world_path, cache_path=cache_path)
+
+    world_index = world.get_index()
+
+    assert _get_names(world_index.get_category_substances(sample_world.tomato)) == [
+        "sauce",
+        "tomato-pulp",
+    ]
+    assert _get_names(world_index.get_category_products(sample_world.oil)) == [
+        "olive-oil-bottle"
+    ]
+    olive_oil = world.get_world_store().get(Substance, "olive-oil")
+    assert _get_names(world_index.get_substance_products(olive_oil)) == [
+        "olive-oil-bottle"
+    ]
+    assert [p.suffix for p in sorted(cache_path.iterdir())] == [".pickle", ".sqlite3"]
+
+
+def test_deferred_world_builds_world_store_from_loaded_world(
+    tmp_path: Path, world_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    load_count = 0
+
+    def _load_snapshot_world(
+        paths: tuple[Path, ...], cache_path: Path | None = None
+    ) -> ClosedBalloonWorld:
+        nonlocal load_count
+        load_count += 1
+        return load_snapshot_world(paths, cache_path)
+
+    monkeypatch.setattr("food_manager.world._load_snapshot_world", _load_snapshot_world)
+    world = load_deferred_world(world_path, cache_path=tmp_path / "cache")
+
+    world.get_world()
+    world.get_index()
+
+    assert load_count == 1
@@ -0,0 +1,61 @@
+import io
+import json
+from typing import Any
+
+import pytest
+
+from food_manager.streaming import iter_object_members
+
+PLAN: dict[str, Any] = {
+    "name": 'week "32"\\\n',
+    "dailies": {
+        "monday": {
+            "meals": [
+                {"grams": 1.5, "substance": "oil", "ratio": -0.25e-3},
+                {"grams": 120, "substance": 'té \\ "verde"', "note": None},
+            ],
+            "done": True,
+        },
+        "tuesday": {"meals": [], "done": False, "kcal": 12345.678},
+        "wednesday": 7,
+        "thursday": 'café\t"latte"',
+    },
+    "trailing": [1e10, {"x": []}],
+}
+
+
+@pytest.mark.parametrize("chunk_size", range(1, 9))
+@pytest.mark.parametrize("indent", [None, 2])
+def test_iter_object_members_across_chunk_boundaries(
+    chunk_size: int, indent: int | None
+) -> None:
+    document = json.dumps(PLAN, indent=indent)
+
+    members = list(iter_object_members(io.StringIO(document), ("dailies",), chunk_size))
+
+    assert members == list(PLAN["dailies"].items())
+
+
+@pytest.mark.parametrize("chunk_size", range(1, 9))
+def test_iter_object_members_of_root(chunk_size: int) -> None:
+    document = '{"a": 1.5, "b": -20, "c": 3e-2, "d": "\\"\\\\", "e": 0}'
+
+    members = list(iter_object_members(io.StringIO(document), (), chunk_size))
+
+    assert members == [("a", 1.5), ("b", -20), ("c", 0.03), ("d", '"\\'), ("e", 0)]
+
+
+def test_iter_object_members_of_empty_object() -> None:
+    document = '{"dailies": {}}'
+
+    assert list(iter_object_members(io.StringIO(document), ("dailies",), 1)) == []
+
+
+def test_iter_object_members_with_missing_key() -> None:
+    with pytest.raises(ValueError, match="no member 'dailies'"):
+        list(iter_object_members(io.StringIO('{"weeklies": {}}'), ("dailies",), 1))
+
+
+def test_iter_object_members_with_invalid_document() -> None:
+    with pytest.raises(ValueError):
+        list(iter_object_members(io.StringIO('{"a": 1.5 "b": 2}'), (), 4))
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import pytest
+
+from food_manager.schema import DehydratedSubstance, Ration, Substance
+from food_manager.utils import (
+    compile_substances,
+    get_category_grams,
+    get_category_proportions,
+    get_nutrient_grams,
+    get_nutrient_ratios,
+)
+from tests.helpers import (
+    SampleWorld,
+    get_reference_category_proportions,
+    get_reference_nutrient_ratios,
+)
+
+
+def _get_substances(sample_world: SampleWorld) -> list[Substance]:
+    return [*sample_world.get_substances(), sample_world.dried_tomato]
+
+
+def test_nutrient_ratios_match_reference(sample_world: SampleWorld) -> None:
+    for substance in _get_substances(sample_world):
+        assert get_nutrient_ratios(substance) == pytest.approx(
+            get_reference_nutrient_ratios(substance)
+        )
+
+
+def test_category_proportions_match_reference(sample_world: SampleWorld) -> None:
+    for substance in _get_substances(sample_world):
+        assert get_category_proportions(substance) == pytest.approx(
+            get_reference_category_proportions(substance)
+        )
+
+
+def test_ration_grams_match_reference(sample_world: SampleWorld) -> None:
+    ration = Ration(substance=sample_world.sauce, grams=80.0)
+
+    assert get_nutrient_grams(ration) == pytest.approx(
+        {
+            n: 80.0 * r
+            for n, r in get_reference_nutrient_ratios(ration.substance).items()
+        }
+    )
+    assert get_category_grams(ration) == pytest.approx(
+        {
+            c: 80.0 * p
+            for c, p in get_reference_category_proportions(ration.substance).items()
+        }
+    )
+
+
+def test_compiled_substances_match_reference(sample_world: SampleWorld) -> None:
+    substances = _get_substances(sample_world)
+
+    compile_substances(substances)
+
+    for substance in substances:
+        assert get_nutrient_ratios(substance) == pytest.approx(
+            get_reference_nutrient_ratios(substance)
+        )
+
+
+def test_resolvers_handle_substances_deeper_than_the_recursion_limit(
+    sample_world: SampleWorld,
+) -> None:
+    substance: Substance = sample_world.tomato_pulp
+    for _ in range(5000):
+        substance = DehydratedSubstance(
+            category=sample_world.tomato,
+            original_substance=substance,
+            dehydration_ratio=1.0,
+        )
+
+    assert get_nutrient_ratios(substance) == pytest.approx(
+        sample_world.tomato_pulp.nutrient_ratios
+    )
+    assert get_category_proportions(substance) == {sample_world.tomato: 1.0}
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from food_manager.schema import Nutrient, SimpleSubstance, Substance
+from food_manager.versions import WorldVersions
+from food_manager.world import load_world
+from tests.helpers import create_sample_world, write_world
+
+
+def test_world_versions_commit_only_changed_worlds(
+    tmp_path: Path, world_path: Path
+) -> None:
+    world_versions = WorldVersions(tmp_path / "content")
+
+    assert world_versions.commit(load_world(world_path)) == 0
+    assert world_versions.commit(load_world(world_path)) == 0
+    write_world(create_sample_world(olive_oil_fat=0.5), world_path)
+    assert world_versions.commit(load_world(world_path)) == 1
+
+
+def test_world_versions_see_balloons_as_they_were(
+    tmp_path: Path, world_path: Path
+) -> None:
+    world_versions = WorldVersions(tmp_path / "content")
+    world_versions.commit(load_world(world_path))
+    write_world(create_sample_world(olive_oil_fat=0.5), world_path)
+    world_versions.commit(load_world(world_path))
+
+    reopened_world_versions = WorldVersions(tmp_path / "content")
+
+    assert reopened_world_versions.get_version_count() == 2
+    assert reopened_world_versions.get_names("Substance", 0) == [
+        "durum-wheat",
+        "olive-oil",
+        "sauce",
+        "tomato-pulp",
+    ]
+    for version, fat in ((0, 1.0), (1, 0.5)):
+        olive_oil = reopened_world_versions.at(version).get(Substance, "olive-oil")
+        assert isinstance(olive_oil, SimpleSubstance)
+        assert olive_oil.nutrient_ratios == {Nutrient.FAT: fat}
+    assert reopened_world_versions.get_hash("Substance", "missing", 1) is None
+    with pytest.raises(ValueError, match="No world version"):
+        reopened_world_versions.at(2)
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from food_manager.schema import Substance
+from food_manager.world import load_world
+
+
+def test_load_world_keeps_snapshots_in_cache_path(
+    tmp_path: Path, world_path: Path
+) -> None:
+    cache_path = tmp_path / "snapshots"
+
+    world = load_world(world_path, cache_path=cache_path)
+    snapshot_paths = list(cache_path.iterdir())
+    restored_world = load_world(world_path, cache_path=cache_path)
+
+    assert [p.suffix for p in snapshot_paths] == [".pickle"]
+    assert not (tmp_path / "cache").exists()
+    assert (
+        restored_world.get_provider(Substance).get_names()
+        == world.get_provider(Substance).get_names()
+    )